@@ -0,0 +1,78 @@
+import csv
+import os
+from inventario import cargar_inventario
+from utils import VERDE, ROJO, AMARILLO, CYAN, RESET, obtener_umbral
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+# Archivo del reporte si no se indica otro
+RUTA_ALERTAS = 'alertas_stock.csv'
+
+COLUMNAS = ('sku', 'nombre', 'categoria', 'stock', 'umbral', 'origen_umbral', 'faltante')
+
+
+# ===================================================
+# REPORTE
+# ===================================================
+
+def filas_alertas(productos):
+    """
+    Filas del reporte de alertas (una por producto, en el orden recibido).
+    Args:
+        productos (iterable): Productos en alerta (ver Almacen.productos_en_alerta).
+    Yields:
+        tuple: Valores de COLUMNAS. El origen del umbral es 'producto' o 'categoria'
+            y el faltante son las unidades que faltan para superar el umbral.
+    """
+    for producto in productos:
+        umbral = obtener_umbral(producto)
+        origen = 'categoria' if producto.get('umbral') is None else 'producto'
+        yield (producto['sku'], producto['nombre'], producto['categoria'], producto['stock'],
+            umbral, origen, umbral - producto['stock'] + 1)
+
+
+def escribir_alertas(ruta, productos):
+    """
+    Escribe el reporte de alertas en formato CSV.
+    Args:
+        ruta (str): Ruta del reporte.
+        productos (iterable): Productos en alerta, del más urgente al menos urgente.
+    Returns:
+        int: Cantidad de productos escritos.
+    """
+    cantidad = 0
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS)
+        for fila in filas_alertas(productos):
+            escritor.writerow(fila)
+            cantidad += 1
+    return cantidad
+
+
+def ejecutar_alertas(ruta=None, limite=None):
+    """
+    Exporta los productos en alerta sin menú interactivo (por ejemplo, desde una tarea programada).
+    Args:
+        ruta (str): Ruta del reporte CSV (None: RUTA_ALERTAS).
+        limite (int): Cantidad máxima de productos, los más urgentes (None: todos).
+    Returns:
+        int: Código de salida (0 si no hay alertas, 1 si las hay, 2 si falló la escritura).
+    """
+    ruta = ruta or RUTA_ALERTAS
+    almacen = cargar_inventario()
+    productos = almacen.productos_en_alerta(limite)
+
+    try:
+        cantidad = escribir_alertas(ruta, productos)
+    except OSError as e:
+        print(f"{ROJO}✗ Error al escribir '{ruta}': {e}{RESET}")
+        return 2
+
+    if not cantidad:
+        print(f"{VERDE}✓ No hay productos con stock bajo.{RESET}")
+    else:
+        print(f"{AMARILLO}⚠ Productos con stock bajo: {cantidad}{RESET}")
+    print(f"{CYAN}Reporte de alertas: {os.path.abspath(ruta)}{RESET}")
+    return 1 if cantidad else 0
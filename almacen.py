@@ -0,0 +1,512 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from busqueda import IndiceBusqueda
+from producto import Producto
+from utils import ANCHOS_MINIMOS, calcular_largos, ajustar_anchos, obtener_umbral
+
+
+# ===================================================
+# FUNCIONES AUXILIARES
+# ===================================================
+
+def _siguiente_version(producto, version):
+    return producto['version'] + 1 if version is None else version
+
+
+def _clave_orden(producto):
+    return (producto['categoria'], producto['nombre'], producto['sku'])
+
+
+def _clave_alerta(producto):
+    """
+    Urgencia de un producto con stock en o bajo su umbral (None si no está en alerta).
+    Más urgente: menor fracción del umbral cubierta por el stock; a igualdad, mayor faltante.
+    """
+    umbral = obtener_umbral(producto)
+    stock = producto['stock']
+    if stock > umbral:
+        return None
+    return (stock / umbral if umbral else 0.0, stock - umbral)
+
+
+# ===================================================
+# ALMACÉN DE PRODUCTOS
+# ===================================================
+
+class Almacen:
+    """
+    Almacén de productos con índices en memoria.
+    Mantiene sincronizados los productos, el set de SKUs usados, los índices
+    de búsqueda (ver busqueda.IndiceBusqueda), la vista ordenada por
+    (categoría, nombre), el montículo de alertas de stock bajo, el valor y
+    los productos sin stock de cada categoría y los largos de cada columna
+    de la tabla (para obtener los anchos en O(1)).
+    Los productos se guardan en un diccionario SKU → producto: la eliminación
+    es O(1) y el orden de iteración es el de inserción (determinista).
+    Todas las altas, bajas y modificaciones deben pasar por sus métodos.
+    """
+
+    def __init__(self, productos=None, skus_usados=None):
+        """
+        Construye el almacén e indexa los productos recibidos.
+        Args:
+            productos (iterable): Productos (diccionarios o Producto).
+            skus_usados (set): Set de SKUs ya construido (se reutiliza).
+        """
+        self.skus_usados = skus_usados if skus_usados is not None else set()
+        self._por_sku = {}
+        self._busqueda = IndiceBusqueda(self._por_sku)
+        # Vista ordenada: claves (categoria, nombre, sku) y productos en paralelo.
+        # Se construye al primer uso y luego se mantiene con bisect.
+        self._orden_claves = None
+        self._orden_productos = None
+        # Montículo (urgencia, sku) de productos en alerta, con borrado diferido.
+        # Se construye al primer uso y luego solo se agregan entradas.
+        self._alertas = None
+        # Multiconjunto de largos por columna y anchos calculados (caché)
+        self._largos = {columna: Counter() for columna in ANCHOS_MINIMOS}
+        self._anchos = None
+        # Totales por categoría: categoría → [valor total, productos sin stock]
+        self._totales = {}
+        # Operaciones pendientes de persistir desde el último guardado
+        self._cambios = []
+        # Si es True, el próximo guardado reescribe el archivo completo
+        self.compactar_pendiente = False
+        # Estado de los archivos en disco en la última lectura o guardado
+        self.sello_disco = None
+
+        for producto in productos or []:
+            # Los SKUs duplicados en el archivo se ignoran (se conserva el primero)
+            if producto['sku'] not in self._por_sku:
+                self.agregar(producto)
+
+        # La carga inicial no es un cambio a persistir
+        self._cambios = []
+
+    def __len__(self):
+        return len(self._por_sku)
+
+    def __iter__(self):
+        return iter(self._por_sku.values())
+
+    @property
+    def productos(self):
+        """
+        Lista de productos en orden de inserción (copia, no modificar).
+        """
+        return list(self._por_sku.values())
+
+    def __contains__(self, sku):
+        return sku in self._por_sku
+
+    def obtener(self, sku):
+        """
+        Obtiene un producto por SKU exacto en O(1).
+        Args:
+            sku (str): Código SKU del producto.
+        Returns:
+            Producto o None: Producto encontrado o None si no existe.
+        """
+        return self._por_sku.get(sku)
+
+    def agregar(self, producto):
+        """
+        Agrega un producto al almacén y a todos los índices.
+        Los diccionarios se convierten a Producto (representación compacta).
+        Args:
+            producto (dict o Producto): Datos del producto.
+        Returns:
+            Producto: Producto almacenado.
+        Raises:
+            ValueError: Si el SKU ya existe en el almacén.
+        """
+        sku = producto['sku']
+        if sku in self._por_sku:
+            raise ValueError(f"El SKU '{sku}' ya existe en el inventario.")
+
+        if not isinstance(producto, Producto):
+            producto = Producto.desde_dict(producto)
+
+        self.skus_usados.add(sku)
+        self._por_sku[sku] = producto
+        self._busqueda.agregar(producto)
+        self._insertar_en_orden(producto)
+        self._contar_largos(producto, 1)
+        self._contar_totales(producto, 1)
+        self._vigilar(producto)
+        self._cambios.append({'op': 'registrar', 'producto': dict(producto)})
+        return producto
+
+    def eliminar(self, sku):
+        """
+        Elimina un producto del almacén y de todos los índices en O(1).
+        Args:
+            sku (str): Código SKU del producto a eliminar.
+        Returns:
+            Producto o None: Producto eliminado o None si no existía.
+        """
+        producto = self._por_sku.pop(sku, None)
+        if producto is None:
+            return None
+
+        self.skus_usados.discard(sku)
+        self._busqueda.quitar(producto)
+        self._quitar_de_orden(producto)
+        self._contar_largos(producto, -1)
+        self._contar_totales(producto, -1)
+        # El stock eliminado queda en la operación para el libro de movimientos
+        self._cambios.append({'op': 'eliminar', 'sku': sku, 'version': producto['version'],
+            'stock': producto['stock']})
+        return producto
+
+    def eliminar_varios(self, skus):
+        """
+        Elimina varios productos en una sola pasada.
+        Args:
+            skus (iterable): Códigos SKU a eliminar.
+        Returns:
+            list: Productos eliminados (los SKUs inexistentes se ignoran).
+        """
+        eliminados = []
+        for sku in skus:
+            producto = self.eliminar(sku)
+            if producto is not None:
+                eliminados.append(producto)
+        return eliminados
+
+    def actualizar_stock(self, sku, stock, version=None):
+        """
+        Actualiza el stock de un producto existente.
+        La operación registra también la diferencia (delta) respecto del stock anterior.
+        Args:
+            sku (str): Código SKU del producto.
+            stock (int): Nuevo stock.
+            version (int): Versión resultante (por defecto, la actual + 1).
+        Returns:
+            Producto: Producto actualizado.
+        Raises:
+            KeyError: Si el SKU no existe.
+        """
+        producto = self._por_sku[sku]
+        delta = stock - producto['stock']
+        self._contar_largos(producto, -1)
+        self._contar_totales(producto, -1)
+        producto['stock'] = stock
+        self._contar_largos(producto, 1)
+        self._contar_totales(producto, 1)
+        self._vigilar(producto)
+        producto['version'] = _siguiente_version(producto, version)
+        self._cambios.append({'op': 'stock', 'sku': sku, 'stock': stock, 'delta': delta,
+            'version': producto['version']})
+        return producto
+
+    def actualizar_precio(self, sku, precio, version=None):
+        """
+        Actualiza el precio de un producto existente.
+        Args:
+            sku (str): Código SKU del producto.
+            precio (int): Nuevo precio en CLP.
+            version (int): Versión resultante (por defecto, la actual + 1).
+        Returns:
+            Producto: Producto actualizado.
+        Raises:
+            KeyError: Si el SKU no existe.
+        """
+        producto = self._por_sku[sku]
+        self._contar_largos(producto, -1)
+        self._contar_totales(producto, -1)
+        producto['precio'] = precio
+        self._contar_largos(producto, 1)
+        self._contar_totales(producto, 1)
+        producto['version'] = _siguiente_version(producto, version)
+        self._cambios.append({'op': 'precio', 'sku': sku, 'precio': precio, 'version': producto['version']})
+        return producto
+
+    def actualizar_umbral(self, sku, umbral, version=None):
+        """
+        Cambia el punto de reorden propio de un producto existente.
+        Args:
+            sku (str): Código SKU del producto.
+            umbral (int o None): Nuevo umbral (None: usa el de su categoría).
+            version (int): Versión resultante (por defecto, la actual + 1).
+        Returns:
+            Producto: Producto actualizado.
+        Raises:
+            KeyError: Si el SKU no existe.
+        """
+        producto = self._por_sku[sku]
+        producto['umbral'] = umbral
+        self._vigilar(producto)
+        producto['version'] = _siguiente_version(producto, version)
+        self._cambios.append({'op': 'umbral', 'sku': sku, 'umbral': umbral, 'version': producto['version']})
+        return producto
+
+    def renombrar(self, sku, nombre, version=None):
+        """
+        Cambia el nombre de un producto existente, actualizando sus índices.
+        Args:
+            sku (str): Código SKU del producto.
+            nombre (str): Nuevo nombre.
+            version (int): Versión resultante (por defecto, la actual + 1).
+        Returns:
+            Producto: Producto actualizado.
+        Raises:
+            KeyError: Si el SKU no existe.
+        """
+        producto = self._por_sku[sku]
+        self._busqueda.quitar(producto)
+        self._quitar_de_orden(producto)
+        self._contar_largos(producto, -1)
+
+        producto['nombre'] = nombre
+
+        self._busqueda.agregar(producto)
+        self._insertar_en_orden(producto)
+        self._contar_largos(producto, 1)
+        producto['version'] = _siguiente_version(producto, version)
+        self._cambios.append({'op': 'nombre', 'sku': sku, 'nombre': nombre, 'version': producto['version']})
+        return producto
+
+    def productos_ordenados(self):
+        """
+        Productos ordenados por categoría y nombre. El orden se calcula una vez
+        y se mantiene en cada alta, baja o cambio de nombre.
+        Returns:
+            list: Productos ordenados (lista interna, no modificar).
+        """
+        if self._orden_productos is None:
+            self._orden_productos = sorted(self._por_sku.values(), key=_clave_orden)
+            self._orden_claves = [_clave_orden(producto) for producto in self._orden_productos]
+        return self._orden_productos
+
+    def anchos_columnas(self):
+        """
+        Anchos de las columnas de la tabla para todos los productos.
+        Se obtienen de los largos mantenidos en cada cambio, sin recorrer los productos.
+        Returns:
+            dict: Diccionario con los anchos de cada columna.
+        """
+        if self._anchos is None:
+            self._anchos = ajustar_anchos(self.largos_maximos())
+        return self._anchos
+
+    def largos_maximos(self):
+        """
+        Largo máximo del contenido de cada columna de la tabla (sin los límites
+        de la pantalla), a partir de los largos mantenidos en cada cambio.
+        Returns:
+            dict: Largo máximo de cada columna (0 si no hay productos).
+        """
+        # Cada multiconjunto tiene pocos largos distintos
+        return {columna: max(largos) if largos else 0 for columna, largos in self._largos.items()}
+
+    def totales(self, categoria=None):
+        """
+        Valor total y productos sin stock, mantenidos en cada cambio (sin recorrer los productos).
+        Args:
+            categoria (str): Categoría (None: todo el inventario).
+        Returns:
+            tuple: (valor total, cantidad de productos sin stock)
+        """
+        if categoria is not None:
+            valor, sin_stock = self._totales.get(categoria, (0, 0))
+            return valor, sin_stock
+        return (sum(valor for valor, _ in self._totales.values()),
+            sum(sin_stock for _, sin_stock in self._totales.values()))
+
+    def rango_categoria(self, categoria):
+        """
+        Obtiene el rango de una categoría dentro de productos_ordenados() en O(log n).
+        Args:
+            categoria (str): Categoría buscada.
+        Returns:
+            tuple: (inicio, fin) del rango; inicio == fin si no hay productos.
+        """
+        self.productos_ordenados()
+        inicio = bisect_left(self._orden_claves, (categoria,))
+        fin = bisect_left(self._orden_claves, (categoria + '\0',))
+        return inicio, fin
+
+    def productos_en_alerta(self, limite=None):
+        """
+        Productos con stock en o bajo su umbral, del más urgente al menos urgente.
+        Saca del montículo solo las entradas necesarias: las obsoletas (producto
+        eliminado o con otro stock o umbral) se descartan y las vigentes se
+        devuelven al montículo.
+        Args:
+            limite (int): Cantidad máxima de productos (None: todos).
+        Returns:
+            list: Productos en alerta ordenados por urgencia.
+        """
+        if self._alertas is None:
+            self._alertas = []
+            for producto in self._por_sku.values():
+                clave = _clave_alerta(producto)
+                if clave is not None:
+                    self._alertas.append((clave, producto['sku']))
+            heapq.heapify(self._alertas)
+
+        productos = []
+        vigentes = []
+        while self._alertas and (limite is None or len(productos) < limite):
+            clave, sku = heapq.heappop(self._alertas)
+            producto = self._por_sku.get(sku)
+            # Un producto que cambió varias veces puede tener más de una entrada vigente
+            if producto is None or _clave_alerta(producto) != clave or (vigentes and vigentes[-1][1] == sku):
+                continue
+            vigentes.append((clave, sku))
+            productos.append(producto)
+
+        for entrada in vigentes:
+            heapq.heappush(self._alertas, entrada)
+        return productos
+
+    def buscar(self, busqueda, limite=None):
+        """
+        Busca por SKU o nombre (sin distinguir mayúsculas ni tildes) usando los índices.
+        Incluye prefijos y coincidencias aproximadas (errores de tipeo).
+        Args:
+            busqueda (str): Término de búsqueda ingresado por el usuario.
+            limite (int): Cantidad máxima de resultados (None: todos).
+        Returns:
+            list: Productos ordenados por relevancia: SKU exacto, prefijo del SKU,
+                  prefijo del nombre, parte del nombre y aproximados.
+        """
+        return self._busqueda.buscar(busqueda, limite)
+
+    # ---------------------------------------------------
+    # Registro de cambios (journal)
+    # ---------------------------------------------------
+
+    @property
+    def hay_cambios(self):
+        return bool(self._cambios)
+
+    def reemplazar_con(self, otro):
+        """
+        Reemplaza el contenido de este almacén por el de otro (mismo objeto para
+        quien ya lo referencia, por ejemplo el menú).
+        Args:
+            otro (Almacen): Almacén con el nuevo contenido.
+        """
+        self.__dict__.update(otro.__dict__)
+
+    def tomar_cambios(self):
+        """
+        Entrega las operaciones pendientes y limpia el registro.
+        Returns:
+            list: Operaciones realizadas desde el último guardado.
+        """
+        cambios = self._cambios
+        self._cambios = []
+        return cambios
+
+    def devolver_cambios(self, cambios):
+        """
+        Reincorpora operaciones que no se pudieron persistir (antes de las nuevas).
+        Args:
+            cambios (list): Operaciones obtenidas con tomar_cambios.
+        """
+        self._cambios = cambios + self._cambios
+
+    def aplicar_operacion(self, operacion):
+        """
+        Aplica una operación del journal. Las operaciones son idempotentes:
+        registrar un SKU existente o eliminar uno inexistente no tiene efecto.
+        El producto queda con la versión indicada en la operación.
+        Args:
+            operacion (dict): Operación con la clave 'op' y sus datos.
+        Raises:
+            ValueError: Si el tipo de operación es desconocido.
+        """
+        tipo = operacion['op']
+        if tipo == 'registrar':
+            if operacion['producto']['sku'] not in self._por_sku:
+                self.agregar(operacion['producto'])
+        elif tipo == 'stock':
+            if operacion['sku'] in self._por_sku:
+                self.actualizar_stock(operacion['sku'], operacion['stock'], operacion.get('version'))
+        elif tipo == 'precio':
+            if operacion['sku'] in self._por_sku:
+                self.actualizar_precio(operacion['sku'], operacion['precio'], operacion.get('version'))
+        elif tipo == 'nombre':
+            if operacion['sku'] in self._por_sku:
+                self.renombrar(operacion['sku'], operacion['nombre'], operacion.get('version'))
+        elif tipo == 'umbral':
+            if operacion['sku'] in self._por_sku:
+                self.actualizar_umbral(operacion['sku'], operacion['umbral'], operacion.get('version'))
+        elif tipo == 'eliminar':
+            self.eliminar(operacion['sku'])
+        else:
+            raise ValueError(f"Operación desconocida en el journal: '{tipo}'")
+
+    # ---------------------------------------------------
+    # Vista ordenada
+    # ---------------------------------------------------
+
+    def _insertar_en_orden(self, producto):
+        if self._orden_claves is None:
+            return
+        clave = _clave_orden(producto)
+        posicion = bisect_right(self._orden_claves, clave)
+        self._orden_claves.insert(posicion, clave)
+        self._orden_productos.insert(posicion, producto)
+
+    def _quitar_de_orden(self, producto):
+        if self._orden_claves is None:
+            return
+        posicion = bisect_left(self._orden_claves, _clave_orden(producto))
+        del self._orden_claves[posicion]
+        del self._orden_productos[posicion]
+
+    # ---------------------------------------------------
+    # Alertas de stock bajo
+    # ---------------------------------------------------
+
+    def _vigilar(self, producto):
+        """
+        Agrega una entrada al montículo de alertas si el producto quedó en alerta.
+        Las entradas anteriores del producto no se buscan: quedan obsoletas y se
+        descartan al consultarlas (borrado diferido).
+        """
+        if self._alertas is None:
+            return
+        clave = _clave_alerta(producto)
+        if clave is not None:
+            heapq.heappush(self._alertas, (clave, producto['sku']))
+            # Demasiadas entradas obsoletas: se reconstruye en la próxima consulta
+            if len(self._alertas) > 2 * len(self._por_sku) + 64:
+                self._alertas = None
+
+    # ---------------------------------------------------
+    # Largos de columnas
+    # ---------------------------------------------------
+
+    def _contar_largos(self, producto, signo):
+        """
+        Suma (signo=1) o resta (signo=-1) los largos del producto al multiconjunto.
+        Quitar el producto que tenía el máximo deja como máximo al siguiente largo.
+        """
+        for columna, largo in calcular_largos(producto).items():
+            largos = self._largos[columna]
+            largos[largo] += signo
+            if largos[largo] <= 0:
+                del largos[largo]
+        self._anchos = None
+
+    # ---------------------------------------------------
+    # Totales por categoría
+    # ---------------------------------------------------
+
+    def _contar_totales(self, producto, signo):
+        """
+        Suma (signo=1) o resta (signo=-1) el valor del producto y si está sin stock
+        a los totales de su categoría.
+        """
+        totales = self._totales.get(producto['categoria'])
+        if totales is None:
+            totales = self._totales[producto['categoria']] = [0, 0]
+        totales[0] += signo * producto['precio'] * producto['stock']
+        if producto['stock'] == 0:
+            totales[1] += signo
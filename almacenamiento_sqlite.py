@@ -0,0 +1,256 @@
+import sqlite3
+from almacen import Almacen
+from producto import Producto, CAMPOS
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+ESQUEMA = (
+    """CREATE TABLE IF NOT EXISTS productos (
+        sku TEXT PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        precio INTEGER NOT NULL,
+        stock INTEGER NOT NULL CHECK (stock >= 0),
+        version INTEGER NOT NULL DEFAULT 0,
+        umbral INTEGER CHECK (umbral >= 0)
+    )""",
+    # El SKU ya está indexado por ser la clave primaria
+    "CREATE INDEX IF NOT EXISTS idx_productos_categoria_nombre ON productos (categoria, nombre)",
+    "CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre)",
+)
+
+# Tiempo máximo (segundos) de espera cuando otra sesión está escribiendo
+ESPERA_MAXIMA = 30
+
+# Sentencias parametrizadas: sqlite3 las prepara una vez por conexión y las reutiliza
+SQL_SELECCIONAR = f"SELECT {', '.join(CAMPOS)} FROM productos ORDER BY rowid"
+SQL_INSERTAR = f"INSERT INTO productos ({', '.join(CAMPOS)}) VALUES ({', '.join('?' * len(CAMPOS))})"
+SQL_STOCK = "UPDATE productos SET stock = stock + ?, version = version + 1 WHERE sku = ? AND stock + ? >= 0"
+SQL_STOCK_ACTUAL = "SELECT stock FROM productos WHERE sku = ?"
+SQL_PRECIO = "UPDATE productos SET precio = ?, version = version + 1 WHERE sku = ? AND version = ?"
+SQL_NOMBRE = "UPDATE productos SET nombre = ?, version = version + 1 WHERE sku = ? AND version = ?"
+SQL_UMBRAL = "UPDATE productos SET umbral = ?, version = version + 1 WHERE sku = ? AND version = ?"
+SQL_ELIMINAR = "DELETE FROM productos WHERE sku = ? AND version = ?"
+SQL_EXISTE = "SELECT 1 FROM productos WHERE sku = ?"
+
+# Conexiones abiertas por ruta (se reutilizan entre guardados)
+_conexiones = {}
+
+
+# ===================================================
+# CONEXIÓN
+# ===================================================
+
+def conectar(ruta):
+    """
+    Abre (o reutiliza) la conexión a la base de datos y crea el esquema si no existe.
+    La base usa WAL: los lectores no bloquean al escritor y cada guardado
+    solo escribe las filas modificadas.
+    Args:
+        ruta (str): Ruta del archivo de la base de datos.
+    Returns:
+        sqlite3.Connection: Conexión en modo autocommit (transacciones explícitas).
+    """
+    conexion = _conexiones.get(ruta)
+    if conexion is not None:
+        return conexion
+
+    conexion = sqlite3.connect(ruta, timeout=ESPERA_MAXIMA, isolation_level=None, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    # Con WAL, NORMAL no pierde consistencia ante un corte (solo las últimas transacciones)
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    for sentencia in ESQUEMA:
+        conexion.execute(sentencia)
+    # Bases creadas antes de los umbrales de reorden
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(productos)")}
+    if 'umbral' not in columnas:
+        conexion.execute("ALTER TABLE productos ADD COLUMN umbral INTEGER CHECK (umbral >= 0)")
+    _conexiones[ruta] = conexion
+    return conexion
+
+
+def cerrar(ruta):
+    """
+    Cierra la conexión abierta para la ruta, si existe.
+    Args:
+        ruta (str): Ruta del archivo de la base de datos.
+    """
+    conexion = _conexiones.pop(ruta, None)
+    if conexion is not None:
+        conexion.close()
+
+
+def _fila(producto):
+    """
+    Valores de un producto en el orden de CAMPOS ('version' es 0 y 'umbral' NULL si faltan).
+    """
+    return tuple(producto.get(campo, 0 if campo == 'version' else None) for campo in CAMPOS)
+
+
+def _version_datos(conexion):
+    """
+    Contador de SQLite que cambia cuando otra conexión confirma cambios.
+    """
+    return conexion.execute("PRAGMA data_version").fetchone()[0]
+
+
+# ===================================================
+# CARGA Y GUARDADO
+# ===================================================
+
+def cargar(ruta):
+    """
+    Carga todos los productos de la base de datos en un almacén.
+    Args:
+        ruta (str): Ruta del archivo de la base de datos (se crea si no existe).
+    Returns:
+        Almacen: Almacén con los productos (en orden de inserción).
+    Raises:
+        sqlite3.Error: Si la base de datos no se puede leer.
+    """
+    conexion = conectar(ruta)
+    # Una transacción de lectura: la carga ve una foto consistente de la base
+    conexion.execute("BEGIN")
+    try:
+        almacen = Almacen(Producto(*fila) for fila in conexion.execute(SQL_SELECCIONAR))
+        almacen.sello_disco = _version_datos(conexion)
+    finally:
+        conexion.execute("COMMIT")
+    return almacen
+
+
+def guardar(almacen, ruta, en_hilo_almacen=None):
+    """
+    Guarda en una sola transacción las operaciones pendientes del almacén.
+    Cada operación actualiza solo su fila, con control de versión:
+    - Stock: se suma la diferencia (delta), así no se pierden movimientos de otras sesiones.
+    - Precio, nombre, umbral y eliminación: solo si la fila no fue modificada por otra sesión.
+    - Registro de un SKU ya existente: se descarta.
+    Si otra sesión guardó o hubo conflictos, el almacén se recarga desde la base.
+    Args:
+        almacen (Almacen): Almacén con los cambios pendientes.
+        ruta (str): Ruta del archivo de la base de datos.
+        en_hilo_almacen (callable): Función en_hilo_almacen(funcion, *args) con la que se
+            reemplaza el almacén recargado, en el hilo que lo usa (None: en el hilo actual).
+    Returns:
+        tuple: (lista de operaciones aplicadas, lista de mensajes de conflictos)
+    Raises:
+        sqlite3.Error: Si falla la escritura (los cambios quedan pendientes).
+    """
+    conexion = conectar(ruta)
+    cambios = almacen.tomar_cambios()
+    try:
+        # Toma el bloqueo de escritura desde el inicio de la transacción
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            otra_sesion = _version_datos(conexion) != almacen.sello_disco
+            aplicadas = []
+            conflictos = []
+            for operacion in cambios:
+                conflicto = _aplicar(conexion, operacion)
+                if conflicto:
+                    conflictos.append(conflicto)
+                else:
+                    aplicadas.append(operacion)
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+    except Exception:
+        almacen.devolver_cambios(cambios)
+        raise
+
+    if otra_sesion or conflictos:
+        # El almacén queda igual a la base (incluye los cambios de otras sesiones)
+        recargado = cargar(ruta)
+        if en_hilo_almacen is None:
+            almacen.reemplazar_con(recargado)
+        else:
+            en_hilo_almacen(almacen.reemplazar_con, recargado)
+    else:
+        almacen.sello_disco = _version_datos(conexion)
+    return aplicadas, conflictos
+
+
+def _aplicar(conexion, operacion):
+    """
+    Aplica una operación del almacén sobre la base de datos (dentro de la transacción).
+    Args:
+        conexion (sqlite3.Connection): Conexión con la transacción abierta.
+        operacion (dict): Operación registrada por el almacén.
+    Returns:
+        str o None: Mensaje de conflicto, o None si se aplicó.
+    Raises:
+        ValueError: Si el tipo de operación es desconocido.
+    """
+    tipo = operacion['op']
+
+    if tipo == 'registrar':
+        producto = operacion['producto']
+        try:
+            conexion.execute(SQL_INSERTAR, _fila(producto))
+        except sqlite3.IntegrityError:
+            return f"{producto['sku']}: ya fue registrado por otra sesión"
+        return None
+
+    sku = operacion['sku']
+    if tipo == 'stock':
+        delta = operacion['delta']
+        if conexion.execute(SQL_STOCK, (delta, sku, delta)).rowcount:
+            return None
+        fila = conexion.execute(SQL_STOCK_ACTUAL, (sku,)).fetchone()
+        if fila is None:
+            return f"{sku}: fue eliminado por otra sesión"
+        return f"{sku}: el stock quedaría negativo ({fila[0] + delta}), se conserva {fila[0]}"
+
+    if tipo == 'eliminar':
+        if conexion.execute(SQL_ELIMINAR, (sku, operacion['version'])).rowcount:
+            return None
+        if conexion.execute(SQL_EXISTE, (sku,)).fetchone() is None:
+            # Ya estaba eliminado: el resultado es el mismo
+            return None
+        return f"{sku}: fue modificado por otra sesión, no se eliminó"
+
+    if tipo in ('precio', 'nombre', 'umbral'):
+        sql = {'precio': SQL_PRECIO, 'nombre': SQL_NOMBRE, 'umbral': SQL_UMBRAL}[tipo]
+        if conexion.execute(sql, (operacion[tipo], sku, operacion['version'] - 1)).rowcount:
+            return None
+        if conexion.execute(SQL_EXISTE, (sku,)).fetchone() is None:
+            return f"{sku}: fue eliminado por otra sesión"
+        return f"{sku}: fue modificado por otra sesión, se conserva su {tipo}"
+
+    raise ValueError(f"Operación desconocida: '{tipo}'")
+
+
+# ===================================================
+# MIGRACIÓN
+# ===================================================
+
+def migrar(productos, ruta, reemplazar=False):
+    """
+    Importa productos (por ejemplo, los de inventario.txt) a la base de datos
+    en una sola transacción.
+    Args:
+        productos (iterable): Productos a importar (Producto o diccionarios).
+        ruta (str): Ruta del archivo de la base de datos.
+        reemplazar (bool): Si es True, borra los productos que ya tenga la base.
+    Returns:
+        int: Cantidad de productos importados.
+    Raises:
+        ValueError: Si la base ya tiene productos y reemplazar es False.
+    """
+    conexion = conectar(ruta)
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        if conexion.execute("SELECT COUNT(*) FROM productos").fetchone()[0]:
+            if not reemplazar:
+                raise ValueError(f"La base de datos '{ruta}' ya tiene productos.")
+            conexion.execute("DELETE FROM productos")
+        filas = (_fila(producto) for producto in productos)
+        cantidad = conexion.executemany(SQL_INSERTAR, filas).rowcount
+        conexion.execute("COMMIT")
+    except BaseException:
+        conexion.execute("ROLLBACK")
+        raise
+    return cantidad
@@ -0,0 +1,678 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import almacenamiento_sqlite
+import exportacion
+import importacion
+import inventario
+from almacen import Almacen
+from formatos import FORMATO_NDJSON, escribir_productos
+from operaciones import visualizar_inventario
+from producto import Producto
+from utils import (
+    CATEGORIAS, LIMITE_RESULTADOS, VERDE, ROJO, CYAN, RESET,
+    formatear_precio, buscar_producto, calcular_anchos_columnas
+)
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+MARCAS = ("HP", "DELL", "LENOVO", "ASUS", "MSI", "ACER", "LOGITECH", "RAZER", "KINGSTON", "SAMSUNG")
+MODELOS = ("PRO", "GAMER", "SLIM", "ULTRA", "MAX", "LITE", "PLUS", "AIR", "X", "ELITE")
+
+
+# ===================================================
+# GENERACIÓN DE DATOS
+# ===================================================
+
+def generar_catalogo(cantidad, semilla=42):
+    """
+    Genera un catálogo sintético de productos (diccionarios) con SKUs únicos.
+    Args:
+        cantidad (int): Cantidad de productos a generar.
+        semilla (int): Semilla del generador aleatorio (resultados reproducibles).
+    Yields:
+        dict: Producto con las claves sku, nombre, categoria, precio y stock.
+    """
+    aleatorio = random.Random(semilla)
+    for numero in range(cantidad):
+        yield {
+            'sku': f"SK{numero:08d}",
+            'nombre': f"{aleatorio.choice(MARCAS)} {aleatorio.choice(MODELOS)} {aleatorio.randint(1, 9999)}",
+            'categoria': aleatorio.choice(CATEGORIAS),
+            'precio': aleatorio.randint(1000, 2000000),
+            'stock': aleatorio.randint(0, 500),
+        }
+
+
+def medir_memoria(construir):
+    """
+    Mide la memoria retenida por la estructura que retorna construir().
+    Args:
+        construir (callable): Función que construye y retorna la estructura.
+    Returns:
+        int: Bytes asignados que siguen vivos tras la construcción.
+    """
+    tracemalloc.start()
+    try:
+        estructura = construir()
+        actual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del estructura
+    return actual
+
+
+# ===================================================
+# BENCHMARKS
+# ===================================================
+
+def comparar_memoria(cantidad):
+    """
+    Compara la memoria de los productos como diccionarios y como Producto (__slots__).
+    Args:
+        cantidad (int): Cantidad de productos.
+    Returns:
+        dict: Bytes usados por cada representación.
+    """
+    catalogo = list(generar_catalogo(cantidad))
+
+    resultados = {
+        'dict': medir_memoria(lambda: [dict(producto) for producto in catalogo]),
+        'slots': medir_memoria(lambda: [Producto.desde_dict(producto) for producto in catalogo]),
+    }
+
+    print(f"Memoria para {cantidad} productos (sin contar los strings compartidos):")
+    for nombre, bytes_usados in resultados.items():
+        print(f"  {nombre.ljust(6)}: {formatear_precio(bytes_usados).lstrip('$')} bytes "
+            f"({bytes_usados / cantidad:.1f} bytes/producto)")
+    print(f"  Ahorro: {100 - resultados['slots'] * 100 / resultados['dict']:.1f}%")
+    return resultados
+
+
+@contextlib.contextmanager
+def usar_directorio(directorio):
+    """
+    Apunta los archivos del inventario a otro directorio (datos de prueba)
+    mientras dura el bloque, y al salir restaura las rutas anteriores.
+    Args:
+        directorio (str): Directorio donde quedan inventario.txt, el journal y el bloqueo.
+    """
+    rutas = {
+        'RUTA_INVENTARIO': 'inventario.txt',
+        'RUTA_BACKUP': 'inventario_backup.txt',
+        'RUTA_JOURNAL': 'inventario.journal',
+        'RUTA_BLOQUEO': 'inventario.lock',
+        'RUTA_SQLITE': 'inventario.db',
+        'RUTA_INDICE': 'inventario.idx',
+        'RUTA_MOVIMIENTOS': 'movimientos.ndjson',
+        'RUTA_MOVIMIENTOS_CHECKPOINT': 'movimientos.checkpoint',
+    }
+    originales = {nombre: getattr(inventario, nombre) for nombre in rutas}
+    for nombre, archivo in rutas.items():
+        setattr(inventario, nombre, os.path.join(directorio, archivo))
+    try:
+        yield
+    finally:
+        # Un guardado en segundo plano escribe en las rutas vigentes al ejecutarse
+        inventario.esperar_guardado()
+        for nombre, ruta in originales.items():
+            setattr(inventario, nombre, ruta)
+
+
+def cronometrar(funcion):
+    """
+    Ejecuta una función sin mostrar sus mensajes y mide su duración.
+    Args:
+        funcion (callable): Función a medir.
+    Returns:
+        tuple: (resultado de la función, segundos transcurridos)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        return resultado, time.perf_counter() - inicio
+
+
+def _sesion_concurrente(argumentos):
+    """
+    Sesión de escritura de la prueba de concurrencia (se ejecuta en otro proceso).
+    Args:
+        argumentos (tuple): (directorio, semilla, operaciones, guardar_cada, cantidad de productos)
+    Returns:
+        int: Suma de las diferencias de stock aplicadas por la sesión.
+    """
+    directorio, semilla, operaciones, guardar_cada, cantidad = argumentos
+    with usar_directorio(directorio):
+        # Journal pequeño para forzar compactaciones durante la prueba
+        inventario.LIMITE_JOURNAL = 8 * 1024
+        aleatorio = random.Random(semilla)
+        suma_deltas = 0
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            almacen = inventario.cargar_inventario()
+            for numero in range(1, operaciones + 1):
+                sku = f"SK{aleatorio.randrange(cantidad):08d}"
+                delta = aleatorio.randint(-3, 5)
+                stock = almacen.obtener(sku)['stock']
+                if stock + delta >= 0:
+                    almacen.actualizar_stock(sku, stock + delta)
+                    suma_deltas += delta
+                if numero % guardar_cada == 0:
+                    inventario.guardar_inventario(almacen, en_segundo_plano=False)
+            inventario.guardar_inventario(almacen, en_segundo_plano=False)
+
+        return suma_deltas
+
+
+def probar_concurrencia(procesos=8, operaciones=300, guardar_cada=10, cantidad=50):
+    """
+    Prueba de estrés: varios procesos actualizan el stock del mismo inventario a la vez.
+    Verifica que ninguna diferencia de stock se pierda (el total final debe ser el
+    inicial más la suma de todas las diferencias aplicadas) y que el libro de
+    movimientos cuadre con el stock final de cada producto.
+    Args:
+        procesos (int): Sesiones simultáneas.
+        operaciones (int): Actualizaciones de stock por sesión.
+        guardar_cada (int): Cada cuántas operaciones guarda cada sesión.
+        cantidad (int): Productos del inventario (pocos, para provocar conflictos).
+    Returns:
+        bool: True si el resultado es consistente.
+    """
+    directorio = tempfile.mkdtemp(prefix='techstore-concurrencia-')
+    try:
+        with usar_directorio(directorio):
+            productos = list(generar_catalogo(cantidad))
+            for producto in productos:
+                producto['stock'] = 1000
+            with open(inventario.RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
+                escribir_productos(f, productos)
+            stock_inicial = 1000 * cantidad
+
+            inicio = time.perf_counter()
+            with multiprocessing.Pool(procesos) as pool:
+                deltas = pool.map(_sesion_concurrente, [
+                    (directorio, semilla, operaciones, guardar_cada, cantidad) for semilla in range(procesos)
+                ])
+            duracion = time.perf_counter() - inicio
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                almacen = inventario.cargar_inventario()
+            stock_final = sum(producto['stock'] for producto in almacen)
+            esperado = stock_inicial + sum(deltas)
+            libro = inventario.libro_movimientos()
+            descuadres = [producto['sku'] for producto in almacen
+                if libro.stock_actual(producto['sku']) not in (None, producto['stock'])]
+
+            print(f"{procesos} procesos x {operaciones} operaciones en {duracion:.2f} s "
+                f"({procesos * operaciones / duracion:.0f} operaciones/s)")
+            if stock_final == esperado and len(almacen) == cantidad and not descuadres:
+                print(f"{VERDE}✓ Stock final consistente: {stock_final} (inicial {stock_inicial} + deltas {sum(deltas)}){RESET}")
+                return True
+            print(f"{ROJO}✗ Stock final {stock_final}, esperado {esperado} ({len(almacen)} productos, "
+                f"{len(descuadres)} descuadres en el libro de movimientos){RESET}")
+            return False
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def comparar_almacenamientos(cantidad, guardados=100):
+    """
+    Compara el almacenamiento JSON (inventario.txt + journal) con SQLite:
+    carga completa, guardados de un solo cambio de stock y reescritura completa.
+    Args:
+        cantidad (int): Cantidad de productos del catálogo.
+        guardados (int): Guardados de un cambio que se miden (se informa el promedio).
+    Returns:
+        dict: Segundos de cada medición por almacenamiento.
+    """
+    directorio = tempfile.mkdtemp(prefix='techstore-almacenamiento-')
+    almacenamiento_original = inventario.ALMACENAMIENTO
+    resultados = {}
+    try:
+        with usar_directorio(directorio):
+            with open(inventario.RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
+                escribir_productos(f, generar_catalogo(cantidad))
+            _, resultados['migración a SQLite'] = cronometrar(inventario.migrar_a_sqlite)
+
+            for almacenamiento in inventario.ALMACENAMIENTOS:
+                inventario.ALMACENAMIENTO = almacenamiento
+                almacen, resultados[f'{almacenamiento}: carga'] = cronometrar(inventario.cargar_inventario)
+
+                skus = [f"SK{numero:08d}" for numero in random.Random(7).sample(range(cantidad), guardados)]
+                total = 0
+                for sku in skus:
+                    almacen.actualizar_stock(sku, almacen.obtener(sku)['stock'] + 1)
+                    _, duracion = cronometrar(lambda: inventario.guardar_inventario(almacen, en_segundo_plano=False))
+                    total += duracion
+                resultados[f'{almacenamiento}: guardar 1 cambio'] = total / guardados
+
+                if almacenamiento == inventario.ALMACENAMIENTO_JSON:
+                    # La compactación reescribe el catálogo completo
+                    _, resultados['json: compactación'] = cronometrar(
+                        lambda: inventario.compactar_inventario(almacen, en_segundo_plano=False))
+
+            print(f"Almacenamiento con {cantidad} productos:")
+            for nombre, segundos in resultados.items():
+                print(f"  {nombre.ljust(24)}: {segundos * 1000:10.3f} ms")
+            return resultados
+    finally:
+        inventario.ALMACENAMIENTO = almacenamiento_original
+        almacenamiento_sqlite.cerrar(os.path.join(directorio, 'inventario.db'))
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# ===================================================
+# IMPORTACIÓN
+# ===================================================
+
+def medir_importacion(cantidad, procesos=None):
+    """
+    Mide la importación de un archivo NDJSON con 1, 2, 4... procesos: la lectura
+    y validación en paralelo y la importación completa (incluye la fusión en el almacén).
+    Args:
+        cantidad (int): Cantidad de productos del archivo.
+        procesos (int): Máximo de procesos (None: uno por núcleo).
+    Returns:
+        dict: Procesos → (segundos de validación, segundos de importación).
+    """
+    maximo = procesos or os.cpu_count() or 1
+    directorio = tempfile.mkdtemp(prefix='techstore-importacion-')
+    ruta = os.path.join(directorio, 'productos.ndjson')
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            escribir_productos(f, generar_catalogo(cantidad), FORMATO_NDJSON)
+
+        resultados = {}
+        cantidades = [1]
+        while cantidades[-1] * 2 <= maximo:
+            cantidades.append(cantidades[-1] * 2)
+        if cantidades[-1] != maximo:
+            cantidades.append(maximo)
+
+        print(f"Importación de {cantidad} productos ({os.path.getsize(ruta) // 1024 // 1024} MB):")
+        for procesos in cantidades:
+            inicio = time.perf_counter()
+            for _ in importacion.validar_archivo(ruta, procesos):
+                pass
+            validacion = time.perf_counter() - inicio
+            _, total = cronometrar(lambda: importacion.importar_productos(Almacen(), ruta, procesos))
+            resultados[procesos] = (validacion, total)
+            print(f"  {procesos:>2} procesos: validación {validacion:7.2f} s ({cantidad / validacion:>9.0f} filas/s), "
+                f"importación {total:7.2f} s")
+        return resultados
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# ===================================================
+# EXPORTACIÓN
+# ===================================================
+
+def medir_exportacion(cantidad):
+    """
+    Mide la exportación del inventario completo y de una categoría en cada formato:
+    tiempo (una ejecución) y pico de memoria, que no debe crecer con la cantidad.
+    Args:
+        cantidad (int): Cantidad de productos del catálogo.
+    Returns:
+        dict: {(formato, alcance): {'segundos', 'memoria_pico'}}
+    """
+    directorio = tempfile.mkdtemp(prefix='techstore-exportacion-')
+    try:
+        almacen = Almacen(generar_catalogo(cantidad))
+        almacen.productos_ordenados()
+
+        resultados = {}
+        print(f"Exportación de {cantidad} productos:")
+        for formato in exportacion.FORMATOS:
+            ruta = os.path.join(directorio, f"inventario.{formato}")
+            for categoria in (None, CATEGORIAS[0]):
+                caso = medir(lambda: exportacion.exportar_inventario(almacen, ruta, formato, categoria), repeticiones=1)
+                resultados[(formato, categoria or 'completo')] = caso
+                print(f"  {formato.ljust(6)} {(categoria or 'completo').ljust(11)}: {caso['segundos']:7.2f} s, "
+                    f"{os.path.getsize(ruta) / 1024 / 1024:8.1f} MB escritos, "
+                    f"pico de memoria {caso['memoria_pico'] / 1024:8.1f} KB")
+        return resultados
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# ===================================================
+# ARRANQUE
+# ===================================================
+
+# Sesión del menú que mide medir_arranque (se ejecuta en otro proceso): apunta los
+# archivos al directorio de prueba, fija el umbral de carga diferida y abre el menú
+_PROGRAMA_ARRANQUE = '''
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import inventario
+for nombre, ruta in json.loads(sys.argv[2]).items():
+    setattr(inventario, nombre, ruta)
+inventario.UMBRAL_CARGA_DIFERIDA = float(sys.argv[3])
+import main
+main.main()
+'''
+
+
+def _tiempo_hasta_menu(umbral):
+    """
+    Inicia el menú en otro proceso y mide cuánto tarda en mostrar las opciones.
+    Args:
+        umbral (float): UMBRAL_CARGA_DIFERIDA del proceso (inf: siempre carga completa).
+    Returns:
+        float: Segundos desde el inicio del proceso hasta el menú.
+    """
+    rutas = {nombre: valor for nombre, valor in vars(inventario).items() if nombre.startswith('RUTA_')}
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, '-c', _PROGRAMA_ARRANQUE, inventario.DIRECTORIO_BASE, json.dumps(rutas), str(umbral)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8',
+        env=dict(os.environ, PYTHONUNBUFFERED='1'))
+    try:
+        for linea in proceso.stdout:
+            if 'Menú de Opciones' in linea:
+                segundos = time.perf_counter() - inicio
+                break
+        else:
+            raise RuntimeError("El menú no se mostró")
+        # Sale sin guardar
+        proceso.communicate("9\nN\n", timeout=600)
+        return segundos
+    finally:
+        if proceso.poll() is None:
+            proceso.kill()
+
+
+def medir_arranque(cantidad, repeticiones=3):
+    """
+    Tiempo hasta el primer menú con carga completa y con carga diferida
+    (mejor de varias ejecuciones, incluye el inicio del intérprete).
+    Args:
+        cantidad (int): Cantidad de productos del catálogo.
+        repeticiones (int): Ejecuciones de cada caso.
+    Returns:
+        dict: Segundos de cada caso.
+    """
+    directorio = tempfile.mkdtemp(prefix='techstore-arranque-')
+    try:
+        with usar_directorio(directorio):
+            with open(inventario.RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
+                escribir_productos(f, generar_catalogo(cantidad))
+
+            resultados = {
+                'carga completa': min(_tiempo_hasta_menu(float('inf')) for _ in range(repeticiones)),
+                'carga diferida': min(_tiempo_hasta_menu(0) for _ in range(repeticiones)),
+            }
+            print(f"Tiempo hasta el menú con {cantidad} productos:")
+            for nombre, segundos in resultados.items():
+                print(f"  {nombre.ljust(16)}: {segundos * 1000:10.1f} ms")
+            return resultados
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# ===================================================
+# SUITE DE RENDIMIENTO
+# ===================================================
+
+# Búsquedas de la suite: SKU exacto, prefijo de SKU, prefijo de nombre, parte del nombre y con error de tipeo
+BUSQUEDAS = ('SK00000042', 'SK0000', 'HP PRO', 'ULTRA 12', 'logitch')
+
+# Aumento relativo (tiempo o memoria) a partir del cual se informa una regresión
+TOLERANCIA = 0.20
+
+# Diferencias absolutas menores se consideran ruido de medición (segundos y bytes)
+DIFERENCIA_MINIMA = {'segundos': 0.001, 'memoria_pico': 64 * 1024}
+
+
+@contextlib.contextmanager
+def entrada_simulada(texto):
+    """
+    Entrega texto como entrada estándar (para ejecutar funciones del menú sin usuario).
+    Args:
+        texto (str): Respuestas que leerá input(), una por línea.
+    """
+    entrada_original = sys.stdin
+    sys.stdin = io.StringIO(texto)
+    try:
+        yield
+    finally:
+        sys.stdin = entrada_original
+
+
+def medir(funcion, repeticiones=3, memoria=True):
+    """
+    Mide una función sin mostrar sus mensajes: el menor tiempo de varias
+    ejecuciones y el pico de memoria (tracemalloc) de una ejecución adicional.
+    Args:
+        funcion (callable): Función a medir.
+        repeticiones (int): Ejecuciones cronometradas.
+        memoria (bool): Si es False no mide memoria (la función no se vuelve a ejecutar).
+    Returns:
+        dict: {'segundos': float, 'memoria_pico': bytes o None}
+    """
+    segundos = min(cronometrar(funcion)[1] for _ in range(repeticiones))
+
+    pico = None
+    if memoria:
+        # tracemalloc hace más lenta la ejecución: la memoria se mide aparte
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {'segundos': segundos, 'memoria_pico': pico}
+
+
+def ejecutar_suite(cantidades, mostrar=True):
+    """
+    Mide las rutas críticas con catálogos sintéticos de cada tamaño (sin interacción):
+    carga, visualización, anchos de columnas, búsqueda, guardado y compactación.
+    Args:
+        cantidades (iterable): Cantidades de productos (por ejemplo 1000 a 10000000).
+        mostrar (bool): Si es True muestra los resultados de cada tamaño al terminarlo.
+    Returns:
+        dict: {cantidad (str): {caso: {'segundos', 'memoria_pico'}}}
+    """
+    resultados = {}
+    almacenamiento_original = inventario.ALMACENAMIENTO
+    for cantidad in cantidades:
+        directorio = tempfile.mkdtemp(prefix='techstore-suite-')
+        try:
+            with usar_directorio(directorio):
+                inventario.ALMACENAMIENTO = inventario.ALMACENAMIENTO_JSON
+                with open(inventario.RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
+                    escribir_productos(f, generar_catalogo(cantidad))
+
+                casos = {}
+                grandes = cantidad >= 1000000
+                casos['carga'] = medir(inventario.cargar_inventario, repeticiones=1 if grandes else 3)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    almacen = inventario.cargar_inventario()
+
+                def visualizar():
+                    # Enter: muestra la primera página y vuelve
+                    with entrada_simulada('\n'):
+                        visualizar_inventario(almacen)
+
+                # La primera vez construye el orden por categoría y nombre
+                casos['visualizar (primera vez)'] = medir(visualizar, repeticiones=1, memoria=False)
+                casos['visualizar'] = medir(visualizar)
+
+                productos = almacen.productos
+                casos['anchos (lista)'] = medir(lambda: calcular_anchos_columnas(productos))
+                sku = f"SK{cantidad // 2:08d}"
+
+                def anchos_tras_cambio():
+                    almacen.actualizar_stock(sku, almacen.obtener(sku)['stock'] + 1)
+                    calcular_anchos_columnas(almacen)
+
+                casos['anchos (almacén)'] = medir(anchos_tras_cambio)
+
+                # La primera búsqueda construye las listas ordenadas de prefijos
+                buscar_producto(almacen, BUSQUEDAS[0], LIMITE_RESULTADOS)
+
+                def buscar():
+                    for busqueda in BUSQUEDAS:
+                        buscar_producto(almacen, busqueda, LIMITE_RESULTADOS)
+
+                casos['búsqueda'] = medir(buscar)
+                casos['búsqueda']['segundos'] /= len(BUSQUEDAS)
+
+                def guardar_un_cambio():
+                    almacen.actualizar_stock(sku, almacen.obtener(sku)['stock'] + 1)
+                    inventario.guardar_inventario(almacen, en_segundo_plano=False)
+
+                casos['guardado (1 cambio)'] = medir(guardar_un_cambio)
+                casos['compactación'] = medir(lambda: inventario.compactar_inventario(almacen, en_segundo_plano=False),
+                    repeticiones=1 if grandes else 3)
+
+                resultados[str(cantidad)] = casos
+                if mostrar:
+                    mostrar_resultados(cantidad, casos)
+        finally:
+            inventario.ALMACENAMIENTO = almacenamiento_original
+            shutil.rmtree(directorio, ignore_errors=True)
+    return resultados
+
+
+def mostrar_resultados(cantidad, casos, base=None):
+    """
+    Muestra los resultados de un tamaño de catálogo y, si hay línea base, la diferencia.
+    Args:
+        cantidad (int): Cantidad de productos.
+        casos (dict): Resultados de cada caso.
+        base (dict): Resultados de la línea base para el mismo tamaño (opcional).
+    """
+    print(f"\n{CYAN}{formatear_precio(int(cantidad)).lstrip('$')} productos{RESET}")
+    for caso, medicion in casos.items():
+        memoria = medicion['memoria_pico']
+        linea = (f"  {caso.ljust(26)} {medicion['segundos'] * 1000:12.3f} ms"
+            f"{(f'{memoria / 1024 / 1024:10.1f} MB' if memoria is not None else '-'.rjust(13))}")
+        if base and caso in base:
+            linea += f"   tiempo {_variacion(medicion['segundos'], base[caso]['segundos'])}"
+            linea += f"   memoria {_variacion(memoria, base[caso]['memoria_pico'])}"
+        print(linea)
+
+
+def _variacion(actual, anterior):
+    if actual is None or not anterior:
+        return '-'.rjust(7)
+    return f"{(actual - anterior) * 100 / anterior:+6.1f}%"
+
+
+def comparar_con_linea_base(resultados, linea_base, tolerancia=TOLERANCIA):
+    """
+    Compara los resultados con una línea base y lista las regresiones.
+    Args:
+        resultados (dict): Resultados de ejecutar_suite.
+        linea_base (dict): Resultados guardados anteriormente.
+        tolerancia (float): Aumento relativo permitido (0.2 = 20%).
+    Returns:
+        list: Mensajes de las regresiones (vacía si no hay).
+    """
+    regresiones = []
+    for cantidad, casos in resultados.items():
+        base = linea_base.get(cantidad)
+        if base is None:
+            continue
+        mostrar_resultados(cantidad, casos, base)
+        for caso, medicion in casos.items():
+            if caso not in base:
+                continue
+            for metrica in ('segundos', 'memoria_pico'):
+                actual, anterior = medicion[metrica], base[caso][metrica]
+                if (actual is not None and anterior and actual > anterior * (1 + tolerancia)
+                        and actual - anterior >= DIFERENCIA_MINIMA[metrica]):
+                    regresiones.append(f"{cantidad} productos, {caso}: {metrica} "
+                        f"{_variacion(actual, anterior).strip()}")
+    return regresiones
+
+
+if __name__ == "__main__":
+    """
+    Uso:
+        python benchmark.py memoria [cantidad]
+        python benchmark.py concurrencia [procesos] [operaciones]
+        python benchmark.py almacenamiento [cantidad]
+        python benchmark.py arranque [cantidad]
+        python benchmark.py importacion [cantidad] [--procesos n]
+        python benchmark.py exportacion [cantidad]
+        python benchmark.py suite [cantidades...] [--guardar archivo] [--comparar archivo] [--tolerancia 0.2]
+    """
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="TechStore - mediciones de rendimiento")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    comando_memoria = comandos.add_parser("memoria", help="Memoria de diccionarios vs Producto (__slots__)")
+    comando_memoria.add_argument("cantidad", type=int, nargs="?", default=100000)
+
+    comando_concurrencia = comandos.add_parser("concurrencia", help="Prueba de estrés con varios procesos")
+    comando_concurrencia.add_argument("procesos", type=int, nargs="?", default=8)
+    comando_concurrencia.add_argument("operaciones", type=int, nargs="?", default=300)
+
+    comando_almacenamiento = comandos.add_parser("almacenamiento", help="Compara los almacenamientos JSON y SQLite")
+    comando_almacenamiento.add_argument("cantidad", type=int, nargs="?", default=100000)
+
+    comando_arranque = comandos.add_parser("arranque", help="Tiempo hasta el menú: carga completa vs diferida")
+    comando_arranque.add_argument("cantidad", type=int, nargs="?", default=100000)
+
+    comando_importacion = comandos.add_parser("importacion", help="Importación en paralelo con 1, 2, 4... procesos")
+    comando_importacion.add_argument("cantidad", type=int, nargs="?", default=200000)
+    comando_importacion.add_argument("--procesos", type=int, help="Máximo de procesos (por defecto uno por núcleo)")
+
+    comando_exportacion = comandos.add_parser("exportacion", help="Exportación en CSV, NDJSON y texto")
+    comando_exportacion.add_argument("cantidad", type=int, nargs="?", default=1000000)
+
+    comando_suite = comandos.add_parser("suite", help="Mide carga, guardado, búsqueda y visualización")
+    comando_suite.add_argument("cantidades", type=int, nargs="*", default=[1000, 10000, 100000])
+    comando_suite.add_argument("--guardar", help="Guarda los resultados como línea base (JSON)")
+    comando_suite.add_argument("--comparar", help="Compara con una línea base guardada (JSON)")
+    comando_suite.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+        help=f"Aumento permitido antes de informar una regresión (por defecto {TOLERANCIA})")
+
+    opciones = parser.parse_args()
+
+    if opciones.comando == "memoria":
+        comparar_memoria(opciones.cantidad)
+    elif opciones.comando == "concurrencia":
+        sys.exit(0 if probar_concurrencia(opciones.procesos, opciones.operaciones) else 1)
+    elif opciones.comando == "almacenamiento":
+        comparar_almacenamientos(opciones.cantidad)
+    elif opciones.comando == "arranque":
+        medir_arranque(opciones.cantidad)
+    elif opciones.comando == "importacion":
+        medir_importacion(opciones.cantidad, opciones.procesos)
+    elif opciones.comando == "exportacion":
+        medir_exportacion(opciones.cantidad)
+    else:
+        resultados = ejecutar_suite(opciones.cantidades, mostrar=not opciones.comparar)
+
+        if opciones.guardar:
+            with open(opciones.guardar, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+            print(f"\n{VERDE}✓ Línea base guardada en {opciones.guardar}{RESET}")
+
+        if opciones.comparar:
+            with open(opciones.comparar, 'r', encoding='utf-8') as f:
+                regresiones = comparar_con_linea_base(resultados, json.load(f), opciones.tolerancia)
+            if regresiones:
+                print(f"\n{ROJO}✗ Regresiones ({len(regresiones)}):{RESET}")
+                for regresion in regresiones:
+                    print(f"  {regresion}")
+                sys.exit(1)
+            print(f"\n{VERDE}✓ Sin regresiones respecto de {opciones.comparar}{RESET}")
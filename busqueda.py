@@ -0,0 +1,320 @@
+import heapq
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+TAMANO_NGRAMA = 3
+
+# Similitud mínima (Dice entre trigramas) para corregir una palabra mal escrita
+SIMILITUD_MINIMA = 0.4
+
+
+# ===================================================
+# FUNCIONES AUXILIARES
+# ===================================================
+
+def normalizar(texto):
+    """
+    Normaliza un texto para buscar: mayúsculas y sin tildes ('Periféricos' → 'PERIFERICOS').
+    Si el texto ya está normalizado se retorna el mismo objeto (sin copiarlo).
+    Args:
+        texto (str): Texto a normalizar.
+    Returns:
+        str: Texto normalizado.
+    """
+    mayusculas = texto.upper()
+    if mayusculas.isascii():
+        return texto if mayusculas == texto else mayusculas
+    descompuesto = unicodedata.normalize('NFD', mayusculas)
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def generar_ngramas(texto):
+    """
+    Obtiene los n-gramas (trigramas) de un texto.
+    Args:
+        texto (str): Texto a descomponer.
+    Returns:
+        set: Conjunto de n-gramas del texto.
+    """
+    return {texto[i:i + TAMANO_NGRAMA] for i in range(len(texto) - TAMANO_NGRAMA + 1)}
+
+
+def _trigramas_palabra(palabra):
+    """
+    Trigramas de una palabra con bordes (' RAZER ' → ' RA', 'RAZ', ..., 'ER '):
+    los bordes dan peso al inicio y fin de palabras cortas.
+    """
+    return generar_ngramas(f" {palabra} ")
+
+
+def _rango_prefijo(claves, prefijo):
+    """
+    Posiciones [inicio, fin) de las claves ordenadas que empiezan con el prefijo.
+    """
+    inicio = bisect_left(claves, prefijo)
+    # '\U0010ffff' es mayor que cualquier carácter: acota todas las claves con el prefijo
+    return inicio, bisect_left(claves, prefijo + '\U0010ffff', inicio)
+
+
+# ===================================================
+# ÍNDICE DE BÚSQUEDA
+# ===================================================
+
+class IndiceBusqueda:
+    """
+    Índices de búsqueda de productos (los mantiene el Almacen en cada alta, baja
+    o cambio de nombre):
+    - Trigramas del nombre normalizado → SKUs (búsqueda parcial).
+    - Vocabulario de palabras de los nombres y sus trigramas (corrige errores de
+      tipeo comparando contra unas miles de palabras, no contra cada producto).
+    - SKUs y nombres normalizados ordenados (búsqueda por prefijo con bisect).
+      Cumplen la función de un trie sin un objeto por letra: un prefijo es un
+      rango contiguo de las listas ordenadas. Se construyen en la primera
+      búsqueda y luego se mantienen con bisect.
+
+    Los resultados se ordenan por relevancia:
+        SKU exacto > prefijo del SKU > prefijo del nombre > parte del nombre > aproximada
+    """
+
+    def __init__(self, por_sku):
+        """
+        Args:
+            por_sku (dict): Diccionario SKU → producto del almacén (compartido).
+        """
+        self._por_sku = por_sku
+        self._trigramas = {}
+        # Palabra → cantidad de productos que la usan, y trigramas de cada palabra
+        self._palabras = Counter()
+        self._trigramas_palabras = {}
+        self._skus_ordenados = None
+        self._nombres_ordenados = None
+        self._skus_por_nombre = None
+
+    # ---------------------------------------------------
+    # Mantenimiento
+    # ---------------------------------------------------
+
+    def agregar(self, producto):
+        """
+        Indexa un producto (alta o nombre nuevo).
+        Args:
+            producto (Producto): Producto ya guardado en el almacén.
+        """
+        sku = producto['sku']
+        nombre = normalizar(producto['nombre'])
+        for trigrama in generar_ngramas(nombre):
+            self._trigramas.setdefault(trigrama, set()).add(sku)
+        for palabra in set(nombre.split()):
+            if not self._palabras[palabra]:
+                for trigrama in _trigramas_palabra(palabra):
+                    self._trigramas_palabras.setdefault(trigrama, set()).add(palabra)
+            self._palabras[palabra] += 1
+
+        if self._skus_ordenados is not None:
+            self._skus_ordenados.insert(bisect_left(self._skus_ordenados, sku), sku)
+            # Entre nombres iguales se ordena por SKU
+            posicion = bisect_left(self._nombres_ordenados, nombre)
+            while (posicion < len(self._nombres_ordenados) and self._nombres_ordenados[posicion] == nombre
+                    and self._skus_por_nombre[posicion] < sku):
+                posicion += 1
+            self._nombres_ordenados.insert(posicion, nombre)
+            self._skus_por_nombre.insert(posicion, sku)
+
+    def quitar(self, producto):
+        """
+        Quita un producto de los índices (baja o nombre anterior).
+        Args:
+            producto (Producto): Producto con el nombre que está indexado.
+        """
+        sku = producto['sku']
+        nombre = normalizar(producto['nombre'])
+        for trigrama in generar_ngramas(nombre):
+            skus = self._trigramas.get(trigrama)
+            if skus is not None:
+                skus.discard(sku)
+                if not skus:
+                    del self._trigramas[trigrama]
+        for palabra in set(nombre.split()):
+            self._palabras[palabra] -= 1
+            if self._palabras[palabra] <= 0:
+                del self._palabras[palabra]
+                for trigrama in _trigramas_palabra(palabra):
+                    palabras = self._trigramas_palabras.get(trigrama)
+                    if palabras is not None:
+                        palabras.discard(palabra)
+                        if not palabras:
+                            del self._trigramas_palabras[trigrama]
+
+        if self._skus_ordenados is not None:
+            del self._skus_ordenados[bisect_left(self._skus_ordenados, sku)]
+            # Entre nombres iguales se busca el del SKU
+            posicion = bisect_left(self._nombres_ordenados, nombre)
+            while self._skus_por_nombre[posicion] != sku:
+                posicion += 1
+            del self._nombres_ordenados[posicion]
+            del self._skus_por_nombre[posicion]
+
+    def _construir_ordenados(self):
+        if self._skus_ordenados is not None:
+            return
+        self._skus_ordenados = sorted(self._por_sku)
+        pares = sorted((normalizar(producto['nombre']), sku) for sku, producto in self._por_sku.items())
+        self._nombres_ordenados = [nombre for nombre, _ in pares]
+        self._skus_por_nombre = [sku for _, sku in pares]
+
+    # ---------------------------------------------------
+    # Búsqueda
+    # ---------------------------------------------------
+
+    def buscar(self, busqueda, limite=None):
+        """
+        Busca productos por SKU o nombre, sin distinguir mayúsculas ni tildes.
+        Args:
+            busqueda (str): Término de búsqueda.
+            limite (int): Cantidad máxima de resultados (None: todos).
+        Returns:
+            list: Productos ordenados por relevancia.
+        """
+        consulta = normalizar(busqueda.strip())
+        if not consulta or limite is not None and limite <= 0:
+            return []
+
+        resultados = []
+        vistos = set()
+
+        def completo():
+            return limite is not None and len(resultados) >= limite
+
+        def agregar(skus):
+            for sku in skus:
+                if sku not in vistos:
+                    vistos.add(sku)
+                    resultados.append(self._por_sku[sku])
+                    if completo():
+                        return
+
+        # 1. SKU exacto en O(1)
+        agregar(sku for sku in dict.fromkeys((busqueda.strip().upper(), consulta)) if sku in self._por_sku)
+        sku_exacto = bool(resultados)
+
+        # 2 y 3. Prefijo del SKU y del nombre: rangos contiguos de las listas ordenadas
+        self._construir_ordenados()
+        if not completo():
+            inicio, fin = _rango_prefijo(self._skus_ordenados, consulta)
+            agregar(self._skus_ordenados[inicio:fin] if limite is None
+                else self._skus_ordenados[inicio:min(fin, inicio + limite)])
+        if not completo():
+            inicio, fin = _rango_prefijo(self._nombres_ordenados, consulta)
+            agregar(self._skus_por_nombre[inicio:fin] if limite is None
+                else self._skus_por_nombre[inicio:min(fin, inicio + limite + len(vistos))])
+
+        # 4. Parte del nombre
+        if not completo():
+            agregar(self._contienen(consulta, vistos, None if limite is None else limite - len(resultados)))
+
+        # 5. Aproximada: corrige palabras mal escritas (no aplica si se ingresó un SKU exacto)
+        if not completo() and not sku_exacto:
+            agregar(self._aproximados(consulta, vistos, None if limite is None else limite - len(resultados)))
+
+        return resultados
+
+    def _contienen(self, consulta, excluidos, cantidad):
+        """
+        SKUs cuyo nombre contiene la consulta, en orden de nombre.
+        Args:
+            consulta (str): Búsqueda normalizada.
+            excluidos (set): SKUs ya incluidos en los resultados.
+            cantidad (int): Cantidad máxima (None: todos).
+        Returns:
+            list: SKUs encontrados.
+        """
+        # Búsquedas más cortas que un trigrama: recorre los nombres en orden y corta al completar
+        if len(consulta) < TAMANO_NGRAMA:
+            # Sin espacios, la consulta debe estar dentro de alguna palabra del vocabulario
+            if ' ' not in consulta and not any(consulta in palabra for palabra in self._palabras):
+                return []
+            encontrados = []
+            for nombre, sku in zip(self._nombres_ordenados, self._skus_por_nombre):
+                if consulta in nombre and sku not in excluidos:
+                    encontrados.append(sku)
+                    if cantidad is not None and len(encontrados) >= cantidad:
+                        break
+            return encontrados
+
+        # Intersecta los trigramas desde el conjunto más pequeño
+        conjuntos = [self._trigramas.get(trigrama) for trigrama in generar_ngramas(consulta)]
+        if not all(conjuntos):
+            return []
+        conjuntos.sort(key=len)
+        skus = conjuntos[0] - excluidos
+        for conjunto in conjuntos[1:]:
+            skus &= conjunto
+            if not skus:
+                return []
+
+        # Los trigramas no garantizan que estén contiguos: se verifica el texto
+        candidatos = [(normalizar(self._por_sku[sku]['nombre']), sku) for sku in skus]
+        candidatos = [(nombre, sku) for nombre, sku in candidatos if consulta in nombre]
+        if cantidad is None:
+            candidatos.sort()
+        else:
+            candidatos = heapq.nsmallest(cantidad, candidatos)
+        return [sku for _, sku in candidatos]
+
+    def _aproximados(self, consulta, excluidos, cantidad):
+        """
+        Corrige las palabras de la consulta que no existen en ningún nombre
+        (errores de tipeo) y busca con la consulta corregida.
+        Args:
+            consulta (str): Búsqueda normalizada.
+            excluidos (set): SKUs ya incluidos en los resultados.
+            cantidad (int): Cantidad máxima (None: todos).
+        Returns:
+            list: SKUs encontrados (prefijo y luego parte del nombre corregido).
+        """
+        palabras = consulta.split()
+        corregida = ' '.join(self._corregir(palabra) for palabra in palabras)
+        if corregida == ' '.join(palabras):
+            return []
+
+        encontrados = []
+        inicio, fin = _rango_prefijo(self._nombres_ordenados, corregida)
+        for posicion in range(inicio, fin):
+            sku = self._skus_por_nombre[posicion]
+            if sku not in excluidos:
+                encontrados.append(sku)
+                if cantidad is not None and len(encontrados) >= cantidad:
+                    return encontrados
+
+        restantes = None if cantidad is None else cantidad - len(encontrados)
+        return encontrados + self._contienen(corregida, excluidos.union(encontrados), restantes)
+
+    def _corregir(self, palabra):
+        """
+        Reemplaza una palabra inexistente por la más parecida del vocabulario
+        (similitud de Dice entre trigramas con bordes), si supera SIMILITUD_MINIMA.
+        Args:
+            palabra (str): Palabra normalizada.
+        Returns:
+            str: Palabra corregida (o la misma si existe o no hay una parecida).
+        """
+        if palabra in self._palabras:
+            return palabra
+
+        trigramas = _trigramas_palabra(palabra)
+        comunes = Counter()
+        for trigrama in trigramas:
+            comunes.update(self._trigramas_palabras.get(trigrama, ()))
+
+        mejor, mejor_clave = palabra, None
+        for candidata, cantidad in comunes.items():
+            similitud = 2 * cantidad / (len(trigramas) + len(_trigramas_palabra(candidata)))
+            # Mayor similitud; a igualdad, la palabra más frecuente y luego la primera alfabéticamente
+            clave = (-similitud, -self._palabras[candidata], candidata)
+            if similitud >= SIMILITUD_MINIMA and (mejor_clave is None or clave < mejor_clave):
+                mejor, mejor_clave = candidata, clave
+        return mejor
@@ -0,0 +1,411 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from almacen import Almacen
+from producto import Producto
+from utils import AMARILLO, CYAN, RESET
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+
+# Inicio de cada producto en el archivo: '{' seguido de la clave "sku" (así los
+# escribe formatos.escribir_productos, en JSON y en NDJSON). Captura el SKU crudo.
+PATRON_SKU = re.compile(rb'\{\s*"sku"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Bytes que se leen para decodificar un producto (se duplica si no alcanza)
+VENTANA_PRODUCTO = 1024
+
+# Bits de la posición en las claves de ordenamiento del índice (archivos de hasta 1 TB)
+BITS_POSICION = 40
+
+# Archivo de índice (inventario.idx): firma (versión y orden de bytes de los arrays),
+# estado del archivo de datos (tamaño, fecha de modificación y CRC32), CRC32 de los
+# arrays, cantidad de entradas y de SKUs distintos. Siguen los hashes y las posiciones.
+FIRMA_INDICE = b'TSIDX1' + (b'L' if sys.byteorder == 'little' else b'B') + b'\0'
+CABECERA_INDICE = struct.Struct('<8sQqIIQQ')
+
+
+# ===================================================
+# FUNCIONES AUXILIARES
+# ===================================================
+
+def hash_sku(sku):
+    """
+    Hash estable de 8 bytes de un SKU (igual en todos los procesos, a diferencia
+    de hash()). Dos SKUs pueden compartirlo: el índice verifica el producto.
+    Args:
+        sku (str o bytes): SKU (bytes en UTF-8).
+    Returns:
+        int: Hash de 64 bits (CRC32 en la parte alta, Adler-32 en la baja).
+    """
+    if isinstance(sku, str):
+        sku = sku.encode('utf-8')
+    return (zlib.crc32(sku) << 32) | zlib.adler32(sku)
+
+
+def firma_archivo(ruta, datos):
+    """
+    Estado de un archivo de datos al que se asocia un índice guardado.
+    Args:
+        ruta (str): Ruta del archivo.
+        datos (mmap o bytes): Contenido del archivo.
+    Returns:
+        tuple: (tamaño, fecha de modificación en ns, CRC32 del contenido)
+    """
+    estado = os.stat(ruta)
+    return estado.st_size, estado.st_mtime_ns, zlib.crc32(datos)
+
+
+def leer_producto(datos, posicion):
+    """
+    Decodifica el producto que empieza en una posición del archivo (mmap o bytes).
+    Args:
+        datos (mmap o bytes): Contenido del archivo de inventario.
+        posicion (int): Posición del '{' del producto.
+    Returns:
+        dict: Producto leído.
+    Raises:
+        json.JSONDecodeError: Si en esa posición no hay un producto válido.
+    """
+    decodificador = json.JSONDecoder()
+    ventana = VENTANA_PRODUCTO
+    while True:
+        fin = min(posicion + ventana, len(datos))
+        # Un carácter multibyte cortado al final de la ventana se descarta
+        texto = datos[posicion:fin].decode('utf-8', errors='ignore')
+        try:
+            return decodificador.raw_decode(texto)[0]
+        except json.JSONDecodeError:
+            if fin == len(datos):
+                raise
+            ventana *= 2
+
+
+# ===================================================
+# ÍNDICE SKU → POSICIÓN
+# ===================================================
+
+class IndiceSkus:
+    """
+    Índice compacto SKU → posición del producto en el archivo de inventario:
+    hashes de 8 bytes ordenados y posiciones en arrays paralelos (16 bytes por
+    producto, sin un objeto por SKU). Una consulta es una búsqueda binaria más
+    la lectura del producto para descartar colisiones de hash.
+    """
+
+    def __init__(self, hashes, posiciones, cantidad=None, archivo=None):
+        """
+        Args:
+            hashes (array('Q') o memoryview): Hashes de los SKUs, ordenados.
+            posiciones (array('Q') o memoryview): Posición del producto de cada hash.
+            cantidad (int): SKUs distintos (None: se cuentan).
+            archivo (mmap): Archivo de índice mapeado del que leen hashes y posiciones.
+        """
+        self.hashes = hashes
+        self.posiciones = posiciones
+        # SKUs distintos: los duplicados del archivo comparten hash y la carga conserva uno
+        if cantidad is None:
+            cantidad = sum(1 for anterior, actual in zip(hashes, hashes[1:]) if anterior != actual) + bool(hashes)
+        self.cantidad = cantidad
+        self._archivo = archivo
+
+    @classmethod
+    def construir(cls, datos):
+        """
+        Recorre el archivo con una expresión regular (sin decodificar los productos).
+        Args:
+            datos (mmap o bytes): Contenido del archivo de inventario.
+        Returns:
+            IndiceSkus: Índice de todos los productos del archivo.
+        """
+        # Hash y posición en un solo entero: ordenarlos ordena por hash y, entre
+        # hashes iguales, por posición (orden del archivo)
+        claves = []
+        for coincidencia in PATRON_SKU.finditer(datos):
+            sku = coincidencia.group(1)
+            if b'\\' in sku:
+                # SKU con caracteres escapados: se decodifica como string JSON
+                sku = json.loads(b'"' + sku + b'"')
+            claves.append(hash_sku(sku) << BITS_POSICION | coincidencia.start())
+        claves.sort()
+
+        mascara = (1 << BITS_POSICION) - 1
+        return cls(array('Q', [clave >> BITS_POSICION for clave in claves]),
+            array('Q', [clave & mascara for clave in claves]))
+
+    @classmethod
+    def abrir(cls, ruta, firma):
+        """
+        Abre un índice guardado con mmap (sin leerlo completo), si corresponde al archivo de datos.
+        Args:
+            ruta (str): Ruta del archivo de índice.
+            firma (tuple): Estado actual del archivo de datos (ver firma_archivo).
+        Returns:
+            IndiceSkus o None: Índice guardado, o None si no existe, está dañado o
+                pertenece a otra versión del archivo de datos.
+        """
+        try:
+            with open(ruta, 'rb') as f:
+                archivo = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(archivo) >= CABECERA_INDICE.size:
+            firma_indice, tamano, modificacion, crc_datos, crc_cuerpo, entradas, cantidad = \
+                CABECERA_INDICE.unpack_from(archivo)
+            cuerpo = memoryview(archivo)[CABECERA_INDICE.size:]
+            if (firma_indice == FIRMA_INDICE and (tamano, modificacion, crc_datos) == firma
+                    and len(cuerpo) == entradas * 16 and zlib.crc32(cuerpo) == crc_cuerpo):
+                enteros = cuerpo.cast('Q')
+                return cls(enteros[:entradas], enteros[entradas:], cantidad, archivo)
+            cuerpo.release()
+        archivo.close()
+        return None
+
+    def guardar(self, ruta, firma):
+        """
+        Guarda el índice en un archivo binario (reemplazo atómico). Es un caché:
+        si se pierde o queda desactualizado, se reconstruye desde el archivo de datos.
+        Args:
+            ruta (str): Ruta del archivo de índice.
+            firma (tuple): Estado del archivo de datos indexado (ver firma_archivo).
+        """
+        hashes = array('Q', self.hashes)
+        posiciones = array('Q', self.posiciones)
+        crc_cuerpo = zlib.crc32(posiciones, zlib.crc32(hashes))
+        cabecera = CABECERA_INDICE.pack(FIRMA_INDICE, *firma, crc_cuerpo, len(hashes), self.cantidad)
+
+        descriptor, ruta_temporal = tempfile.mkstemp(prefix='.indice-', suffix='.tmp', dir=os.path.dirname(ruta))
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(cabecera)
+                hashes.tofile(f)
+                posiciones.tofile(f)
+            os.replace(ruta_temporal, ruta)
+        except BaseException:
+            os.remove(ruta_temporal)
+            raise
+
+    def cerrar(self):
+        """
+        Libera el archivo de índice mapeado (si el índice se abrió con abrir).
+        """
+        if self._archivo is not None:
+            self.hashes.release()
+            self.posiciones.release()
+            self._archivo.close()
+            self._archivo = None
+
+    def __len__(self):
+        return self.cantidad
+
+    def candidatos(self, sku):
+        """
+        Posiciones de los productos cuyo SKU tiene el mismo hash (en orden del archivo).
+        Args:
+            sku (str): SKU buscado.
+        Returns:
+            list: Posiciones candidatas (normalmente ninguna o una).
+        """
+        clave = hash_sku(sku)
+        indice = bisect_left(self.hashes, clave)
+        candidatos = []
+        while indice < len(self.hashes) and self.hashes[indice] == clave:
+            candidatos.append(self.posiciones[indice])
+            indice += 1
+        return candidatos
+
+
+# ===================================================
+# ALMACÉN DIFERIDO
+# ===================================================
+
+class _SkusDiferidos:
+    """
+    Vista de los SKUs usados de un AlmacenDiferido (solo consulta de pertenencia).
+    """
+
+    def __init__(self, almacen):
+        self._almacen = almacen
+
+    def __contains__(self, sku):
+        return sku in self._almacen
+
+    def __len__(self):
+        return len(self._almacen)
+
+
+class AlmacenDiferido:
+    """
+    Almacén disponible apenas se abre el archivo: mapea inventario.txt en memoria
+    (mmap) y construye solo el índice SKU → posición, mientras un hilo carga el
+    almacén completo (productos e índices de búsqueda) en segundo plano.
+
+    Sin esperar la carga responde la cantidad de productos, si un SKU existe
+    (skus_usados) y obtener(sku), que decodifica solo ese producto del archivo.
+    Los journals pendientes se aplican sobre los productos que modifican.
+    Cualquier otro uso (búsqueda, vista ordenada, estadísticas, cambios, guardado)
+    espera la carga completa y se delega al Almacen cargado.
+    """
+
+    def __init__(self, datos, indice, operaciones, cargar, recuperar):
+        """
+        Args:
+            datos (mmap): Contenido del archivo de inventario.
+            indice (IndiceSkus): Índice SKU → posición del archivo.
+            operaciones (list): Operaciones de los journals pendientes (en orden).
+            cargar (callable): Función sin argumentos que retorna el Almacen completo y
+                una lista de avisos (se ejecuta en el hilo, sin mensajes: los avisos se
+                muestran en el hilo principal al completar la carga).
+            recuperar (callable): Función sin argumentos que carga el Almacen si la
+                carga en segundo plano falla (con sus mensajes y recuperación).
+        """
+        self._datos = datos
+        self._indice = indice
+        self._almacen = None
+        self._avisos = []
+        self._error = None
+        self._cargar = cargar
+        self._recuperar = recuperar
+
+        # Productos modificados por los journals, con las operaciones ya aplicadas
+        self._modificados = Almacen()
+        tocados = {operacion['producto']['sku'] if operacion['op'] == 'registrar' else operacion['sku']
+            for operacion in operaciones}
+        en_archivo = 0
+        for sku in tocados:
+            producto = self._leer_del_archivo(sku)
+            if producto is not None:
+                self._modificados.agregar(producto)
+                en_archivo += 1
+        for operacion in operaciones:
+            try:
+                self._modificados.aplicar_operacion(operacion)
+            except (KeyError, ValueError):
+                pass
+        self._modificados.tomar_cambios()
+        self._tocados = tocados
+        self._cantidad = len(indice) - en_archivo + len(self._modificados)
+
+        self._hilo = threading.Thread(target=self._cargar_en_segundo_plano, daemon=True)
+        self._hilo.start()
+
+    # ---------------------------------------------------
+    # Carga completa
+    # ---------------------------------------------------
+
+    def _cargar_en_segundo_plano(self):
+        try:
+            almacen, self._avisos = self._cargar()
+            self._almacen = almacen
+        except Exception as e:
+            # completo() lo informa y recupera en el hilo principal
+            self._error = e
+
+    @property
+    def cargado(self):
+        """
+        True si el almacén completo ya está disponible.
+        """
+        return self._almacen is not None
+
+    def completo(self):
+        """
+        Espera la carga completa (si sigue en curso) y libera el archivo mapeado.
+        Muestra los avisos de la carga y, si falló, el error, y carga con la función
+        de recuperación.
+        Returns:
+            Almacen: Almacén completo.
+        """
+        if self._datos is not None:
+            if self._hilo.is_alive():
+                print(f"{CYAN}Terminando de cargar el inventario...{RESET}")
+            self._hilo.join()
+            # Solo el hilo principal lee los archivos mapeados: se cierran aquí
+            self._indice.cerrar()
+            self._datos.close()
+            self._datos = None
+            for aviso in self._avisos:
+                print(f"{AMARILLO}⚠ {aviso}{RESET}")
+            if self._almacen is None:
+                print(f"{AMARILLO}⚠ La carga en segundo plano falló ({type(self._error).__name__}: "
+                    f"{self._error}); se carga de nuevo.{RESET}")
+                self._almacen = self._recuperar()
+        return self._almacen
+
+    def __getattr__(self, nombre):
+        # Solo se llama para atributos que no tiene el almacén diferido
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        return getattr(self.completo(), nombre)
+
+    def __setattr__(self, nombre, valor):
+        if nombre.startswith('_'):
+            object.__setattr__(self, nombre, valor)
+        else:
+            setattr(self.completo(), nombre, valor)
+
+    def __iter__(self):
+        return iter(self.completo())
+
+    # ---------------------------------------------------
+    # Consultas sin carga completa
+    # ---------------------------------------------------
+
+    def __len__(self):
+        if self._almacen is not None:
+            return len(self._almacen)
+        return self._cantidad
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, sku):
+        if self._almacen is not None:
+            return sku in self._almacen
+        if sku in self._tocados:
+            return sku in self._modificados
+        return self._leer_del_archivo(sku) is not None
+
+    @property
+    def skus_usados(self):
+        if self._almacen is not None:
+            return self._almacen.skus_usados
+        return _SkusDiferidos(self)
+
+    @property
+    def hay_cambios(self):
+        # Todos los cambios pasan por el almacén completo
+        return self._almacen is not None and self._almacen.hay_cambios
+
+    def obtener(self, sku):
+        """
+        Busca un producto por SKU en O(log n) sin esperar la carga completa.
+        Args:
+            sku (str): Código SKU del producto.
+        Returns:
+            Producto o None: Producto encontrado o None si no existe.
+        """
+        if self._almacen is not None:
+            return self._almacen.obtener(sku)
+        if sku in self._tocados:
+            return self._modificados.obtener(sku)
+        datos = self._leer_del_archivo(sku)
+        return Producto.desde_dict(datos) if datos is not None else None
+
+    def _leer_del_archivo(self, sku):
+        # El primer producto del archivo con ese SKU (igual que la carga completa)
+        for posicion in self._indice.candidatos(sku):
+            producto = leer_producto(self._datos, posicion)
+            if producto.get('sku') == sku:
+                return producto
+        return None
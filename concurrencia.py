@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: se usa msvcrt
+    fcntl = None
+    import msvcrt
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+# Tiempo máximo de espera por el bloqueo en Windows (msvcrt no espera indefinidamente)
+ESPERA_MAXIMA_BLOQUEO = 30
+
+
+# ===================================================
+# BLOQUEO DE ARCHIVOS
+# ===================================================
+
+@contextmanager
+def bloquear(ruta):
+    """
+    Bloqueo exclusivo y consultivo (advisory) entre procesos sobre un archivo .lock.
+    Todas las sesiones que leen o escriben el inventario deben tomarlo.
+    No es reentrante: no se debe tomar dos veces en el mismo proceso.
+    Args:
+        ruta (str): Ruta del archivo de bloqueo (se crea si no existe).
+    Raises:
+        TimeoutError: Si en Windows no se obtiene el bloqueo a tiempo.
+    """
+    with open(ruta, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            return
+
+        limite = time.monotonic() + ESPERA_MAXIMA_BLOQUEO
+        while True:
+            try:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= limite:
+                    raise TimeoutError(f"No se pudo bloquear '{ruta}'")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def estado_archivo(ruta):
+    """
+    Identifica la versión en disco de un archivo (inodo, fecha de modificación y tamaño).
+    Args:
+        ruta (str): Ruta del archivo.
+    Returns:
+        tuple o None: (inodo, mtime en ns, tamaño) o None si no existe.
+    """
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+
+
+# ===================================================
+# FUSIÓN DE CAMBIOS
+# ===================================================
+
+def _version_base(operacion):
+    """
+    Versión del producto sobre la cual se hizo la operación.
+    La eliminación guarda la versión del producto eliminado; las demás, la resultante.
+    """
+    if operacion['op'] == 'eliminar':
+        return operacion.get('version', 0)
+    return operacion.get('version', 1) - 1
+
+
+def fusionar_cambios(disco, cambios):
+    """
+    Aplica los cambios de esta sesión sobre el inventario que está en disco
+    (que puede incluir cambios de otras sesiones).
+    - Productos no modificados por otra sesión: se aplican tal cual.
+    - Stock de un producto modificado por otra sesión: se suma la diferencia (delta),
+      así ambas sesiones conservan sus movimientos.
+    - Precio, nombre, umbral o eliminación de un producto modificado por otra sesión,
+      registro de un SKU ya existente o cambios sobre un producto eliminado:
+      se descartan y se informan como conflicto (se conserva lo que está en disco).
+    Args:
+        disco (Almacen): Inventario recién leído del disco. Se modifica.
+        cambios (list): Operaciones pendientes de esta sesión (en orden).
+    Returns:
+        list: Mensajes de los conflictos encontrados.
+    """
+    conflictos = []
+    # SKU → True si otra sesión lo modificó desde que esta sesión lo leyó
+    modificado_por_otra = {}
+
+    for operacion in cambios:
+        tipo = operacion['op']
+
+        if tipo == 'registrar':
+            sku = operacion['producto']['sku']
+            if sku in disco:
+                conflictos.append(f"{sku}: ya fue registrado por otra sesión")
+            else:
+                disco.aplicar_operacion(operacion)
+                modificado_por_otra[sku] = False
+            continue
+
+        sku = operacion['sku']
+        producto = disco.obtener(sku)
+        if producto is None:
+            if tipo != 'eliminar':
+                conflictos.append(f"{sku}: fue eliminado por otra sesión")
+            continue
+
+        if sku not in modificado_por_otra:
+            modificado_por_otra[sku] = producto['version'] != _version_base(operacion)
+
+        if not modificado_por_otra[sku]:
+            disco.aplicar_operacion(operacion)
+        elif tipo == 'stock':
+            nuevo_stock = producto['stock'] + operacion.get('delta', 0)
+            if nuevo_stock < 0:
+                conflictos.append(f"{sku}: el stock quedaría negativo ({nuevo_stock}), se conserva {producto['stock']}")
+            else:
+                disco.actualizar_stock(sku, nuevo_stock)
+        elif tipo == 'eliminar':
+            conflictos.append(f"{sku}: fue modificado por otra sesión, no se eliminó")
+        else:
+            conflictos.append(f"{sku}: fue modificado por otra sesión, se conserva su {tipo}")
+
+    return conflictos
@@ -0,0 +1,85 @@
+from array import array
+from itertools import compress, repeat
+from operator import attrgetter, itemgetter, eq, mul
+from utils import CATEGORIAS
+
+
+# ===================================================
+# COLUMNAS
+# ===================================================
+
+def construir_columnas(productos):
+    """
+    Convierte los productos a columnas compactas (una pasada, sin bucle en Python).
+    Args:
+        productos (iterable): Productos (Producto o diccionarios).
+    Returns:
+        tuple: (tupla de categorías, array('q') de precios, array('q') de stocks)
+    """
+    productos = list(productos)
+    if not productos:
+        return (), array('q'), array('q')
+
+    # Producto se lee por atributo (más rápido); los diccionarios por clave
+    if isinstance(productos[0], dict):
+        extraer = itemgetter('categoria', 'precio', 'stock')
+    else:
+        extraer = attrgetter('categoria', 'precio', 'stock')
+
+    categorias, precios, stocks = zip(*map(extraer, productos))
+    return categorias, array('q', precios), array('q', stocks)
+
+
+def _resumir(precios, stocks):
+    """
+    Calcula los indicadores de un grupo de columnas.
+    Args:
+        precios (array): Precios del grupo.
+        stocks (array): Stocks del grupo.
+    Returns:
+        dict: Indicadores del grupo.
+    """
+    cantidad = len(precios)
+    return {
+        'productos': cantidad,
+        'valor_total': sum(map(mul, precios, stocks)),
+        'unidades': sum(stocks),
+        'sin_stock': stocks.count(0),
+        'precio_min': min(precios) if cantidad else 0,
+        'precio_max': max(precios) if cantidad else 0,
+        'precio_promedio': sum(precios) / cantidad if cantidad else 0,
+    }
+
+
+# ===================================================
+# ESTADÍSTICAS
+# ===================================================
+
+def calcular_estadisticas(productos):
+    """
+    Calcula las estadísticas de valorización del inventario completo y por categoría.
+    Args:
+        productos (iterable): Productos (Producto o diccionarios).
+    Returns:
+        dict: {'general': indicadores, 'categorias': {categoria: indicadores}}
+            Los indicadores son: productos, valor_total, unidades, sin_stock,
+            precio_min, precio_max y precio_promedio.
+    """
+    categorias, precios, stocks = construir_columnas(productos)
+
+    # Categorías conocidas primero (en orden) y luego cualquier otra presente
+    nombres = list(CATEGORIAS) + sorted(set(categorias) - set(CATEGORIAS))
+
+    por_categoria = {}
+    for categoria in nombres:
+        # Máscara de la categoría y selección de sus columnas
+        precios_categoria = array('q', compress(precios, map(eq, categorias, repeat(categoria))))
+        if not precios_categoria:
+            continue
+        stocks_categoria = array('q', compress(stocks, map(eq, categorias, repeat(categoria))))
+        por_categoria[categoria] = _resumir(precios_categoria, stocks_categoria)
+
+    return {
+        'general': _resumir(precios, stocks),
+        'categorias': por_categoria,
+    }
@@ -0,0 +1,335 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from operator import attrgetter, itemgetter
+from inventario import cargar_inventario
+from producto import Producto
+from tabla import escribir_lineas
+from utils import VERDE, ROJO, AMARILLO, CYAN, RESET, CATEGORIAS, ANCHOS_MINIMOS, formatear_precio, calcular_largos
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+FORMATO_CSV = 'csv'          # Con BOM UTF-8 para que Excel/LibreOffice reconozcan las tildes
+FORMATO_NDJSON = 'ndjson'    # Un producto por línea
+FORMATO_TEXTO = 'txt'        # Reporte de ancho fijo sin colores ni columnas truncadas
+FORMATOS = (FORMATO_CSV, FORMATO_NDJSON, FORMATO_TEXTO)
+
+# Formato según la extensión del archivo de destino
+EXTENSIONES = {'.csv': FORMATO_CSV, '.ndjson': FORMATO_NDJSON, '.jsonl': FORMATO_NDJSON, '.txt': FORMATO_TEXTO}
+
+# Precios con formatear_precio ("$1.250.000") por defecto solo en el reporte de texto:
+# CSV y NDJSON conservan números para planillas y otros programas
+PRECIO_FORMATEADO = {FORMATO_CSV: False, FORMATO_NDJSON: False, FORMATO_TEXTO: True}
+
+COLUMNAS = ('sku', 'nombre', 'categoria', 'precio', 'stock', 'total')
+
+# Buffer del archivo de destino (bytes): cada escritura a disco lleva miles de filas
+TAMANO_BUFFER = 1024 * 1024
+
+BOM = '\ufeff'
+
+# Lectura de los campos en una sola llamada (los productos del almacén son Producto)
+_CAMPOS_PRODUCTO = attrgetter('sku', 'nombre', 'categoria', 'precio', 'stock')
+_CAMPOS_DICT = itemgetter('sku', 'nombre', 'categoria', 'precio', 'stock')
+
+
+# ===================================================
+# SELECCIÓN DE PRODUCTOS
+# ===================================================
+
+def detectar_formato(ruta):
+    """
+    Deduce el formato de exportación por la extensión del archivo.
+    Args:
+        ruta (str): Ruta del archivo de destino.
+    Returns:
+        str: Formato (FORMATO_CSV, FORMATO_NDJSON o FORMATO_TEXTO).
+    Raises:
+        ValueError: Si la extensión no corresponde a ningún formato.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in EXTENSIONES:
+        raise ValueError(f"No se reconoce el formato de '{ruta}' (use {', '.join(EXTENSIONES)}).")
+    return EXTENSIONES[extension]
+
+
+def seleccionar_productos(almacen, categoria=None, busqueda=None):
+    """
+    Productos a exportar, sin copiar el catálogo: el inventario completo o una
+    categoría se recorren sobre la vista ordenada del almacén.
+    Args:
+        almacen (Almacen): Almacén de productos.
+        categoria (str): Solo los productos de esta categoría (None: todas).
+        busqueda (str): Resultado de esta búsqueda, por relevancia (tiene prioridad sobre la categoría).
+    Returns:
+        tuple: (productos iterables, cantidad)
+    """
+    if busqueda is not None:
+        coincidencias = almacen.buscar(busqueda)
+        return coincidencias, len(coincidencias)
+    productos = almacen.productos_ordenados()
+    if categoria is None:
+        return productos, len(productos)
+    inicio, fin = almacen.rango_categoria(categoria)
+    return islice(productos, inicio, fin), fin - inicio
+
+
+def anchos_reporte(productos, formatear=True):
+    """
+    Anchos de las columnas del reporte de texto: el contenido más largo de
+    cada columna (sin los límites de la pantalla) o su encabezado.
+    Args:
+        productos (Almacen o list): Almacén (usa los largos que mantiene) o lista de productos.
+        formatear (bool): Si es False, precio y total se miden como números sin formato.
+    Returns:
+        dict: Diccionario con los anchos de cada columna.
+    """
+    if hasattr(productos, 'largos_maximos'):
+        largos_maximos = productos.largos_maximos()
+    else:
+        largos_maximos = dict.fromkeys(ANCHOS_MINIMOS, 0)
+        for producto in productos:
+            for columna, largo in calcular_largos(producto).items():
+                if largo > largos_maximos[columna]:
+                    largos_maximos[columna] = largo
+    if not formatear:
+        for columna in ('precio', 'total'):
+            largos_maximos[columna] = _largo_sin_formato(largos_maximos[columna])
+    return {columna: max(largos_maximos[columna], minimo) for columna, minimo in ANCHOS_MINIMOS.items()}
+
+
+def _largo_sin_formato(largo):
+    """
+    Dígitos de un monto a partir del largo de su formato ("$1.234.567": el signo y
+    un punto cada tres dígitos). El largo crece con los dígitos, así el máximo de
+    uno corresponde al máximo del otro.
+    """
+    return largo - 1 - (largo - 1) // 4
+
+
+# ===================================================
+# FORMATOS
+# ===================================================
+
+def filas_exportacion(productos, formatear=False, resumen=None):
+    """
+    Genera las filas a exportar de forma perezosa (una a la vez).
+    Args:
+        productos (iterable): Productos a exportar (Producto o diccionarios).
+        formatear (bool): Si es True, precio y total se formatean con formatear_precio.
+        resumen (dict): Si se indica, al terminar recibe 'cantidad' y 'total' (valor del inventario).
+    Yields:
+        tuple: Valores de COLUMNAS (el total es precio * stock).
+    """
+    cantidad = 0
+    suma_total = 0
+    for producto in productos:
+        campos = _CAMPOS_PRODUCTO if type(producto) is Producto else _CAMPOS_DICT
+        sku, nombre, categoria, precio, stock = campos(producto)
+        total = precio * stock
+        cantidad += 1
+        suma_total += total
+        if formatear:
+            yield (sku, nombre, categoria, formatear_precio(precio), stock, formatear_precio(total))
+        else:
+            yield (sku, nombre, categoria, precio, stock, total)
+
+    if resumen is not None:
+        resumen.update(cantidad=cantidad, total=suma_total)
+
+
+def escribir_csv(f, filas):
+    """
+    Escribe las filas en CSV con encabezado.
+    Args:
+        f (file): Archivo de texto abierto con newline=''.
+        filas (iterable): Filas de filas_exportacion.
+    """
+    # El BOM se escribe una vez (la codificación utf-8-sig codifica cada fila en Python)
+    f.write(BOM)
+    escritor = csv.writer(f)
+    escritor.writerow(COLUMNAS)
+    escritor.writerows(filas)
+
+
+def generar_ndjson(filas):
+    """
+    Genera una línea JSON por fila.
+    Args:
+        filas (iterable): Filas de filas_exportacion.
+    Yields:
+        str: Objeto JSON terminado en salto de línea.
+    """
+    # Solo los textos pasan por el codificador JSON (json.dumps arma un codificador por llamada)
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    for sku, nombre, categoria, precio, stock, total in filas:
+        if type(precio) is str:
+            precio, total = codificar(precio), codificar(total)
+        yield (f'{{"sku": {codificar(sku)}, "nombre": {codificar(nombre)}, "categoria": {codificar(categoria)}, '
+            f'"precio": {precio}, "stock": {stock}, "total": {total}}}\n')
+
+
+def generar_reporte(filas, anchos, titulo, total, formatear=True):
+    """
+    Genera las líneas del reporte de ancho fijo (sin códigos de color).
+    Args:
+        filas (iterable): Filas de filas_exportacion.
+        anchos (dict): Anchos de cada columna (ver anchos_reporte).
+        titulo (str): Título centrado sobre la tabla.
+        total (callable): Devuelve el valor total del pie, una vez escritas las filas.
+        formatear (bool): Si es True, el total del pie se formatea (igual que las filas).
+    Yields:
+        str: Línea del reporte terminada en salto de línea.
+    """
+    ancho_sku, ancho_nombre, ancho_categoria = anchos['sku'], anchos['nombre'], anchos['categoria']
+    ancho_precio, ancho_stock, ancho_total = anchos['precio'], anchos['stock'], anchos['total']
+    ancho_tabla = ancho_sku + ancho_nombre + ancho_categoria + ancho_precio + ancho_stock + ancho_total + 15
+
+    yield f"{'=' * ancho_tabla}\n{titulo.center(ancho_tabla).rstrip()}\n{'=' * ancho_tabla}\n"
+    yield (f"{'SKU'.ljust(ancho_sku)} | {'NOMBRE'.ljust(ancho_nombre)} | "
+        f"{'CATEGORÍA'.ljust(ancho_categoria)} | {'PRECIO (CLP)'.rjust(ancho_precio)} | "
+        f"{'STOCK'.rjust(ancho_stock)} | {'TOTAL (CLP)'.rjust(ancho_total)}\n")
+    yield f"{'-' * ancho_tabla}\n"
+
+    # Plantilla armada una vez: cada fila es una sola llamada a format
+    formatear_fila = (f"{{:<{ancho_sku}}} | {{:<{ancho_nombre}}} | {{:<{ancho_categoria}}} | "
+        f"{{:>{ancho_precio}}} | {{:>{ancho_stock}}} | {{:>{ancho_total}}}\n").format
+    for fila in filas:
+        yield formatear_fila(*fila)
+
+    yield f"{'=' * ancho_tabla}\n"
+    # El valor total supera al de cualquier fila: se alinea con el borde de la tabla
+    valor = formatear_precio(total()) if formatear else str(total())
+    etiqueta = 'VALOR TOTAL DEL INVENTARIO:'
+    yield f"{etiqueta.ljust(max(len(etiqueta) + 1, ancho_tabla - len(valor)))}{valor}\n"
+
+
+# ===================================================
+# EXPORTACIÓN
+# ===================================================
+
+def exportar_productos(ruta, productos, formato=None, formatear=None, anchos=None,
+        titulo='INVENTARIO TECHSTORE'):
+    """
+    Exporta productos en streaming: las filas se generan de a una y se escriben
+    en bloques, con memoria constante sin importar la cantidad. El archivo se
+    escribe aparte y se renombra al terminar (no queda un reporte a medias).
+    Args:
+        ruta (str): Ruta del archivo de destino.
+        productos (iterable): Productos a exportar.
+        formato (str): FORMATO_CSV, FORMATO_NDJSON o FORMATO_TEXTO (None: según la extensión).
+        formatear (bool): Precios con formatear_precio (None: el valor de PRECIO_FORMATEADO).
+        anchos (dict): Anchos del reporte de texto, de anchos_reporte con el mismo valor de
+            formatear (None: se calculan recorriendo una lista).
+        titulo (str): Título del reporte de texto.
+    Returns:
+        int: Cantidad de productos exportados.
+    Raises:
+        ValueError: Si el formato no es válido.
+        OSError: Si no se puede escribir el archivo.
+    """
+    formato = formato or detectar_formato(ruta)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: '{formato}'")
+    if formatear is None:
+        formatear = PRECIO_FORMATEADO[formato]
+    if formato == FORMATO_TEXTO and anchos is None:
+        productos = list(productos)
+        anchos = anchos_reporte(productos, formatear)
+
+    # La cantidad y el valor total se calculan mientras se generan las filas
+    resumen = {}
+    filas = filas_exportacion(productos, formatear, resumen)
+    # Archivo temporal en el mismo directorio (con open, así respeta los permisos por defecto)
+    directorio, nombre = os.path.split(os.path.abspath(ruta))
+    ruta_temporal = os.path.join(directorio, f".{nombre}.exportacion.tmp")
+    try:
+        with open(ruta_temporal, 'w', encoding='utf-8', newline='', buffering=TAMANO_BUFFER) as f:
+            if formato == FORMATO_CSV:
+                escribir_csv(f, filas)
+            elif formato == FORMATO_NDJSON:
+                escribir_lineas(generar_ndjson(filas), f)
+            else:
+                escribir_lineas(generar_reporte(filas, anchos, titulo, lambda: resumen['total'], formatear), f)
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+
+    return resumen['cantidad']
+
+
+def exportar_inventario(almacen, ruta, formato=None, categoria=None, busqueda=None, formatear=None):
+    """
+    Exporta el inventario completo, una categoría o el resultado de una búsqueda.
+    Args:
+        almacen (Almacen): Almacén de productos.
+        ruta (str): Ruta del archivo de destino.
+        formato (str): Formato de exportación (None: según la extensión).
+        categoria (str): Solo los productos de esta categoría (None: todas).
+        busqueda (str): Solo el resultado de esta búsqueda.
+        formatear (bool): Precios con formatear_precio (None: según el formato).
+    Returns:
+        int: Cantidad de productos exportados.
+    Raises:
+        ValueError: Si el formato no es válido.
+        OSError: Si no se puede escribir el archivo.
+    """
+    productos, _ = seleccionar_productos(almacen, categoria, busqueda)
+    formato = formato or detectar_formato(ruta)
+    if formatear is None:
+        # Un formato inválido lo informa exportar_productos
+        formatear = PRECIO_FORMATEADO.get(formato, False)
+
+    if busqueda is not None:
+        titulo = f"INVENTARIO TECHSTORE • BÚSQUEDA '{busqueda}'"
+        anchos = anchos_reporte(productos, formatear)
+    else:
+        titulo = 'INVENTARIO TECHSTORE' if categoria is None else f'INVENTARIO TECHSTORE • {categoria}'
+        # Los largos que mantiene el almacén alcanzan para cualquier subconjunto
+        anchos = anchos_reporte(almacen, formatear)
+
+    return exportar_productos(ruta, productos, formato, formatear, anchos, titulo)
+
+
+def ejecutar_exportacion(ruta, formato=None, categoria=None, busqueda=None, formatear=None):
+    """
+    Exporta el inventario sin menú interactivo.
+    Args:
+        ruta (str): Ruta del archivo de destino.
+        formato (str): Formato de exportación (None: según la extensión).
+        categoria (str): Solo los productos de esta categoría (None: todas).
+        busqueda (str): Solo el resultado de esta búsqueda.
+        formatear (bool): Precios con formatear_precio (None: según el formato).
+    Returns:
+        int: Código de salida (0 si se exportó, 2 si hubo un error).
+    """
+    if categoria is not None:
+        categoria = categoria.strip().upper()
+        if categoria not in CATEGORIAS:
+            print(f"{ROJO}✗ Error: Categoría inválida '{categoria}' (use {', '.join(CATEGORIAS)}).{RESET}")
+            return 2
+    try:
+        formato = formato or detectar_formato(ruta)
+    except ValueError as e:
+        print(f"{ROJO}✗ Error: {e}{RESET}")
+        return 2
+
+    almacen = cargar_inventario()
+    inicio = time.perf_counter()
+    try:
+        cantidad = exportar_inventario(almacen, ruta, formato, categoria, busqueda, formatear)
+    except OSError as e:
+        print(f"{ROJO}✗ Error al escribir '{ruta}': {e}{RESET}")
+        return 2
+
+    if not cantidad:
+        print(f"{AMARILLO}⚠ No hay productos para exportar.{RESET}")
+    else:
+        print(f"{VERDE}✓ Productos exportados: {cantidad} en {time.perf_counter() - inicio:.2f} s{RESET}")
+    print(f"{CYAN}Archivo exportado: {os.path.abspath(ruta)}{RESET}")
+    return 0
@@ -0,0 +1,254 @@
+import codecs
+import json
+import os
+import sys
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+FORMATO_JSON = 'json'        # Arreglo JSON con indentación (formato original)
+FORMATO_NDJSON = 'ndjson'    # Un producto por línea
+FORMATOS = (FORMATO_JSON, FORMATO_NDJSON)
+
+# Tamaño de los bloques leídos del archivo (bytes)
+TAMANO_BLOQUE = 1024 * 1024
+
+ESPACIOS = ' \t\r\n'
+
+# Caracteres al final del buffer que pueden ser un token cortado por el bloque ('fals', '1e-', '\u00e')
+MARGEN_TOKEN = 6
+
+
+# ===================================================
+# LECTURA EN STREAMING
+# ===================================================
+
+def detectar_formato(ruta):
+    """
+    Detecta el formato de un archivo de inventario por su primer carácter.
+    Args:
+        ruta (str): Ruta del archivo.
+    Returns:
+        str: FORMATO_JSON ('[') o FORMATO_NDJSON ('{'). Un archivo vacío se considera JSON.
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+        json.JSONDecodeError: Si el contenido no corresponde a ningún formato.
+    """
+    with open(ruta, 'rb') as f:
+        return _detectar_formato_archivo(f)
+
+
+def _detectar_formato_archivo(f):
+    """
+    Detecta el formato de un archivo binario abierto (lo lee desde su posición actual).
+    """
+    while True:
+        bloque = f.read(4096)
+        if not bloque:
+            return FORMATO_JSON
+        texto = bloque.decode('utf-8', errors='ignore').lstrip('﻿' + ESPACIOS)
+        if texto:
+            break
+
+    if texto[0] == '[':
+        return FORMATO_JSON
+    if texto[0] == '{':
+        return FORMATO_NDJSON
+    raise json.JSONDecodeError("Formato de inventario desconocido", texto, 0)
+
+
+def iterar_productos(ruta, progreso=None):
+    """
+    Lee los productos de un archivo de inventario uno a uno, sin cargar el
+    archivo completo en memoria. Acepta arreglo JSON o NDJSON.
+    Args:
+        ruta (str o file): Ruta del archivo, o el archivo ya abierto en modo binario
+            (se lee desde el comienzo y no se cierra).
+        progreso (callable): Función opcional progreso(bytes_leidos, bytes_totales).
+    Yields:
+        dict: Cada producto del archivo.
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+        json.JSONDecodeError: Si el archivo está corrupto.
+    """
+    if not isinstance(ruta, (str, os.PathLike)):
+        yield from _iterar_archivo(ruta, progreso)
+        return
+
+    with open(ruta, 'rb') as f:
+        yield from _iterar_archivo(f, progreso)
+
+
+def _iterar_archivo(f, progreso):
+    f.seek(0)
+    formato = _detectar_formato_archivo(f)
+    total = os.fstat(f.fileno()).st_size
+    f.seek(0)
+
+    if formato == FORMATO_NDJSON:
+        yield from _iterar_ndjson(f, total, progreso)
+    else:
+        yield from _iterar_arreglo_json(f, total, progreso)
+
+
+def _iterar_ndjson(f, total, progreso):
+    leidos = 0
+    for numero, linea in enumerate(f, 1):
+        leidos += len(linea)
+        if linea.strip():
+            try:
+                producto = json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"Línea {numero}: {e.msg}", e.doc, e.pos)
+            if not isinstance(producto, dict):
+                raise json.JSONDecodeError(f"Línea {numero}: se esperaba un objeto", linea.decode('utf-8', 'replace'), 0)
+            yield producto
+        if progreso is not None:
+            progreso(leidos, total)
+
+
+def _iterar_arreglo_json(f, total, progreso):
+    """
+    Recorre un arreglo JSON de objetos decodificando un elemento a la vez.
+    El buffer solo conserva el texto aún no consumido.
+    """
+    decodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    posicion = 0
+    leidos = 0
+    fin_archivo = False
+
+    def leer_bloque():
+        nonlocal buffer, posicion, leidos, fin_archivo
+        bloque = f.read(TAMANO_BLOQUE)
+        leidos += len(bloque)
+        fin_archivo = not bloque
+        # Descarta lo ya consumido para mantener la memoria acotada
+        buffer = buffer[posicion:] + utf8.decode(bloque, final=fin_archivo)
+        posicion = 0
+        if progreso is not None:
+            progreso(leidos, total)
+
+    def saltar_espacios():
+        nonlocal posicion
+        while True:
+            while posicion < len(buffer) and buffer[posicion] in ESPACIOS:
+                posicion += 1
+            if posicion < len(buffer) or fin_archivo:
+                return
+            leer_bloque()
+
+    leer_bloque()
+    saltar_espacios()
+    if posicion >= len(buffer) or buffer[posicion] != '[':
+        raise json.JSONDecodeError("Se esperaba '['", buffer, posicion)
+    posicion += 1
+
+    primero = True
+    while True:
+        saltar_espacios()
+        if posicion >= len(buffer):
+            raise json.JSONDecodeError("Arreglo JSON incompleto", buffer, posicion)
+
+        caracter = buffer[posicion]
+        if caracter == ']':
+            posicion += 1
+            saltar_espacios()
+            if posicion < len(buffer):
+                raise json.JSONDecodeError("Datos adicionales después del arreglo", buffer, posicion)
+            return
+        if not primero:
+            if caracter != ',':
+                raise json.JSONDecodeError("Se esperaba ','", buffer, posicion)
+            posicion += 1
+            saltar_espacios()
+
+        # Decodifica el siguiente objeto; si quedó cortado al final del buffer, lee más
+        # datos. Cualquier otro error es del archivo: no se lee el resto en memoria.
+        while True:
+            try:
+                inicio = posicion
+                producto, posicion = decodificador.raw_decode(buffer, posicion)
+                break
+            except json.JSONDecodeError as e:
+                if fin_archivo or not _elemento_cortado(e, buffer):
+                    raise
+                leer_bloque()
+
+        if not isinstance(producto, dict):
+            raise json.JSONDecodeError("Se esperaba un objeto", buffer, inicio)
+        primero = False
+        yield producto
+
+
+def _elemento_cortado(error, buffer):
+    """
+    True si el error de decodificación se debe a que el elemento sigue en el próximo bloque:
+    falla al final del buffer o en un string que no termina antes del final.
+    """
+    return error.pos >= len(buffer) - MARGEN_TOKEN or error.msg.startswith('Unterminated string')
+
+
+# ===================================================
+# ESCRITURA EN STREAMING
+# ===================================================
+
+def escribir_productos(f, productos, formato=FORMATO_JSON):
+    """
+    Escribe los productos de a uno en un archivo de texto abierto.
+    El formato JSON produce la misma salida que json.dump(indent=2).
+    Args:
+        f (file): Archivo de texto abierto para escritura.
+        productos (iterable): Productos a escribir.
+        formato (str): FORMATO_JSON o FORMATO_NDJSON.
+    Returns:
+        int: Cantidad de productos escritos.
+    Raises:
+        ValueError: Si el formato no es válido.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: '{formato}'")
+
+    cantidad = 0
+    if formato == FORMATO_NDJSON:
+        for producto in productos:
+            f.write(json.dumps(dict(producto), ensure_ascii=False))
+            f.write('\n')
+            cantidad += 1
+        return cantidad
+
+    for producto in productos:
+        texto = json.dumps(dict(producto), indent=2, ensure_ascii=False)
+        f.write(',\n  ' if cantidad else '[\n  ')
+        f.write(texto.replace('\n', '\n  '))
+        cantidad += 1
+    f.write('\n]' if cantidad else '[]')
+    return cantidad
+
+
+def convertir_inventario(origen, destino, formato):
+    """
+    Convierte un archivo de inventario entre arreglo JSON y NDJSON en streaming.
+    Args:
+        origen (str): Ruta del archivo de origen (cualquier formato).
+        destino (str): Ruta del archivo de destino.
+        formato (str): Formato de destino (FORMATO_JSON o FORMATO_NDJSON).
+    Returns:
+        int: Cantidad de productos convertidos.
+    """
+    with open(destino, 'w', encoding='utf-8') as f:
+        return escribir_productos(f, iterar_productos(origen), formato)
+
+
+if __name__ == "__main__":
+    """
+    Conversión por línea de comandos:
+        python formatos.py origen destino json|ndjson
+    """
+    if len(sys.argv) != 4 or sys.argv[3] not in FORMATOS:
+        print(f"Uso: python formatos.py <origen> <destino> <{'|'.join(FORMATOS)}>")
+        sys.exit(1)
+
+    convertidos = convertir_inventario(sys.argv[1], sys.argv[2], sys.argv[3])
+    print(f"✓ {convertidos} productos convertidos a {sys.argv[3]}.")
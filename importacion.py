@@ -0,0 +1,239 @@
+import contextlib
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from inventario import cargar_inventario, guardar_inventario, esperar_guardado
+from lote import RECHAZOS_EN_PANTALLA, escribir_rechazos
+from utils import VERDE, ROJO, AMARILLO, CYAN, RESET, validar_producto
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+# Tamaño máximo de cada fragmento del archivo que procesa un proceso (bytes)
+TAMANO_FRAGMENTO = 4 * 1024 * 1024
+
+# Archivos menores se procesan en el proceso actual (iniciar procesos cuesta más)
+UMBRAL_PARALELO = 1024 * 1024
+
+BOM = b'\xef\xbb\xbf'
+
+
+# ===================================================
+# FRAGMENTOS
+# ===================================================
+
+def dividir_en_fragmentos(ruta, procesos):
+    """
+    Divide un archivo en fragmentos que terminan en un salto de línea
+    (ningún registro queda repartido entre dos fragmentos).
+    Args:
+        ruta (str): Ruta del archivo.
+        procesos (int): Procesos que los procesarán (al menos un fragmento por proceso).
+    Returns:
+        tuple: (encabezado CSV o None, lista de (inicio, fin) en bytes)
+    """
+    es_csv = ruta.lower().endswith('.csv')
+    tamano = os.path.getsize(ruta)
+    objetivo = max(1, min(TAMANO_FRAGMENTO, -(-tamano // procesos)))
+
+    with open(ruta, 'rb') as f:
+        inicio = len(BOM) if f.read(len(BOM)) == BOM else 0
+        f.seek(inicio)
+        encabezado = None
+        if es_csv:
+            linea = f.readline()
+            encabezado = next(csv.reader([linea.decode('utf-8')]), [])
+            inicio = f.tell()
+
+        fragmentos = []
+        while inicio < tamano:
+            # El fragmento se extiende hasta el final de la línea en curso
+            f.seek(min(inicio + objetivo, tamano))
+            f.readline()
+            fin = min(f.tell(), tamano)
+            fragmentos.append((inicio, fin))
+            inicio = fin
+
+    return encabezado, fragmentos
+
+
+def procesar_fragmento(ruta, inicio, fin, encabezado):
+    """
+    Lee y valida los registros de un fragmento (se ejecuta en otro proceso).
+    Args:
+        ruta (str): Ruta del archivo.
+        inicio (int): Byte inicial del fragmento.
+        fin (int): Byte final del fragmento (excluido).
+        encabezado (list): Columnas del CSV, o None si el archivo es NDJSON.
+    Returns:
+        tuple: (productos válidos como (línea, producto), rechazos como (línea, sku, motivo),
+            cantidad de líneas del fragmento). Las líneas se cuentan desde el inicio del fragmento.
+    """
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        texto = f.read(fin - inicio).decode('utf-8')
+
+    lineas = texto.split('\n')
+    if lineas[-1] == '':
+        lineas.pop()
+    if encabezado is not None:
+        # Cada registro ocupa una línea: el lector CSV solo resuelve comillas y separadores
+        registros = (dict(zip(encabezado, fila)) if fila else None for fila in csv.reader(lineas))
+    else:
+        registros = (_leer_json(linea) for linea in lineas)
+
+    productos = []
+    rechazados = []
+    for numero, (linea, registro) in enumerate(zip(lineas, registros), 1):
+        if not linea.strip():
+            continue
+        if registro is None:
+            rechazados.append((numero, '', 'Registro con formato inválido'))
+            continue
+        try:
+            productos.append((numero, validar_producto(registro)))
+        except ValueError as e:
+            rechazados.append((numero, str(registro.get('sku') or '').strip().upper(), str(e)))
+
+    return productos, rechazados, len(lineas)
+
+
+def _leer_json(linea):
+    try:
+        registro = json.loads(linea)
+    except json.JSONDecodeError:
+        return None
+    return registro if isinstance(registro, dict) else None
+
+
+def validar_archivo(ruta, procesos=1):
+    """
+    Lee y valida un archivo CSV (con encabezado) o NDJSON repartiendo sus
+    fragmentos entre procesos.
+    Args:
+        ruta (str): Ruta del archivo (.csv es CSV, cualquier otra extensión NDJSON).
+        procesos (int): Procesos a usar (1: en el proceso actual).
+    Yields:
+        tuple: (productos válidos como (línea, producto), rechazos como (línea, sku, motivo))
+            de cada fragmento, en el orden del archivo.
+    Raises:
+        OSError, UnicodeDecodeError: Si el archivo no se puede leer.
+    """
+    encabezado, fragmentos = dividir_en_fragmentos(ruta, procesos)
+    argumentos = ([ruta] * len(fragmentos), [inicio for inicio, _ in fragmentos],
+        [fin for _, fin in fragmentos], [encabezado] * len(fragmentos))
+
+    # En un CSV, la primera línea de datos es la 2
+    desplazamiento = 1 if encabezado is not None else 0
+    with contextlib.ExitStack() as pila:
+        if procesos > 1 and len(fragmentos) > 1:
+            # map entrega los fragmentos en orden: se consumen mientras se procesan los siguientes
+            ejecutor = pila.enter_context(ProcessPoolExecutor(max_workers=procesos))
+            resultados = ejecutor.map(procesar_fragmento, *argumentos)
+        else:
+            resultados = map(procesar_fragmento, *argumentos)
+
+        for productos, rechazos, lineas in resultados:
+            yield ([(desplazamiento + numero, producto) for numero, producto in productos],
+                [(desplazamiento + numero, sku, motivo) for numero, sku, motivo in rechazos])
+            desplazamiento += lineas
+
+
+# ===================================================
+# IMPORTACIÓN
+# ===================================================
+
+def importar_productos(almacen, ruta, procesos=None):
+    """
+    Importa productos nuevos desde un archivo CSV (con encabezado) o NDJSON.
+    La lectura y validación se reparte entre procesos (ver validar_archivo); la
+    fusión con el almacén es una sola etapa, en el orden del archivo: un SKU que
+    ya existe en el inventario o que se repite en el archivo (se conserva la
+    primera aparición) se rechaza.
+    Args:
+        almacen (Almacen): Almacén de productos.
+        ruta (str): Ruta del archivo.
+        procesos (int): Procesos a usar (None: uno por núcleo).
+    Returns:
+        dict: {'importados': cantidad, 'rechazados': lista de (línea, sku, motivo),
+               'motivos': Counter motivo → cantidad, 'procesos': procesos usados}
+    Raises:
+        OSError, UnicodeDecodeError: Si el archivo no se puede leer.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if os.path.getsize(ruta) < UMBRAL_PARALELO:
+        procesos = 1
+
+    importados = 0
+    rechazados = []
+    primera_linea = {}
+    for productos, rechazos in validar_archivo(ruta, procesos):
+        rechazados.extend(rechazos)
+        for numero, producto in productos:
+            sku = producto['sku']
+            if sku in primera_linea:
+                rechazados.append((numero, sku, f"SKU duplicado en el archivo (línea {primera_linea[sku]})"))
+            elif sku in almacen.skus_usados:
+                rechazados.append((numero, sku, 'El SKU ya existe en el inventario'))
+            else:
+                primera_linea[sku] = numero
+                almacen.agregar(producto)
+                importados += 1
+
+    rechazados.sort()
+    return {
+        'importados': importados,
+        'rechazados': rechazados,
+        'motivos': Counter(_motivo_general(motivo) for _, _, motivo in rechazados),
+        'procesos': procesos,
+    }
+
+
+def _motivo_general(motivo):
+    # Agrupa los duplicados sin importar la línea de la primera aparición
+    return motivo.split(' (línea')[0]
+
+
+def ejecutar_importacion(ruta, procesos=None):
+    """
+    Importa un archivo de productos sin menú interactivo y guarda una sola vez.
+    Args:
+        ruta (str): Ruta del archivo CSV o NDJSON.
+        procesos (int): Procesos a usar (None: uno por núcleo).
+    Returns:
+        int: Código de salida (0 si no hubo rechazos, 1 si los hubo, 2 si falló la lectura).
+    """
+    if not os.path.exists(ruta):
+        print(f"{ROJO}✗ Error: No existe el archivo '{ruta}'.{RESET}")
+        return 2
+
+    almacen = cargar_inventario()
+    try:
+        resultado = importar_productos(almacen, ruta, procesos)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"{ROJO}✗ Error al leer '{ruta}': {e}. No se importaron productos.{RESET}")
+        return 2
+
+    print(f"{VERDE}✓ Productos importados: {resultado['importados']} "
+        f"({resultado['procesos']} procesos){RESET}")
+
+    rechazados = resultado['rechazados']
+    if rechazados:
+        print(f"{AMARILLO}⚠ Filas rechazadas: {len(rechazados)}{RESET}")
+        for motivo, cantidad in resultado['motivos'].most_common():
+            print(f"  {cantidad:>8}  {motivo}")
+        for numero, sku, motivo in rechazados[:RECHAZOS_EN_PANTALLA]:
+            print(f"  Línea {numero}: {sku or '-'} - {motivo}")
+
+        ruta_rechazos = os.path.splitext(ruta)[0] + '.rechazos.csv'
+        escribir_rechazos(ruta_rechazos, rechazados)
+        print(f"{CYAN}Reporte de rechazos: {ruta_rechazos}{RESET}")
+
+    # Un solo guardado al final de la importación
+    if almacen.hay_cambios:
+        guardar_inventario(almacen)
+        esperar_guardado()
+
+    return 1 if rechazados else 0
@@ -1,42 +1,422 @@
+import functools
 import json
+import mmap
 import shutil
 import os
-from utils import VERDE, ROJO, AMARILLO, RESET
+import tempfile
+import threading
+import metricas
+from movimientos import LibroMovimientos, leer_fecha, formatear_fecha
+from almacen import Almacen
+from carga_diferida import AlmacenDiferido, IndiceSkus, firma_archivo
+from concurrencia import bloquear, estado_archivo, fusionar_cambios
+from formatos import FORMATO_JSON, iterar_productos, escribir_productos
+from utils import VERDE, ROJO, AMARILLO, CYAN, RESET
 
 # Rutas de los archivos de inventario
 DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
 RUTA_INVENTARIO = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario.txt')
 RUTA_BACKUP = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario_backup.txt')
+RUTA_JOURNAL = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario.journal')
+RUTA_BLOQUEO = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario.lock')
+RUTA_SQLITE = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario.db')
+RUTA_INDICE = os.path.join(DIRECTORIO_BASE, 'inventario', 'inventario.idx')
+RUTA_MOVIMIENTOS = os.path.join(DIRECTORIO_BASE, 'inventario', 'movimientos.ndjson')
+RUTA_MOVIMIENTOS_CHECKPOINT = os.path.join(DIRECTORIO_BASE, 'inventario', 'movimientos.checkpoint')
 
+# Almacenamiento del inventario: archivo JSON (inventario.txt + journal) o base SQLite.
+# Se elige con la variable de entorno TECHSTORE_ALMACENAMIENTO.
+ALMACENAMIENTO_JSON = 'json'
+ALMACENAMIENTO_SQLITE = 'sqlite'
+ALMACENAMIENTOS = (ALMACENAMIENTO_JSON, ALMACENAMIENTO_SQLITE)
+ALMACENAMIENTO = os.environ.get('TECHSTORE_ALMACENAMIENTO', ALMACENAMIENTO_JSON)
 
-def cargar_inventario():
+# Tamaño del journal (bytes) a partir del cual se compacta en el archivo principal
+LIMITE_JOURNAL = 1024 * 1024
+
+# Formato con el que se escribe inventario.txt (la carga detecta el formato)
+FORMATO_INVENTARIO = FORMATO_JSON
+
+# Desde este tamaño de archivo (bytes) se muestra el progreso de carga
+UMBRAL_PROGRESO = 10 * 1024 * 1024
+
+# Cantidad de generaciones anteriores que se conservan (inventario.txt.1, .2, ...)
+GENERACIONES = 3
+
+# Desde esta cantidad de productos la compactación se escribe en segundo plano
+UMBRAL_SEGUNDO_PLANO = 50000
+
+# Desde este tamaño (bytes) el menú abre el inventario con carga diferida
+UMBRAL_CARGA_DIFERIDA = 10 * 1024 * 1024
+
+# Hilo de la compactación en curso (None si no hay ninguna)
+_hilo_guardado = None
+
+# Libro de movimientos de stock (se abre en el primer guardado o consulta)
+_libro = None
+
+
+@metricas.instrumentar('cargar_inventario')
+def cargar_inventario(diferida=False):
     """
-    - Carga el inventario desde el archivo inventario.txt
-    - Si el archivo no existe, retorna una lista vacía y un set vacío.
-    - Si el archivo está corrupto, crea un respaldo y retorna una lista vacía y un set vacío.
+    Carga el inventario desde el almacenamiento configurado (ALMACENAMIENTO).
+    Args:
+        diferida (bool): Si es True y inventario.txt supera UMBRAL_CARGA_DIFERIDA,
+            retorna un AlmacenDiferido (ver _cargar_diferido).
     Returns:
-        tuple: (lista de productos, set de SKUs usados)
+        Almacen: Almacén con los productos y el set de SKUs usados.
+    Raises:
+        ValueError: Si ALMACENAMIENTO no es un almacenamiento conocido.
+    """
+    if _almacenamiento() == ALMACENAMIENTO_SQLITE:
+        return _cargar_sqlite()
+    if diferida and _tamano(RUTA_INVENTARIO) >= UMBRAL_CARGA_DIFERIDA:
+        almacen = _cargar_diferido()
+        if almacen is not None:
+            return almacen
+    return _cargar_json()
+
+
+@metricas.instrumentar('guardar_inventario')
+def guardar_inventario(almacen, en_segundo_plano=None, en_hilo_almacen=None):
+    """
+    Guarda los cambios pendientes del inventario en el almacenamiento configurado.
+    Args:
+        almacen (Almacen): Almacén con los productos y sus cambios pendientes.
+        en_segundo_plano (bool): Solo para JSON, ver _guardar_json.
+        en_hilo_almacen (callable): Función en_hilo_almacen(funcion, *args) que ejecuta en el
+            hilo dueño del almacén los pasos que lo copian o reemplazan (None: en el hilo actual).
+            Permite guardar desde otro hilo sin que las lecturas vean el almacén a medio reemplazar.
+    Raises:
+        ValueError: Si ALMACENAMIENTO no es un almacenamiento conocido.
+    """
+    # Un almacén diferido que todavía no terminó de cargar no tiene cambios
+    if not getattr(almacen, 'cargado', True):
+        print(f"{AMARILLO}⚠ No hay cambios pendientes por guardar.{RESET}")
+        return
+    en_hilo_almacen = en_hilo_almacen or _llamar
+    if _almacenamiento() == ALMACENAMIENTO_SQLITE:
+        _guardar_sqlite(almacen, en_hilo_almacen)
+    else:
+        _guardar_json(almacen, en_segundo_plano, en_hilo_almacen)
+
+
+def migrar_a_sqlite(reemplazar=False):
+    """
+    Importa inventario.txt (con su journal aplicado) a la base SQLite.
+    Args:
+        reemplazar (bool): Si es True, reemplaza los productos que ya tenga la base.
+    Returns:
+        int: Código de salida (0 si se migró, 1 si la base ya tenía datos, 2 si falló).
+    """
+    import sqlite3
+    import almacenamiento_sqlite
+
+    try:
+        with bloquear(RUTA_BLOQUEO):
+            almacen = _construir_almacen(RUTA_INVENTARIO)
+        cantidad = almacenamiento_sqlite.migrar(almacen, RUTA_SQLITE, reemplazar)
+    except FileNotFoundError:
+        print(f"{ROJO}✗ Error: No existe el archivo inventario.txt.{RESET}")
+        return 2
+    except json.JSONDecodeError:
+        print(f"{ROJO}✗ Error: Archivo inventario.txt corrupto. No se migró.{RESET}")
+        return 2
+    except ValueError as e:
+        print(f"{AMARILLO}⚠ {e} Use --reemplazar para sobrescribirla.{RESET}")
+        return 1
+    except sqlite3.Error as e:
+        print(f"{ROJO}✗ Error al escribir la base de datos: {e}{RESET}")
+        return 2
+
+    print(f"{VERDE}✓ {cantidad} productos migrados a {os.path.basename(RUTA_SQLITE)}{RESET}")
+    print(f"{CYAN}Para usarla: TECHSTORE_ALMACENAMIENTO={ALMACENAMIENTO_SQLITE} python main.py{RESET}")
+    return 0
+
+
+def mostrar_historial(sku, desde=None, hasta=None):
+    """
+    Muestra los movimientos de stock de un producto en un rango de fechas,
+    con el stock resultante de cada uno y el resumen del período.
+    Args:
+        sku (str): Código SKU del producto.
+        desde (str): Fecha inicial ISO, incluida (None: desde el comienzo).
+        hasta (str): Fecha final ISO, incluida (None: hasta hoy).
+    Returns:
+        int: Código de salida (0 si hay movimientos, 1 si no hay, 2 si las fechas son inválidas).
+    """
+    sku = sku.strip().upper()
+    try:
+        momento_desde = leer_fecha(desde) if desde else None
+        # Una fecha sin hora incluye el día completo
+        momento_hasta = None
+        if hasta:
+            momento_hasta = leer_fecha(hasta) + (86400 - 1e-6 if len(hasta.strip()) == 10 else 0)
+    except ValueError as e:
+        print(f"{ROJO}✗ Error: {e}{RESET}")
+        return 2
+
+    libro = libro_movimientos()
+    movimientos = libro.movimientos(sku, momento_desde, momento_hasta)
+    if not movimientos:
+        print(f"{AMARILLO}⚠ No hay movimientos de '{sku}' en el período.{RESET}")
+        return 1
+
+    print(f"{CYAN}Movimientos de {sku}:{RESET}")
+    print(f"{'FECHA'.ljust(19)} | {'MOTIVO'.ljust(8)} | {'DELTA'.rjust(7)} | {'STOCK'.rjust(7)}")
+    for movimiento in movimientos:
+        print(f"{formatear_fecha(movimiento['ts'])} | {movimiento['motivo'].ljust(8)} | "
+            f"{movimiento['delta']:+7d} | {movimiento['stock']:7d}")
+
+    resumen = libro.resumen(sku, momento_desde, momento_hasta)
+    inicial = '-' if resumen['stock_inicial'] is None else resumen['stock_inicial']
+    print(f"{VERDE}Stock inicial: {inicial} | Entradas: {resumen['entradas']} | "
+        f"Salidas: {resumen['salidas']} | Stock final: {resumen['stock_final']}{RESET}")
+    return 0
+
+
+def libro_movimientos():
+    """
+    Libro de movimientos de stock del inventario (ver movimientos.LibroMovimientos).
+    Returns:
+        LibroMovimientos: Libro abierto sobre RUTA_MOVIMIENTOS.
+    """
+    global _libro
+
+    if _libro is None or _libro.ruta != RUTA_MOVIMIENTOS:
+        _libro = LibroMovimientos(RUTA_MOVIMIENTOS, RUTA_MOVIMIENTOS_CHECKPOINT)
+    return _libro
+
+
+def _registrar_movimientos(cambios):
+    """
+    Agrega al libro los movimientos de stock de operaciones ya guardadas (con el
+    bloqueo tomado). Un fallo no deshace el guardado: solo se informa.
+    """
+    try:
+        libro_movimientos().registrar(cambios)
+    except OSError as e:
+        print(f"{AMARILLO}⚠ No se pudo registrar el historial de movimientos: {e}{RESET}")
+
+
+def _llamar(funcion, *args):
+    return funcion(*args)
+
+
+def _almacenamiento():
+    if ALMACENAMIENTO not in ALMACENAMIENTOS:
+        raise ValueError(f"Almacenamiento desconocido: '{ALMACENAMIENTO}' (opciones: {', '.join(ALMACENAMIENTOS)})")
+    return ALMACENAMIENTO
+
+
+def _mostrar_avisos(avisos):
+    for aviso in avisos:
+        print(f"{AMARILLO}⚠ {aviso}{RESET}")
+
+
+def _mostrar_conflictos(conflictos):
+    if conflictos:
+        print(f"{AMARILLO}⚠ Otra sesión modificó el inventario. Conflictos ({len(conflictos)}):{RESET}")
+        for conflicto in conflictos:
+            print(f"  {conflicto}")
+
+
+# ===================================================
+# ALMACENAMIENTO SQLITE
+# ===================================================
+
+def _cargar_sqlite():
+    """
+    Carga el inventario desde la base SQLite (se crea vacía si no existe).
+    Returns:
+        Almacen: Almacén con los productos (vacío si la base no se puede leer).
+    """
+    # SQLite se importa solo si es el almacenamiento configurado (arranque más rápido)
+    import sqlite3
+    import almacenamiento_sqlite
+
+    try:
+        almacen = almacenamiento_sqlite.cargar(RUTA_SQLITE)
+    except sqlite3.Error as e:
+        print(f"{ROJO}✗ Error al leer la base de datos: {e}{RESET}")
+        print(f"{AMARILLO}⚠ Iniciando con inventario vacío.{RESET}")
+        return Almacen()
+
+    print(f"{VERDE}✓ Inventario cargado exitosamente: {len(almacen)} productos.{RESET}")
+    return almacen
+
+
+def _guardar_sqlite(almacen, en_hilo_almacen=_llamar):
+    """
+    Guarda en la base SQLite solo las filas modificadas, en una transacción.
+    Args:
+        almacen (Almacen): Almacén con los cambios pendientes.
+        en_hilo_almacen (callable): Ver guardar_inventario.
+    """
+    import sqlite3
+    import almacenamiento_sqlite
+
+    try:
+        aplicadas, conflictos = almacenamiento_sqlite.guardar(almacen, RUTA_SQLITE, en_hilo_almacen)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"{ROJO}✗ Error al guardar el inventario: {e}{RESET}")
+        return
+
+    if aplicadas or conflictos:
+        print(f"{VERDE}✓ Inventario guardado exitosamente ({len(aplicadas)} cambios en la base de datos){RESET}")
+        if aplicadas:
+            with bloquear(RUTA_BLOQUEO):
+                _registrar_movimientos(aplicadas)
+    else:
+        print(f"{AMARILLO}⚠ No hay cambios pendientes por guardar.{RESET}")
+    _mostrar_conflictos(conflictos)
+
+
+# ===================================================
+# ALMACENAMIENTO JSON
+# ===================================================
+
+def _cargar_json():
+    """
+    - Carga el inventario desde el archivo inventario.txt en streaming (JSON o NDJSON):
+      cada producto se indexa a medida que se lee, en una sola pasada.
+    - Aplica las operaciones del journal (inventario.journal) sobre los productos cargados.
+    - Si el archivo no existe, retorna un almacén vacío.
+    - Si el archivo está corrupto, crea un respaldo y recupera la generación válida más reciente
+      sin aplicarle el journal (queda en inventario.journal.descartado).
+    - La lectura se hace con el bloqueo entre procesos tomado.
+    Returns:
+        Almacen: Almacén con los productos y el set de SKUs usados.
     Raises:
         FileNotFoundError: Si el archivo inventario.txt no existe.
         json.JSONDecodeError: Si el archivo está corrupto o tiene formato inválido.
     """
+    with bloquear(RUTA_BLOQUEO):
+        almacen = _cargar()
+        # Estado del disco que esta sesión conoce (para detectar otras sesiones)
+        almacen.sello_disco = _sello_disco()
+    return almacen
+
+
+def _cargar_diferido():
+    """
+    - Abre inventario.txt con mmap y el índice SKU → posición guardado en inventario.idx;
+      si no existe o no corresponde al archivo, lo construye (sin decodificar los
+      productos) y lo guarda. Todo con el bloqueo entre procesos tomado.
+    - Lee las operaciones de los journals para aplicarlas sobre los productos que modifican.
+    - La carga completa sigue en un hilo, sobre el mismo archivo abierto y las mismas
+      operaciones (lo que había en disco al tomar el bloqueo, aunque otra sesión guarde
+      mientras tanto). Si falla (archivo corrupto), se usa _cargar_json con su
+      recuperación al necesitar el almacén completo.
+    Returns:
+        AlmacenDiferido o None: Almacén diferido, o None si el archivo no se pudo abrir.
+    """
+    avisos = []
     try:
-        with open(RUTA_INVENTARIO, 'r', encoding='utf-8') as f:
-            productos = json.load(f)
-            # Almacena los SKUs usados para validaciones
-            skus_usados = set()
-            
-            # Itera sobre cada producto y agrega su SKU al set
-            for producto in productos:
-                skus_usados.add(producto['sku'])
-            
-            print(f"{VERDE}✓ Inventario cargado exitosamente: {len(productos)} productos.{RESET}")
-            return productos, skus_usados
-    
+        with bloquear(RUTA_BLOQUEO):
+            archivo = open(RUTA_INVENTARIO, 'rb')
+            try:
+                datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+                indice = _indice_skus(datos)
+                operaciones = (_operaciones_journal(_ruta_journal_apartado(), avisos)
+                    + _operaciones_journal(RUTA_JOURNAL, avisos))
+                sello = _sello_disco()
+            except BaseException:
+                archivo.close()
+                raise
+    except (OSError, ValueError):
+        return None
+
+    _mostrar_avisos(avisos)
+    cargar = functools.partial(_cargar_completo, archivo, operaciones, sello)
+    almacen = AlmacenDiferido(datos, indice, operaciones, cargar, _cargar_json)
+    print(f"{VERDE}✓ Inventario abierto: {len(almacen)} productos "
+        f"(la carga completa continúa en segundo plano).{RESET}")
+    return almacen
+
+
+def _indice_skus(datos):
+    """
+    Abre el índice guardado de inventario.txt o, si no corresponde, lo reconstruye y lo guarda.
+    Args:
+        datos (mmap): Contenido de inventario.txt.
+    Returns:
+        IndiceSkus: Índice SKU → posición del archivo.
+    """
+    firma = firma_archivo(RUTA_INVENTARIO, datos)
+    indice = IndiceSkus.abrir(RUTA_INDICE, firma)
+    if indice is None:
+        indice = IndiceSkus.construir(datos)
+        _guardar_indice(indice, firma)
+    return indice
+
+
+def _guardar_indice(indice, firma):
+    try:
+        indice.guardar(RUTA_INDICE, firma)
+    except OSError as e:
+        # Sin índice guardado, el próximo inicio lo reconstruye
+        print(f"{AMARILLO}⚠ No se pudo guardar el índice de SKUs: {e}{RESET}")
+
+
+def _indexar_temporal(ruta_temporal):
+    """
+    Construye el índice SKU → posición de un inventario recién escrito, si alcanza
+    UMBRAL_CARGA_DIFERIDA (los inventarios menores se cargan completos y no lo usan).
+    Args:
+        ruta_temporal (str): Archivo temporal que reemplazará a inventario.txt.
+    Returns:
+        tuple o None: (IndiceSkus, firma del archivo) o None si no corresponde.
+    """
+    if _tamano(ruta_temporal) < UMBRAL_CARGA_DIFERIDA:
+        return None
+    with open(ruta_temporal, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+        # El renombrado conserva el tamaño y la fecha de modificación: la firma sigue valiendo
+        return IndiceSkus.construir(datos), firma_archivo(ruta_temporal, datos)
+
+
+def _cargar_completo(archivo, operaciones, sello):
+    """
+    Carga completa de un almacén diferido (en su hilo, sin mensajes): lee el archivo
+    abierto por _cargar_diferido y le aplica las operaciones leídas junto con él.
+    No toma el bloqueo: el archivo abierto no cambia aunque otra sesión lo reemplace.
+    Args:
+        archivo (file): inventario.txt abierto en modo binario (se cierra al terminar).
+        operaciones (list): Operaciones de los journals, en orden.
+        sello (tuple): Estado del disco al abrir el archivo (ver _sello_disco).
+    Returns:
+        tuple: (Almacen completo, lista de avisos para mostrar en el hilo principal)
+    """
+    with archivo:
+        almacen = Almacen(iterar_productos(archivo))
+        if metricas.activas():
+            metricas.registrar_bytes('leidos', archivo.tell())
+
+    avisos = []
+    for numero, operacion in enumerate(operaciones, 1):
+        try:
+            almacen.aplicar_operacion(operacion)
+        except (KeyError, TypeError, ValueError):
+            avisos.append(f"Operación {numero} del journal inválida, se omite.")
+    # Las operaciones del journal ya están persistidas
+    almacen.tomar_cambios()
+    almacen.sello_disco = sello
+    return almacen, avisos
+
+
+def _cargar():
+    try:
+        almacen = _construir_almacen(RUTA_INVENTARIO)
+        print(f"{VERDE}✓ Inventario cargado exitosamente: {len(almacen)} productos.{RESET}")
+        return almacen
+
     except FileNotFoundError:
+        almacen = Almacen()
+        # Sin archivo principal, el journal no tiene base sobre la cual aplicarse
+        almacen.compactar_pendiente = True
         print(f"{AMARILLO}⚠ Archivo no encontrado. Iniciando con inventario vacío.{RESET}")
-        return [], set()
-    
+        return almacen
+
     except json.JSONDecodeError:
         print(f"{ROJO}✗ Error: Archivo inventario.txt corrupto.{RESET}")
 
@@ -47,24 +427,521 @@ def cargar_inventario():
 
         except Exception as e:
             print(f"{ROJO}✗ No se pudo crear el respaldo: {e}{RESET}")
-        
+
+        # Busca la generación válida más reciente. Los journals corresponden al archivo
+        # dañado: aplicados sobre una generación anterior la dejarían inconsistente.
+        for numero in range(1, GENERACIONES + 1):
+            ruta = f"{RUTA_INVENTARIO}.{numero}"
+            try:
+                almacen = _construir_almacen(ruta, aplicar_journal=False)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+
+            # El próximo guardado debe reemplazar el archivo corrupto completo
+            almacen.compactar_pendiente = True
+            print(f"{AMARILLO}⚠ Inventario recuperado desde {os.path.basename(ruta)}: "
+                f"{len(almacen)} productos.{RESET}")
+            _descartar_journals()
+            return almacen
+
+        almacen = Almacen()
+        almacen.compactar_pendiente = True
         print(f"{AMARILLO}⚠ Iniciando con inventario vacío.{RESET}")
-        return [], set()
+        _descartar_journals()
+        return almacen
+
+
+def _descartar_journals():
+    """
+    Aparta los journals sin aplicarlos cuando el inventario se recupera desde una
+    generación anterior o se inicia vacío: sus operaciones eran sobre el archivo dañado.
+    Se conservan en inventario.journal.descartado y se informa cuántas se perdieron.
+    """
+    descartadas = 0
+    destino = _ruta_journal_descartado()
+    try:
+        for ruta in (_ruta_journal_apartado(), RUTA_JOURNAL):
+            if not os.path.exists(ruta):
+                continue
+            descartadas += len(_operaciones_journal(ruta))
+            with open(ruta, 'rb') as origen:
+                contenido = origen.read()
+            if contenido and not contenido.endswith(b'\n'):
+                contenido += b'\n'
+            with open(destino, 'ab') as f:
+                f.write(contenido)
+                f.flush()
+                os.fsync(f.fileno())
+            os.remove(ruta)
+    except OSError as e:
+        # Sin moverlos, el próximo guardado igual los descarta al compactar
+        print(f"{ROJO}✗ No se pudo apartar el journal: {e}{RESET}")
+        return
+
+    if descartadas:
+        print(f"{AMARILLO}⚠ Se perdieron los cambios guardados después de esa versión: "
+            f"{descartadas} operaciones del journal no se aplicaron.{RESET}")
+        print(f"{AMARILLO}  Copia de las operaciones descartadas en {os.path.basename(destino)}{RESET}")
+
+
+def _guardar_json(almacen, en_segundo_plano=None, en_hilo_almacen=_llamar):
+    """
+    Guarda los cambios del inventario en inventario.txt y su journal.
+    - Si otra sesión guardó desde la última lectura, fusiona sus cambios con los
+      de esta sesión (ver concurrencia.fusionar_cambios) en lugar de sobrescribirlos.
+    - Agrega al journal solo las operaciones realizadas desde el último guardado.
+    - Si el journal supera LIMITE_JOURNAL, compacta todo en inventario.txt.
+    Args:
+        almacen (Almacen): Almacén con los productos y sus cambios pendientes.
+        en_segundo_plano (bool): Fuerza (o evita) escribir la compactación en un hilo.
+            Si es None se decide según UMBRAL_SEGUNDO_PLANO.
+        en_hilo_almacen (callable): Ver guardar_inventario.
+    Raises:
+        Exception: Si ocurre un error al guardar el archivo.
+    """
+    # Solo puede haber una escritura a la vez en esta sesión
+    esperar_guardado()
+
+    compactacion = None
+    try:
+        with bloquear(RUTA_BLOQUEO):
+            conflictos = _sincronizar(almacen, en_hilo_almacen)
+            requiere_compactar = almacen.compactar_pendiente or not os.path.exists(RUTA_INVENTARIO)
+
+            if almacen.hay_cambios:
+                cambios = almacen.tomar_cambios()
+                try:
+                    _agregar_al_journal(cambios)
+                except Exception:
+                    almacen.devolver_cambios(cambios)
+                    raise
+                _registrar_movimientos(cambios)
+                print(f"{VERDE}✓ Inventario guardado exitosamente ({len(cambios)} cambios en el journal){RESET}")
+            elif not requiere_compactar:
+                print(f"{AMARILLO}⚠ No hay cambios pendientes por guardar.{RESET}")
 
+            almacen.sello_disco = _sello_disco()
 
-def guardar_inventario(productos):
+            # Compacta cuando el journal crece demasiado
+            if requiere_compactar or _tamano(RUTA_JOURNAL) >= LIMITE_JOURNAL:
+                compactacion = _preparar_compactacion(almacen, en_hilo_almacen)
+
+    except Exception as e:
+        print(f"{ROJO}✗ Error al guardar el inventario: {e}{RESET}")
+        return
+
+    _mostrar_conflictos(conflictos)
+
+    if compactacion is not None:
+        _lanzar_compactacion(almacen, compactacion, en_segundo_plano)
+
+
+@metricas.instrumentar('compactar_inventario')
+def compactar_inventario(almacen, en_segundo_plano=None):
     """
-    Guarda el inventario en el archivo inventario/inventario.txt en formato JSON.
+    Reescribe inventario.txt completo y vacía el journal.
+    La escritura es atómica (archivo temporal + fsync + rename) y conserva
+    GENERACIONES versiones anteriores. Con catálogos grandes se escribe en
+    un hilo para no bloquear el menú.
     Args:
-        productos (list): Lista de diccionarios con los productos a guardar.
+        almacen (Almacen): Almacén con los productos a guardar.
+        en_segundo_plano (bool): Fuerza (o evita) la escritura en un hilo.
+            Si es None se decide según UMBRAL_SEGUNDO_PLANO.
     Raises:
         Exception: Si ocurre un error al guardar el archivo.
     """
+    almacen.compactar_pendiente = True
+    _guardar_json(almacen, en_segundo_plano)
+
+
+def esperar_guardado():
+    """
+    Espera a que termine la compactación en segundo plano, si hay una en curso.
+    """
+    global _hilo_guardado
+
+    if _hilo_guardado is not None:
+        _hilo_guardado.join()
+        _hilo_guardado = None
+
+
+def _sello_disco():
+    """
+    Estado actual de los archivos del inventario (principal, journal apartado y journal).
+    Si cambia respecto del que conoce una sesión, otra sesión escribió.
+    """
+    return (estado_archivo(RUTA_INVENTARIO), estado_archivo(_ruta_journal_apartado()), estado_archivo(RUTA_JOURNAL))
+
+
+def _tamano(ruta):
+    try:
+        return os.path.getsize(ruta)
+    except FileNotFoundError:
+        return 0
+
+
+def _sincronizar(almacen, en_hilo_almacen=_llamar):
+    """
+    Incorpora al almacén los cambios guardados por otras sesiones (con el bloqueo tomado).
+    Relee el inventario desde el disco y le aplica encima los cambios pendientes de esta
+    sesión; el almacén queda con el resultado y con los cambios ya resueltos como pendientes.
+    La relectura se hace en el hilo actual; la fusión y el reemplazo, con en_hilo_almacen.
+    Args:
+        almacen (Almacen): Almacén de esta sesión.
+        en_hilo_almacen (callable): Ver guardar_inventario.
+    Returns:
+        list: Mensajes de conflictos (vacía si nadie más escribió).
+    """
+    if almacen.sello_disco == _sello_disco() or almacen.compactar_pendiente:
+        return []
+
+    try:
+        disco = _construir_almacen(RUTA_INVENTARIO, mostrar=False)
+    except (FileNotFoundError, json.JSONDecodeError):
+        # El disco no es legible: esta sesión reescribe el inventario completo
+        almacen.compactar_pendiente = True
+        return []
+
+    return en_hilo_almacen(_fusionar_con_disco, almacen, disco)
+
+
+def _fusionar_con_disco(almacen, disco):
+    conflictos = fusionar_cambios(disco, almacen.tomar_cambios())
+    almacen.reemplazar_con(disco)
+    return conflictos
+
+
+def _preparar_compactacion(almacen, en_hilo_almacen=_llamar):
+    """
+    Prepara la compactación con el bloqueo tomado: copia los productos y aparta
+    el journal para que los guardados siguientes vayan a uno nuevo.
+    Args:
+        almacen (Almacen): Almacén sin cambios pendientes.
+        en_hilo_almacen (callable): Ver guardar_inventario (hace la copia de los productos).
+    Returns:
+        tuple: (copia de los productos, estado del archivo principal, estado del journal apartado)
+    """
+    # Copia de los productos: el menú puede seguir modificándolos
+    productos = en_hilo_almacen(_copiar_productos, almacen)
+
+    # Las operaciones nuevas irán a un journal limpio mientras se escribe
+    _apartar_journal()
+
+    almacen.compactar_pendiente = False
+    almacen.sello_disco = _sello_disco()
+    return productos, estado_archivo(RUTA_INVENTARIO), estado_archivo(_ruta_journal_apartado())
+
+
+def _copiar_productos(almacen):
+    return [producto.copiar() for producto in almacen]
+
+
+def _lanzar_compactacion(almacen, compactacion, en_segundo_plano):
+    global _hilo_guardado
+
+    productos = compactacion[0]
+    if en_segundo_plano is None:
+        en_segundo_plano = len(productos) >= UMBRAL_SEGUNDO_PLANO
+
+    if en_segundo_plano:
+        _hilo_guardado = threading.Thread(target=_escribir_compactacion, args=(almacen, compactacion))
+        _hilo_guardado.start()
+        print(f"{CYAN}Guardando {len(productos)} productos en segundo plano...{RESET}")
+    else:
+        _escribir_compactacion(almacen, compactacion)
+
+
+@metricas.instrumentar('escribir_compactacion')
+def _escribir_compactacion(almacen, compactacion):
+    """
+    Escribe el archivo principal y descarta el journal ya incluido en él.
+    El archivo temporal se escribe sin bloqueo; el reemplazo se hace con el bloqueo
+    tomado y solo si ninguna otra sesión compactó mientras tanto.
+    Si falla, el journal apartado se conserva y se aplica en la próxima carga.
+    Args:
+        almacen (Almacen): Almacén de origen (para reintentar si falla).
+        compactacion (tuple): Resultado de _preparar_compactacion.
+    """
+    productos, estado_principal, estado_apartado = compactacion
+    ruta_temporal = None
     try:
-        with open(RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
-            # Guarda los productos en formato JSON con indentación
-            json.dump(productos, f, indent=2, ensure_ascii=False)
+        ruta_temporal = _escribir_temporal(RUTA_INVENTARIO, productos)
+        # El índice de SKUs se construye sin el bloqueo tomado; dentro solo se escribe
+        indice = _indexar_temporal(ruta_temporal)
+
+        with bloquear(RUTA_BLOQUEO):
+            if (estado_archivo(RUTA_INVENTARIO) != estado_principal
+                    or estado_archivo(_ruta_journal_apartado()) != estado_apartado):
+                # Otra sesión compactó con datos más recientes
+                os.remove(ruta_temporal)
+                print(f"{AMARILLO}⚠ Otra sesión compactó el inventario; se conserva su versión.{RESET}")
+                return
+
+            sello_anterior = _sello_disco()
+            _reemplazar_atomico(ruta_temporal, RUTA_INVENTARIO)
+
+            # El archivo principal ya contiene todas las operaciones del journal apartado
+            if os.path.exists(_ruta_journal_apartado()):
+                os.remove(_ruta_journal_apartado())
+
+            if indice is not None:
+                _guardar_indice(*indice)
+
+            # Si nadie más escribió, esta sesión sigue al día con el disco
+            if almacen.sello_disco == sello_anterior:
+                almacen.sello_disco = _sello_disco()
+
         print(f"{VERDE}✓ Inventario guardado exitosamente en inventario.txt{RESET}")
 
     except Exception as e:
+        if ruta_temporal is not None and os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        almacen.compactar_pendiente = True
         print(f"{ROJO}✗ Error al guardar el inventario: {e}{RESET}")
+
+
+def _escribir_temporal(ruta, productos):
+    """
+    Escribe los productos en un archivo temporal junto a la ruta final y lo sincroniza a disco.
+    Args:
+        ruta (str): Ruta del archivo final.
+        productos (list): Productos a escribir.
+    Returns:
+        str: Ruta del archivo temporal.
+    """
+    directorio = os.path.dirname(ruta)
+    descriptor, ruta_temporal = tempfile.mkstemp(prefix='.inventario-', suffix='.tmp', dir=directorio)
+
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            # Escribe los productos de a uno (sin armar el texto completo en memoria)
+            escribir_productos(f, productos, FORMATO_INVENTARIO)
+            f.flush()
+            os.fsync(f.fileno())
+            metricas.registrar_bytes('escritos', f.tell())
+
+    except BaseException:
+        os.remove(ruta_temporal)
+        raise
+
+    return ruta_temporal
+
+
+def _reemplazar_atomico(ruta_temporal, ruta):
+    """
+    Renombra el archivo temporal sobre la ruta final, rotando las generaciones anteriores.
+    Args:
+        ruta_temporal (str): Archivo ya escrito y sincronizado.
+        ruta (str): Ruta del archivo final.
+    """
+    _rotar_generaciones(ruta)
+    os.replace(ruta_temporal, ruta)
+    _sincronizar_directorio(os.path.dirname(ruta))
+
+
+def _rotar_generaciones(ruta):
+    """
+    Desplaza inventario.txt.1 → .2 → ... y deja la versión actual como .1.
+    La versión actual se enlaza (no se mueve) para que el archivo principal
+    exista en todo momento.
+    Args:
+        ruta (str): Ruta del archivo principal.
+    """
+    if GENERACIONES < 1:
+        return
+
+    for numero in range(GENERACIONES, 1, -1):
+        anterior = f"{ruta}.{numero - 1}"
+        if os.path.exists(anterior):
+            os.replace(anterior, f"{ruta}.{numero}")
+
+    if os.path.exists(ruta):
+        try:
+            os.link(ruta, f"{ruta}.1")
+        except OSError:
+            # Sistemas de archivos sin enlaces duros
+            shutil.copy2(ruta, f"{ruta}.1")
+
+
+def _sincronizar_directorio(directorio):
+    """
+    Sincroniza la entrada del directorio para que el rename sobreviva a un corte.
+    En sistemas que no lo permiten (Windows) no hace nada.
+    Args:
+        directorio (str): Directorio a sincronizar.
+    """
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def _construir_almacen(ruta, mostrar=True, aplicar_journal=True):
+    """
+    Construye el almacén leyendo el archivo en streaming y aplica los journals pendientes.
+    El set de SKUs y los índices se construyen en la misma pasada de lectura.
+    Args:
+        ruta (str): Ruta del archivo de inventario.
+        mostrar (bool): Si es False no muestra mensajes ni avisos del journal (relectura al guardar).
+        aplicar_journal (bool): Si es False no aplica los journals (generaciones anteriores).
+    Returns:
+        Almacen: Almacén con los productos cargados.
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+        json.JSONDecodeError: Si el archivo está corrupto.
+    """
+    tamano = os.path.getsize(ruta)
+    progreso = None
+    if mostrar and tamano >= UMBRAL_PROGRESO:
+        progreso = _crear_indicador_progreso()
+
+    almacen = Almacen(iterar_productos(ruta, progreso))
+    if progreso is not None:
+        print()
+
+    operaciones = 0
+    if aplicar_journal:
+        # Primero el journal apartado por una compactación inconclusa, luego el actual
+        avisos = []
+        operaciones = _aplicar_journal(almacen, _ruta_journal_apartado(), avisos)
+        operaciones += _aplicar_journal(almacen, RUTA_JOURNAL, avisos)
+        tamano += _tamano(_ruta_journal_apartado()) + _tamano(RUTA_JOURNAL)
+        if mostrar:
+            _mostrar_avisos(avisos)
+    if metricas.activas():
+        metricas.registrar_bytes('leidos', tamano)
+    if operaciones and mostrar:
+        print(f"{VERDE}✓ Journal aplicado: {operaciones} operaciones.{RESET}")
+    return almacen
+
+
+def _crear_indicador_progreso():
+    """
+    Crea una función que muestra el porcentaje de carga cada 5%.
+    Returns:
+        callable: Función progreso(bytes_leidos, bytes_totales).
+    """
+    ultimo = [-1]
+
+    def mostrar(leidos, total):
+        porcentaje = leidos * 100 // total if total else 100
+        if porcentaje // 5 != ultimo[0]:
+            ultimo[0] = porcentaje // 5
+            print(f"\r{CYAN}Cargando inventario... {porcentaje}%{RESET}", end='', flush=True)
+
+    return mostrar
+
+
+def _ruta_journal_apartado():
+    return RUTA_JOURNAL + '.compactando'
+
+
+def _ruta_journal_descartado():
+    return RUTA_JOURNAL + '.descartado'
+
+
+def _agregar_al_journal(cambios):
+    """
+    Agrega operaciones al final del journal y las sincroniza a disco.
+    Args:
+        cambios (list): Operaciones a registrar.
+    """
+    # Si una escritura anterior quedó cortada, la nueva operación empieza en otra línea
+    if _tamano(RUTA_JOURNAL) > 0:
+        with open(RUTA_JOURNAL, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            cortado = f.read(1) != b'\n'
+    else:
+        cortado = False
+
+    with open(RUTA_JOURNAL, 'a', encoding='utf-8') as f:
+        inicio = f.tell()
+        if cortado:
+            f.write('\n')
+        # Una operación por línea (NDJSON)
+        for operacion in cambios:
+            f.write(json.dumps(operacion, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+        metricas.registrar_bytes('escritos', f.tell() - inicio)
+
+
+def _apartar_journal():
+    """
+    Mueve el journal actual a inventario.journal.compactando.
+    Si ya existe uno apartado (compactación anterior fallida), lo extiende.
+    """
+    if not os.path.exists(RUTA_JOURNAL):
+        return
+
+    apartado = _ruta_journal_apartado()
+    if os.path.exists(apartado):
+        with open(RUTA_JOURNAL, 'r', encoding='utf-8') as origen, \
+                open(apartado, 'a', encoding='utf-8') as destino:
+            shutil.copyfileobj(origen, destino)
+            destino.flush()
+            os.fsync(destino.fileno())
+        os.remove(RUTA_JOURNAL)
+    else:
+        os.replace(RUTA_JOURNAL, apartado)
+
+
+def _operaciones_journal(ruta, avisos=None):
+    """
+    Lee las operaciones válidas de un journal (las líneas inválidas se omiten).
+    Args:
+        ruta (str): Ruta del journal.
+        avisos (list): Si se indica, recibe un aviso por cada línea inválida.
+    Returns:
+        list: Operaciones en orden (vacía si el journal no existe).
+    """
+    operaciones = []
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for numero, linea in enumerate(f, 1):
+                if linea.strip():
+                    try:
+                        operaciones.append(json.loads(linea))
+                    except json.JSONDecodeError:
+                        if avisos is not None:
+                            avisos.append(f"Línea {numero} del journal inválida, se omite.")
+    except FileNotFoundError:
+        pass
+    return operaciones
+
+
+def _aplicar_journal(almacen, ruta, avisos):
+    """
+    Aplica las operaciones de un journal sobre el almacén recién cargado.
+    Una última línea incompleta (guardado interrumpido) se descarta.
+    Args:
+        almacen (Almacen): Almacén cargado desde inventario.txt.
+        ruta (str): Ruta del journal.
+        avisos (list): Recibe un aviso por cada línea inválida (los muestra quien llama).
+    Returns:
+        int: Cantidad de operaciones aplicadas.
+    """
+    aplicadas = 0
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for numero, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    almacen.aplicar_operacion(json.loads(linea))
+                    aplicadas += 1
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    avisos.append(f"Línea {numero} del journal inválida, se omite.")
+
+    except FileNotFoundError:
+        pass
+
+    # Las operaciones del journal ya están persistidas
+    almacen.tomar_cambios()
+    return aplicadas
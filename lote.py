@@ -0,0 +1,206 @@
+import csv
+import json
+import os
+from inventario import cargar_inventario, guardar_inventario, esperar_guardado
+from utils import VERDE, ROJO, AMARILLO, CYAN, RESET, validar_entero
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+# Rechazos que se muestran en pantalla (el resto queda en el archivo de rechazos)
+RECHAZOS_EN_PANTALLA = 20
+# Valores de la columna 'eliminar' que dan de baja el producto
+VALORES_ELIMINAR = ('1', 'si', 'sí', 'true', 'x')
+
+
+# ===================================================
+# LECTURA DE REGISTROS
+# ===================================================
+
+def leer_registros(ruta):
+    """
+    Lee en streaming los registros de un archivo CSV (con encabezado) o NDJSON.
+    El formato se decide por la extensión: .csv es CSV, cualquier otra es NDJSON.
+    Args:
+        ruta (str): Ruta del archivo de actualizaciones.
+    Yields:
+        tuple: (número de línea, diccionario del registro o None si la línea es inválida)
+    """
+    if ruta.lower().endswith('.csv'):
+        with open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+            lector = csv.DictReader(f)
+            for registro in lector:
+                yield lector.line_num, registro
+        return
+
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for numero, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                registro = None
+            yield numero, registro if isinstance(registro, dict) else None
+
+
+def _valor(registro, campo):
+    """
+    Obtiene un campo del registro; los valores vacíos se consideran ausentes.
+    """
+    valor = registro.get(campo)
+    if valor is None or str(valor).strip() == '':
+        return None
+    return valor
+
+
+# ===================================================
+# APLICACIÓN DEL LOTE
+# ===================================================
+
+def aplicar_lote(almacen, registros):
+    """
+    Aplica un lote de actualizaciones de stock y precio como una transacción:
+    primero valida todas las filas y luego aplica solo las válidas.
+    Cada registro tiene 'sku' y 'stock' (absoluto) o 'delta' (relativo), y 'precio' opcional,
+    o bien 'sku' y 'eliminar' para dar de baja el producto.
+    Los deltas de un mismo SKU se acumulan en el orden del archivo.
+    Las bajas se aplican juntas con Almacen.eliminar_varios.
+    Args:
+        almacen (Almacen): Almacén de productos.
+        registros (iterable): Tuplas (número de línea, registro) de leer_registros.
+    Returns:
+        dict: {'aplicados': filas aplicadas, 'productos': productos modificados o eliminados,
+               'rechazados': lista de (línea, sku, motivo)}
+    """
+    stocks = {}
+    precios = {}
+    eliminados = {}
+    aplicados = 0
+    rechazados = []
+
+    # Fase 1: validación (no modifica el almacén)
+    for numero, registro in registros:
+        if registro is None:
+            rechazados.append((numero, '', 'Registro con formato inválido'))
+            continue
+
+        sku = str(_valor(registro, 'sku') or '').strip().upper()
+        stock = _valor(registro, 'stock')
+        delta = _valor(registro, 'delta')
+        precio = _valor(registro, 'precio')
+        eliminar = str(_valor(registro, 'eliminar') or '').strip().lower() in VALORES_ELIMINAR
+
+        if not sku:
+            rechazados.append((numero, sku, 'SKU vacío'))
+            continue
+        producto = almacen.obtener(sku)
+        if producto is None:
+            rechazados.append((numero, sku, 'SKU inexistente'))
+            continue
+        if sku in eliminados:
+            rechazados.append((numero, sku, 'El producto se elimina en una fila anterior'))
+            continue
+        if eliminar:
+            if stock is not None or delta is not None or precio is not None:
+                rechazados.append((numero, sku, "Una baja no lleva 'stock', 'delta' ni 'precio'"))
+                continue
+            # La baja descarta los cambios anteriores del mismo SKU
+            stocks.pop(sku, None)
+            precios.pop(sku, None)
+            eliminados[sku] = None
+            aplicados += 1
+            continue
+        if (stock is None) == (delta is None):
+            rechazados.append((numero, sku, "Debe indicar 'stock' o 'delta' (solo uno)"))
+            continue
+
+        try:
+            if stock is not None:
+                nuevo_stock = validar_entero(stock, 'stock')
+            else:
+                nuevo_stock = stocks.get(sku, producto['stock']) + validar_entero(delta, 'delta')
+            nuevo_precio = validar_entero(precio, 'precio') if precio is not None else None
+        except ValueError:
+            rechazados.append((numero, sku, 'Valor numérico inválido'))
+            continue
+
+        if nuevo_stock < 0:
+            rechazados.append((numero, sku, f'El stock resultante es negativo ({nuevo_stock})'))
+            continue
+        if nuevo_precio is not None and nuevo_precio <= 0:
+            rechazados.append((numero, sku, 'El precio debe ser mayor a 0'))
+            continue
+
+        stocks[sku] = nuevo_stock
+        if nuevo_precio is not None:
+            precios[sku] = nuevo_precio
+        aplicados += 1
+
+    # Fase 2: aplica el resultado final de cada SKU a través del índice
+    almacen.eliminar_varios(eliminados)
+    for sku, nuevo_stock in stocks.items():
+        if almacen.obtener(sku)['stock'] != nuevo_stock:
+            almacen.actualizar_stock(sku, nuevo_stock)
+    for sku, nuevo_precio in precios.items():
+        if almacen.obtener(sku)['precio'] != nuevo_precio:
+            almacen.actualizar_precio(sku, nuevo_precio)
+
+    return {
+        'aplicados': aplicados,
+        'productos': len(stocks) + len(eliminados),
+        'rechazados': rechazados,
+    }
+
+
+def escribir_rechazos(ruta, rechazados):
+    """
+    Escribe el reporte de filas rechazadas en formato CSV.
+    Args:
+        ruta (str): Ruta del reporte.
+        rechazados (list): Tuplas (línea, sku, motivo).
+    """
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(('linea', 'sku', 'motivo'))
+        escritor.writerows(rechazados)
+
+
+def ejecutar_lote(ruta):
+    """
+    Aplica un archivo de actualizaciones sin menú interactivo y guarda una sola vez.
+    Args:
+        ruta (str): Ruta del archivo CSV o NDJSON.
+    Returns:
+        int: Código de salida (0 si no hubo rechazos, 1 si los hubo, 2 si falló la lectura).
+    """
+    if not os.path.exists(ruta):
+        print(f"{ROJO}✗ Error: No existe el archivo '{ruta}'.{RESET}")
+        return 2
+
+    almacen = cargar_inventario()
+    try:
+        resultado = aplicar_lote(almacen, leer_registros(ruta))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"{ROJO}✗ Error al leer '{ruta}': {e}. No se aplicaron cambios.{RESET}")
+        return 2
+
+    print(f"{VERDE}✓ Filas aplicadas: {resultado['aplicados']} "
+        f"({resultado['productos']} productos){RESET}")
+
+    rechazados = resultado['rechazados']
+    if rechazados:
+        print(f"{AMARILLO}⚠ Filas rechazadas: {len(rechazados)}{RESET}")
+        for numero, sku, motivo in rechazados[:RECHAZOS_EN_PANTALLA]:
+            print(f"  Línea {numero}: {sku or '-'} - {motivo}")
+
+        ruta_rechazos = os.path.splitext(ruta)[0] + '.rechazos.csv'
+        escribir_rechazos(ruta_rechazos, rechazados)
+        print(f"{CYAN}Reporte de rechazos: {ruta_rechazos}{RESET}")
+
+    # Un solo guardado al final del lote
+    if almacen.hay_cambios:
+        guardar_inventario(almacen)
+        esperar_guardado()
+
+    return 1 if rechazados else 0
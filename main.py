@@ -1,10 +1,14 @@
-from inventario import cargar_inventario, guardar_inventario
+import sys
+from inventario import cargar_inventario, guardar_inventario, esperar_guardado, migrar_a_sqlite, mostrar_historial
 from utils import mostrar_menu, confirmar_accion, AMARILLO, CYAN, ROJO, NEGRITA, RESET
 from operaciones import (
     registrar_producto,
     visualizar_inventario,
     actualizar_stock,
     eliminar_producto,
+    mostrar_estadisticas,
+    mostrar_diagnostico,
+    mostrar_alertas,
 )
 
 
@@ -16,49 +20,131 @@ def main():
     print(f"{AMARILLO}{NEGRITA}{'GESTIÓN DE INVENTARIO • TECHSTORE'.center(60)}{RESET}")
     print(f"{CYAN}{NEGRITA}{'='*60}{RESET}\n")
 
-    # Carga el inventario al iniciar el programa
-    datos = cargar_inventario()
-    productos = datos[0]
-    # Crea el set a partir de los productos cargados
-    skus_usados = datos[1]
+    # Carga el inventario (archivo principal + journal) al iniciar el programa.
+    # Un inventario grande se abre con carga diferida: el menú aparece sin esperar la carga completa.
+    almacen = cargar_inventario(diferida=True)
     
     # Menú
     while True:
         try:
             mostrar_menu()
-            opcion = input(f"Seleccione una opción (1-6): ").strip()
+            opcion = input(f"Seleccione una opción (1-9): ").strip()
             
             if opcion == "1":
-                visualizar_inventario(productos)
+                visualizar_inventario(almacen)
             elif opcion == "2":
-                registrar_producto(productos, skus_usados)
+                registrar_producto(almacen)
             elif opcion == "3":
-                actualizar_stock(productos)
+                actualizar_stock(almacen)
             elif opcion == "4":
-                eliminar_producto(productos, skus_usados)
+                eliminar_producto(almacen)
             elif opcion == "5":
-                guardar_inventario(productos)
+                guardar_inventario(almacen)
             elif opcion == "6":
+                mostrar_estadisticas(almacen)
+            elif opcion == "7":
+                mostrar_diagnostico()
+            elif opcion == "8":
+                mostrar_alertas(almacen)
+            elif opcion == "9":
                 # Salir (confirma si desea guardar)
                 print()
                 if confirmar_accion("¿Desea guardar el inventario antes de salir?"):
-                    guardar_inventario(productos)
+                    guardar_inventario(almacen)
+                # Espera a que termine un guardado en segundo plano
+                esperar_guardado()
                 
                 print(f"\n{CYAN}¡Gracias por usar TechStore!{RESET}\n")
                 break
             else:
-                print(f"{ROJO}Opción inválida. Por favor seleccione una opción del 1 al 6.{RESET}")
+                print(f"{ROJO}Opción inválida. Por favor seleccione una opción del 1 al 9.{RESET}")
         
         except Exception as e:
             print(f"{ROJO}Error inesperado: {e}{RESET}")
             print(f"{CYAN}El programa continuará ejecutándose...{RESET}")
 
 
+def ejecutar_comando(argumentos):
+    """
+    Ejecuta un comando no interactivo de la línea de comandos.
+    Args:
+        argumentos (list): Argumentos recibidos (sin el nombre del programa).
+    Returns:
+        int: Código de salida del comando.
+    """
+    # Solo los comandos usan argparse, el lote y el servidor (asyncio): el menú arranca sin importarlos
+    import argparse
+    from lote import ejecutar_lote
+    from importacion import ejecutar_importacion
+    from alertas import ejecutar_alertas, RUTA_ALERTAS
+    from exportacion import ejecutar_exportacion, FORMATOS
+    from servidor import ejecutar_servidor, HOST_POR_DEFECTO, PUERTO_POR_DEFECTO
+
+    parser = argparse.ArgumentParser(prog="main.py", description="TechStore - comandos no interactivos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    
+    comando_aplicar = comandos.add_parser("aplicar", help="Aplica un lote de actualizaciones de stock/precio")
+    comando_aplicar.add_argument("archivo", help="Archivo CSV o NDJSON con sku, stock o delta y precio opcional")
+    
+    comando_importar = comandos.add_parser("importar", help="Importa productos nuevos desde un archivo CSV o NDJSON")
+    comando_importar.add_argument("archivo", help="Archivo CSV o NDJSON con sku, nombre, categoria, precio y stock")
+    comando_importar.add_argument("--procesos", type=int, help="Procesos para leer y validar (por defecto uno por núcleo)")
+    
+    comando_migrar = comandos.add_parser("migrar", help="Importa inventario.txt a la base SQLite (inventario.db)")
+    comando_migrar.add_argument("--reemplazar", action="store_true", help="Reemplaza los productos que ya tenga la base")
+    
+    comando_servidor = comandos.add_parser("servidor", help="Inicia la API HTTP/JSON del inventario")
+    comando_servidor.add_argument("--host", default=HOST_POR_DEFECTO, help=f"Dirección donde escuchar (por defecto {HOST_POR_DEFECTO})")
+    comando_servidor.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO, help=f"Puerto (por defecto {PUERTO_POR_DEFECTO})")
+    
+    comando_historial = comandos.add_parser("historial", help="Muestra los movimientos de stock de un producto")
+    comando_historial.add_argument("sku", help="Código SKU del producto")
+    comando_historial.add_argument("--desde", help="Fecha inicial (AAAA-MM-DD o AAAA-MM-DD HH:MM)")
+    comando_historial.add_argument("--hasta", help="Fecha final, incluida (AAAA-MM-DD o AAAA-MM-DD HH:MM)")
+    
+    comando_alertas = comandos.add_parser("alertas", help="Exporta en CSV los productos con stock bajo")
+    comando_alertas.add_argument("--salida", default=RUTA_ALERTAS, help=f"Archivo CSV del reporte (por defecto {RUTA_ALERTAS})")
+    comando_alertas.add_argument("--limite", type=int, help="Solo los N productos más urgentes")
+    
+    comando_exportar = comandos.add_parser("exportar", help="Exporta el inventario en CSV, NDJSON o texto de ancho fijo")
+    comando_exportar.add_argument("archivo", help="Archivo de destino (.csv, .ndjson/.jsonl o .txt)")
+    comando_exportar.add_argument("--formato", choices=FORMATOS, help="Formato (por defecto según la extensión)")
+    filtro = comando_exportar.add_mutually_exclusive_group()
+    filtro.add_argument("--categoria", help="Solo los productos de una categoría")
+    filtro.add_argument("--buscar", help="Solo el resultado de una búsqueda por SKU o nombre")
+    precios = comando_exportar.add_mutually_exclusive_group()
+    precios.add_argument("--formatear-precio", dest="formatear", action="store_const", const=True,
+        help="Precios como $1.250.000 (por defecto solo en texto)")
+    precios.add_argument("--sin-formatear-precio", dest="formatear", action="store_const", const=False,
+        help="Precios como números")
+    
+    opciones = parser.parse_args(argumentos)
+    
+    if opciones.comando == "aplicar":
+        return ejecutar_lote(opciones.archivo)
+    if opciones.comando == "importar":
+        return ejecutar_importacion(opciones.archivo, opciones.procesos)
+    if opciones.comando == "migrar":
+        return migrar_a_sqlite(opciones.reemplazar)
+    if opciones.comando == "servidor":
+        return ejecutar_servidor(opciones.host, opciones.puerto)
+    if opciones.comando == "historial":
+        return mostrar_historial(opciones.sku, opciones.desde, opciones.hasta)
+    if opciones.comando == "alertas":
+        return ejecutar_alertas(opciones.salida, opciones.limite)
+    if opciones.comando == "exportar":
+        return ejecutar_exportacion(opciones.archivo, opciones.formato, opciones.categoria,
+            opciones.buscar, opciones.formatear)
+
+
 if __name__ == "__main__":
     """
     Punto de entrada del programa.
+    Sin argumentos abre el menú interactivo; con argumentos ejecuta un comando.
     """
     try:
+        if len(sys.argv) > 1:
+            sys.exit(ejecutar_comando(sys.argv[1:]))
         main()
     except KeyboardInterrupt:
         # Manejo de salida con Ctrl+C
@@ -0,0 +1,383 @@
+import contextlib
+import functools
+import io
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+
+# Límites superiores (segundos) de las cubetas del histograma de latencia
+LIMITES_LATENCIA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# Funciones que se muestran del perfil de una operación (las de mayor tiempo acumulado)
+LINEAS_PERFIL = 25
+
+# Prefijo de los nombres de las métricas en formato Prometheus
+PREFIJO_PROMETHEUS = 'techstore'
+
+# Las métricas son opcionales: se activan con TECHSTORE_METRICAS=1 o desde el menú
+_activas = os.environ.get('TECHSTORE_METRICAS', '') == '1'
+
+# Operación cuya próxima llamada se perfila con cProfile (None: ninguna)
+_perfil_pendiente = None
+
+# Con las métricas inactivas y sin perfil pendiente, las envolturas solo leen esta variable
+_medir = _activas
+
+_operaciones = {}
+_bytes = {'leidos': 0, 'escritos': 0}
+_perfiles = {}
+_nombres = []
+_bloqueo = threading.Lock()
+_SIN_MEDICION = contextlib.nullcontext()
+
+
+# ===================================================
+# REGISTRO
+# ===================================================
+
+class _Operacion:
+    """
+    Métricas acumuladas de una operación: cantidad de llamadas, histograma
+    de latencia y tamaño del catálogo en la última llamada.
+    """
+
+    __slots__ = ('cantidad', 'segundos', 'maximo', 'cubetas', 'catalogo')
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+        self.maximo = 0.0
+        # Una cubeta por límite más la de los valores mayores (+Inf)
+        self.cubetas = [0] * (len(LIMITES_LATENCIA) + 1)
+        self.catalogo = None
+
+    def registrar(self, segundos, catalogo):
+        self.cantidad += 1
+        self.segundos += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.cubetas[bisect_left(LIMITES_LATENCIA, segundos)] += 1
+        if catalogo is not None:
+            self.catalogo = catalogo
+
+    def percentil(self, fraccion):
+        """
+        Estima un percentil con el histograma: límite superior de la cubeta que lo contiene.
+        Args:
+            fraccion (float): Percentil entre 0 y 1 (0.95 → p95).
+        Returns:
+            float: Latencia estimada en segundos (el máximo si cae en +Inf).
+        """
+        objetivo = fraccion * self.cantidad
+        acumulado = 0
+        for limite, cantidad in zip(LIMITES_LATENCIA, self.cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+def _actualizar_estado():
+    global _medir
+    _medir = _activas or _perfil_pendiente is not None
+
+
+def activar(activas=True):
+    """
+    Activa o desactiva el registro de métricas (lo acumulado se conserva).
+    Args:
+        activas (bool): True para registrar, False para dejar de hacerlo.
+    """
+    global _activas
+    _activas = activas
+    _actualizar_estado()
+
+
+def activas():
+    """
+    Returns:
+        bool: True si se están registrando métricas.
+    """
+    return _activas
+
+
+def limpiar():
+    """
+    Descarta las métricas y los perfiles acumulados.
+    """
+    with _bloqueo:
+        _operaciones.clear()
+        _perfiles.clear()
+        _bytes.update(leidos=0, escritos=0)
+
+
+def operaciones_instrumentadas():
+    """
+    Returns:
+        list: Nombres de las operaciones instrumentadas (en orden de registro).
+    """
+    return list(_nombres)
+
+
+def _registrar_operacion(nombre, segundos, catalogo):
+    with _bloqueo:
+        operacion = _operaciones.get(nombre)
+        if operacion is None:
+            operacion = _operaciones[nombre] = _Operacion()
+        operacion.registrar(segundos, catalogo)
+
+
+def registrar_bytes(tipo, cantidad):
+    """
+    Suma bytes leídos o escritos por la carga y el guardado del inventario.
+    Args:
+        tipo (str): 'leidos' o 'escritos'.
+        cantidad (int): Cantidad de bytes.
+    """
+    if not _activas:
+        return
+    with _bloqueo:
+        _bytes[tipo] += cantidad
+
+
+# ===================================================
+# INSTRUMENTACIÓN
+# ===================================================
+
+def _tamano_catalogo(objeto):
+    """
+    Cantidad de productos de un almacén o lista (None si el objeto no tiene largo).
+    """
+    if objeto is None or isinstance(objeto, str) or not hasattr(objeto, '__len__'):
+        return None
+    return len(objeto)
+
+
+class _Medicion:
+    """
+    Contexto que mide la latencia de una llamada y la perfila si está pendiente.
+    """
+
+    __slots__ = ('nombre', 'catalogo', '_inicio', '_perfil')
+
+    def __init__(self, nombre, catalogo):
+        self.nombre = nombre
+        self.catalogo = catalogo
+        self._perfil = None
+
+    def __enter__(self):
+        global _perfil_pendiente
+
+        if _perfil_pendiente == self.nombre:
+            _perfil_pendiente = None
+            _actualizar_estado()
+            # cProfile y pstats se importan solo al perfilar (arranque más rápido)
+            import cProfile
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self._inicio
+        if self._perfil is not None:
+            self._perfil.disable()
+            _guardar_perfil(self.nombre, self._perfil)
+        if _activas:
+            _registrar_operacion(self.nombre, segundos, self.catalogo)
+        return False
+
+
+class Operacion:
+    """
+    Operación instrumentada. Se usa como decorador de una función o, dentro de
+    funciones interactivas, como contexto alrededor del trabajo (sin contar la
+    espera del input):
+
+        @instrumentar('guardar_inventario')
+        def guardar_inventario(almacen): ...
+
+        BUSQUEDA = instrumentar('buscar_producto')
+        with BUSQUEDA.medir(almacen):
+            ...
+
+    Con las métricas inactivas solo se agrega la lectura de una variable global.
+    """
+
+    def __init__(self, nombre):
+        """
+        Args:
+            nombre (str): Nombre de la operación en las métricas.
+        """
+        self.nombre = nombre
+        _nombres.append(nombre)
+
+    def __call__(self, funcion):
+        nombre = self.nombre
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _medir:
+                return funcion(*args, **kwargs)
+            # El catálogo es el primer argumento o, si no hay (carga), el resultado
+            with _Medicion(nombre, _tamano_catalogo(args[0]) if args else None) as medicion:
+                resultado = funcion(*args, **kwargs)
+                if medicion.catalogo is None:
+                    medicion.catalogo = _tamano_catalogo(resultado)
+            return resultado
+
+        return envoltura
+
+    def medir(self, catalogo=None):
+        """
+        Contexto que mide el bloque como una llamada de la operación.
+        Args:
+            catalogo (Almacen o list): Productos sobre los que se opera (para su tamaño).
+        Returns:
+            Contexto de la medición (uno vacío si las métricas están inactivas).
+        """
+        if not _medir:
+            return _SIN_MEDICION
+        return _Medicion(self.nombre, _tamano_catalogo(catalogo))
+
+
+def instrumentar(nombre):
+    """
+    Registra una operación instrumentada: latencia (histograma), cantidad de
+    llamadas y tamaño del catálogo.
+    Args:
+        nombre (str): Nombre de la operación en las métricas.
+    Returns:
+        Operacion: Decorador y fábrica de contextos de medición.
+    """
+    return Operacion(nombre)
+
+
+# ===================================================
+# PERFILES (cProfile)
+# ===================================================
+
+def perfilar_siguiente(nombre):
+    """
+    Perfila con cProfile la próxima llamada de una operación instrumentada
+    (aunque las métricas estén inactivas).
+    Args:
+        nombre (str): Nombre de la operación.
+    Raises:
+        ValueError: Si la operación no está instrumentada.
+    """
+    global _perfil_pendiente
+
+    if nombre not in _nombres:
+        raise ValueError(f"Operación desconocida: '{nombre}'")
+    _perfil_pendiente = nombre
+    _actualizar_estado()
+
+
+def perfil_pendiente():
+    """
+    Returns:
+        str o None: Operación que se perfilará en su próxima llamada.
+    """
+    return _perfil_pendiente
+
+
+def _guardar_perfil(nombre, perfil):
+    import pstats
+
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(LINEAS_PERFIL)
+    with _bloqueo:
+        _perfiles[nombre] = salida.getvalue()
+
+
+def obtener_perfiles():
+    """
+    Returns:
+        dict: Operación → texto del último perfil capturado (pstats, por tiempo acumulado).
+    """
+    with _bloqueo:
+        return dict(_perfiles)
+
+
+# ===================================================
+# EXPORTACIÓN
+# ===================================================
+
+def resumen():
+    """
+    Foto de las métricas acumuladas.
+    Returns:
+        dict: activas, operaciones (cantidad, segundos, promedio, p50, p95, máximo,
+            catálogo y cubetas acumuladas por límite) y bytes leídos/escritos.
+    """
+    with _bloqueo:
+        operaciones = {}
+        for nombre, operacion in _operaciones.items():
+            cubetas = {}
+            acumulado = 0
+            for limite, cantidad in zip(LIMITES_LATENCIA + ('+Inf',), operacion.cubetas):
+                acumulado += cantidad
+                cubetas[str(limite)] = acumulado
+            operaciones[nombre] = {
+                'cantidad': operacion.cantidad,
+                'segundos': operacion.segundos,
+                'promedio': operacion.segundos / operacion.cantidad,
+                'p50': operacion.percentil(0.5),
+                'p95': operacion.percentil(0.95),
+                'maximo': operacion.maximo,
+                'catalogo': operacion.catalogo,
+                'cubetas': cubetas,
+            }
+        return {'activas': _activas, 'operaciones': operaciones, 'bytes': dict(_bytes)}
+
+
+def exportar_json():
+    """
+    Returns:
+        str: Métricas en JSON (ver resumen).
+    """
+    return json.dumps(resumen(), ensure_ascii=False, indent=2)
+
+
+def exportar_prometheus():
+    """
+    Returns:
+        str: Métricas en el formato de texto de Prometheus (histograma de latencia,
+            llamadas, tamaño del catálogo y contadores de bytes).
+    """
+    datos = resumen()
+    latencia = f"{PREFIJO_PROMETHEUS}_operacion_segundos"
+    catalogo = f"{PREFIJO_PROMETHEUS}_catalogo_productos"
+
+    lineas = [
+        f"# HELP {latencia} Latencia de las operaciones del inventario.",
+        f"# TYPE {latencia} histogram",
+    ]
+    for nombre, operacion in datos['operaciones'].items():
+        for limite, cantidad in operacion['cubetas'].items():
+            lineas.append(f'{latencia}_bucket{{operacion="{nombre}",le="{limite}"}} {cantidad}')
+        lineas.append(f'{latencia}_sum{{operacion="{nombre}"}} {operacion["segundos"]!r}')
+        lineas.append(f'{latencia}_count{{operacion="{nombre}"}} {operacion["cantidad"]}')
+
+    lineas += [
+        f"# HELP {catalogo} Productos del catálogo en la última llamada de la operación.",
+        f"# TYPE {catalogo} gauge",
+    ]
+    for nombre, operacion in datos['operaciones'].items():
+        if operacion['catalogo'] is not None:
+            lineas.append(f'{catalogo}{{operacion="{nombre}"}} {operacion["catalogo"]}')
+
+    for tipo, cantidad in datos['bytes'].items():
+        contador = f"{PREFIJO_PROMETHEUS}_bytes_{tipo}_total"
+        lineas += [
+            f"# HELP {contador} Bytes {tipo} por la carga y el guardado del inventario.",
+            f"# TYPE {contador} counter",
+            f"{contador} {cantidad}",
+        ]
+    return '\n'.join(lineas) + '\n'
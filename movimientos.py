@@ -0,0 +1,561 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+
+# Motivo de cada movimiento (se guarda también su código en el índice)
+MOTIVO_INICIAL = 'inicial'      # Stock que ya tenía un producto antes de su primer movimiento
+MOTIVO_REGISTRO = 'registro'    # Stock con el que se registró el producto
+MOTIVO_AJUSTE = 'ajuste'        # Cambio de stock (menú, lote o API)
+MOTIVO_BAJA = 'baja'            # Eliminación del producto (deja su stock en 0)
+MOTIVOS = (MOTIVO_INICIAL, MOTIVO_REGISTRO, MOTIVO_AJUSTE, MOTIVO_BAJA)
+
+# Cada cuántos registros nuevos se guarda un checkpoint del índice
+REGISTROS_POR_CHECKPOINT = 10000
+
+# Cada cuántos registros se guarda una marca (momento, posición) para recorrer rangos de fechas
+REGISTROS_POR_MARCA = 256
+
+VERSION_CHECKPOINT = 2
+
+# Tipos de las columnas del índice de cada SKU (momentos, acumulados, posiciones, motivos)
+TIPOS_COLUMNAS = ('d', 'q', 'q', 'b')
+BYTES_POR_ENTRADA = sum(array(tipo).itemsize for tipo in TIPOS_COLUMNAS)
+BYTES_POR_MARCA = array('d').itemsize + array('q').itemsize
+
+
+# ===================================================
+# FUNCIONES AUXILIARES
+# ===================================================
+
+def leer_fecha(texto):
+    """
+    Convierte una fecha ingresada por el usuario a un momento (segundos desde 1970).
+    Args:
+        texto (str): Fecha ISO en hora local ('2025-06-30' o '2025-06-30 18:45').
+    Returns:
+        float: Momento equivalente.
+    Raises:
+        ValueError: Si la fecha no tiene formato ISO.
+    """
+    try:
+        return datetime.fromisoformat(texto.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: '{texto}' (use AAAA-MM-DD o AAAA-MM-DD HH:MM)") from None
+
+
+def formatear_fecha(momento):
+    """
+    Args:
+        momento (float): Segundos desde 1970.
+    Returns:
+        str: Fecha en hora local ('2025-06-30 18:45:12').
+    """
+    return datetime.fromtimestamp(momento).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _tamano(ruta):
+    try:
+        return os.path.getsize(ruta)
+    except FileNotFoundError:
+        return None
+
+
+def _escribir_desde(f, columna, inicio):
+    # Sin copiar la columna cuando se escribe completa
+    (columna[inicio:] if inicio else columna).tofile(f)
+
+
+def _movimientos_de(operacion, stock_conocido):
+    """
+    Traduce una operación guardada del almacén a movimientos de stock.
+    Args:
+        operacion (dict): Operación del journal (registrar, stock o eliminar).
+        stock_conocido (int o None): Stock del SKU según el libro (None si no tiene movimientos).
+    Returns:
+        list: Tuplas (sku, delta, motivo).
+    """
+    tipo = operacion['op']
+
+    if tipo == 'registrar':
+        producto = operacion['producto']
+        return [(producto['sku'], producto['stock'], MOTIVO_REGISTRO)]
+
+    sku = operacion['sku']
+    if tipo == 'stock':
+        delta = operacion.get('delta', 0)
+        if not delta:
+            return []
+        movimientos = []
+        # Producto anterior al libro: primero su stock previo al cambio
+        if stock_conocido is None and operacion['stock'] != delta:
+            movimientos.append((sku, operacion['stock'] - delta, MOTIVO_INICIAL))
+        movimientos.append((sku, delta, MOTIVO_AJUSTE))
+        return movimientos
+
+    if tipo == 'eliminar':
+        stock = stock_conocido if stock_conocido is not None else operacion.get('stock', 0)
+        if stock_conocido is None and stock:
+            return [(sku, stock, MOTIVO_INICIAL), (sku, -stock, MOTIVO_BAJA)]
+        return [(sku, -stock, MOTIVO_BAJA)] if stock else []
+
+    # Precio, nombre y umbral no mueven stock
+    return []
+
+
+# ===================================================
+# LIBRO DE MOVIMIENTOS
+# ===================================================
+
+class LibroMovimientos:
+    """
+    Libro de movimientos de stock: archivo NDJSON de solo agregado, un movimiento por línea
+    ({"ts": ..., "sku": ..., "delta": ..., "motivo": ...}). El momento (ts) es el del
+    guardado en que el movimiento quedó persistido y nunca retrocede.
+
+    Índice en memoria por SKU, en arrays paralelos ordenados por momento:
+    momentos, stock acumulado (suma de deltas), posición de la línea en el archivo y
+    código del motivo. Así "stock de X en T" es un bisect y "movimientos de X entre
+    dos fechas" lee solo sus líneas (seek a cada posición), sin recorrer el libro.
+
+    El índice se guarda en un checkpoint cada REGISTROS_POR_CHECKPOINT registros;
+    al abrir el libro se carga el checkpoint y solo se releen las líneas posteriores.
+    El checkpoint es incremental: cada uno agrega al archivo solo las entradas nuevas
+    (un segmento con una cabecera JSON y las columnas en binario, ver _escribir_segmento).
+    Varias sesiones pueden escribir el libro: cada una se pone al día con las líneas
+    que agregaron las demás antes de escribir o consultar.
+    """
+
+    def __init__(self, ruta, ruta_checkpoint):
+        """
+        Args:
+            ruta (str): Archivo del libro (NDJSON).
+            ruta_checkpoint (str): Archivo del checkpoint del índice (segmentos binarios).
+        """
+        self.ruta = ruta
+        self.ruta_checkpoint = ruta_checkpoint
+        self._abierto = False
+        self._vaciar()
+
+    def _vaciar(self):
+        # SKU → (momentos, stock acumulado, posiciones, motivos)
+        self._por_sku = {}
+        # Marcas (momento, posición) cada REGISTROS_POR_MARCA registros del libro
+        self._marcas_momentos = array('d')
+        self._marcas_posiciones = array('q')
+        # Bytes del libro ya indexados, registros indexados y último momento
+        self._posicion = 0
+        self._registros = 0
+        self._ultimo_momento = 0.0
+        self._primera_linea = None
+        self._registros_checkpoint = 0
+        # Lo que cubre el checkpoint: posición del libro, marcas y, por SKU, desde qué
+        # entrada hay pendientes. Con tamaño None el próximo checkpoint se reescribe completo.
+        self._posicion_checkpoint = 0
+        self._marcas_checkpoint = 0
+        self._pendientes = {}
+        self._tamano_checkpoint = None
+
+    # ---------------------------------------------------
+    # Índice
+    # ---------------------------------------------------
+
+    def actualizar(self):
+        """
+        Pone el índice al día: carga el checkpoint (la primera vez) e indexa las
+        líneas que se agregaron después. Si se indexaron muchas, guarda un checkpoint.
+        """
+        if not self._abierto:
+            self._abierto = True
+            self._cargar_checkpoint()
+
+        try:
+            with open(self.ruta, 'rb') as f:
+                if f.seek(0, os.SEEK_END) < self._posicion:
+                    # El libro se truncó o se reemplazó: se reindexa desde el comienzo
+                    self._vaciar()
+                f.seek(self._posicion)
+                for linea in f:
+                    # Una última línea sin salto es una escritura en curso o cortada
+                    if not linea.endswith(b'\n'):
+                        break
+                    self._indexar_linea(linea, self._posicion)
+                    self._posicion += len(linea)
+        except FileNotFoundError:
+            # Sin libro (aún no se crea o se borró): el índice queda vacío
+            self._vaciar()
+            return
+
+        if self._registros - self._registros_checkpoint >= REGISTROS_POR_CHECKPOINT:
+            self.guardar_checkpoint()
+
+    def _indexar_linea(self, linea, posicion):
+        if self._primera_linea is None:
+            self._primera_linea = linea.decode('utf-8', errors='replace')
+        try:
+            registro = json.loads(linea)
+            self._indexar(registro['sku'], registro['delta'], MOTIVOS.index(registro['motivo']),
+                float(registro['ts']), posicion)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            # Línea cortada por una escritura interrumpida: se omite
+            pass
+
+    def _indexar(self, sku, delta, motivo, momento, posicion):
+        entrada = self._por_sku.get(sku)
+        if entrada is None:
+            entrada = self._por_sku[sku] = tuple(array(tipo) for tipo in TIPOS_COLUMNAS)
+        momentos, acumulados, posiciones, motivos = entrada
+        if sku not in self._pendientes:
+            self._pendientes[sku] = len(momentos)
+        momentos.append(momento)
+        acumulados.append((acumulados[-1] if acumulados else 0) + delta)
+        posiciones.append(posicion)
+        motivos.append(motivo)
+
+        if self._registros % REGISTROS_POR_MARCA == 0:
+            self._marcas_momentos.append(momento)
+            self._marcas_posiciones.append(posicion)
+        self._registros += 1
+        self._ultimo_momento = max(self._ultimo_momento, momento)
+
+    # ---------------------------------------------------
+    # Checkpoints
+    # ---------------------------------------------------
+
+    def _cargar_checkpoint(self):
+        """
+        Carga el índice guardado, segmento por segmento. Se descarta (y se reconstruye
+        desde el libro) si no corresponde al libro actual: el libro es más corto o empieza
+        distinto. Un segmento incompleto (escritura cortada) y los siguientes se ignoran.
+        """
+        por_sku = {}
+        marcas_momentos = array('d')
+        marcas_posiciones = array('q')
+        posicion = registros = 0
+        ultimo_momento = 0.0
+        try:
+            with open(self.ruta, 'rb') as f:
+                primera_linea = f.readline().decode('utf-8', errors='replace')
+                tamano_libro = f.seek(0, os.SEEK_END)
+            with open(self.ruta_checkpoint, 'rb') as f:
+                tamano = f.seek(0, os.SEEK_END)
+                f.seek(0)
+                cabecera = json.loads(f.readline())
+                if (cabecera.get('version') != VERSION_CHECKPOINT or cabecera['orden'] != sys.byteorder
+                        or cabecera['primera_linea'] != primera_linea):
+                    return
+                valido = f.tell()
+
+                while True:
+                    linea = f.readline()
+                    if not linea.endswith(b'\n'):
+                        break
+                    try:
+                        segmento = json.loads(linea)
+                    except json.JSONDecodeError:
+                        break
+                    skus = segmento['skus']
+                    cantidad_marcas = segmento['marcas']
+                    bytes_segmento = (cantidad_marcas * BYTES_POR_MARCA
+                        + sum(cantidad for _, cantidad in skus) * BYTES_POR_ENTRADA)
+                    if (segmento['desde'] != posicion or segmento['posicion'] > tamano_libro
+                            or tamano - f.tell() < bytes_segmento):
+                        break
+
+                    marcas_momentos.fromfile(f, cantidad_marcas)
+                    marcas_posiciones.fromfile(f, cantidad_marcas)
+                    for sku, cantidad in skus:
+                        entrada = por_sku.get(sku)
+                        if entrada is None:
+                            entrada = por_sku[sku] = tuple(array(tipo) for tipo in TIPOS_COLUMNAS)
+                        for columna in entrada:
+                            columna.fromfile(f, cantidad)
+
+                    posicion = segmento['posicion']
+                    registros = segmento['registros']
+                    ultimo_momento = segmento['ultimo_momento']
+                    valido = f.tell()
+        except (FileNotFoundError, EOFError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return
+
+        self._por_sku = por_sku
+        self._marcas_momentos = marcas_momentos
+        self._marcas_posiciones = marcas_posiciones
+        self._posicion = self._posicion_checkpoint = posicion
+        self._registros = self._registros_checkpoint = registros
+        self._marcas_checkpoint = len(marcas_momentos)
+        self._ultimo_momento = ultimo_momento
+        self._primera_linea = cabecera['primera_linea'] if posicion else None
+        self._pendientes = {}
+        # Lo que sigue a la parte válida se sobrescribe en el próximo checkpoint
+        self._tamano_checkpoint = valido if valido == tamano else None
+
+    def guardar_checkpoint(self):
+        """
+        Guarda en el checkpoint las entradas del índice indexadas desde el anterior.
+        Si el archivo cambió desde que esta sesión lo leyó o escribió (otra sesión
+        guardó uno, o el libro se reindexó), se reescribe completo (escritura atómica).
+        Un checkpoint que no se puede escribir no es un error: solo alarga la próxima carga.
+        """
+        try:
+            if self._tamano_checkpoint is not None and self._tamano_checkpoint == _tamano(self.ruta_checkpoint):
+                with open(self.ruta_checkpoint, 'ab') as f:
+                    self._escribir_segmento(f, self._pendientes, self._marcas_checkpoint, self._posicion_checkpoint)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    tamano = f.tell()
+            else:
+                tamano = self._reescribir_checkpoint()
+        except OSError:
+            # Un segmento a medio escribir se descarta al cargar; el próximo reescribe todo
+            self._tamano_checkpoint = None
+            return
+
+        self._tamano_checkpoint = tamano
+        self._registros_checkpoint = self._registros
+        self._posicion_checkpoint = self._posicion
+        self._marcas_checkpoint = len(self._marcas_momentos)
+        self._pendientes = {}
+
+    def _reescribir_checkpoint(self):
+        """
+        Escribe el checkpoint completo (cabecera y un segmento con todo el índice).
+        Returns:
+            int: Tamaño del archivo escrito.
+        """
+        directorio = os.path.dirname(self.ruta_checkpoint)
+        descriptor, ruta_temporal = tempfile.mkstemp(prefix='.movimientos-', suffix='.tmp', dir=directorio)
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                cabecera = {'version': VERSION_CHECKPOINT, 'orden': sys.byteorder, 'primera_linea': self._primera_linea}
+                f.write((json.dumps(cabecera, ensure_ascii=False) + '\n').encode('utf-8'))
+                self._escribir_segmento(f, dict.fromkeys(self._por_sku, 0), 0, 0)
+                f.flush()
+                os.fsync(f.fileno())
+                tamano = f.tell()
+            os.replace(ruta_temporal, self.ruta_checkpoint)
+        except BaseException:
+            os.remove(ruta_temporal)
+            raise
+        return tamano
+
+    def _escribir_segmento(self, f, desde_entrada, desde_marca, desde_posicion):
+        """
+        Escribe un segmento del checkpoint: una línea JSON con lo que cubre (posiciones
+        del libro, registros, SKUs y cantidad de entradas de cada uno) seguida de las
+        columnas en binario (array.tofile): marcas y, por SKU, sus cuatro columnas.
+        Args:
+            f (file): Archivo binario, posicionado al final.
+            desde_entrada (dict): SKU → primera entrada de sus columnas a escribir.
+            desde_marca (int): Primera marca a escribir.
+            desde_posicion (int): Posición del libro donde empieza el segmento.
+        """
+        skus = [(sku, len(self._por_sku[sku][0]) - inicio) for sku, inicio in desde_entrada.items()]
+        segmento = {
+            'desde': desde_posicion,
+            'posicion': self._posicion,
+            'registros': self._registros,
+            'ultimo_momento': self._ultimo_momento,
+            'marcas': len(self._marcas_momentos) - desde_marca,
+            'skus': skus,
+        }
+        f.write((json.dumps(segmento, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8'))
+        for columna in (self._marcas_momentos, self._marcas_posiciones):
+            _escribir_desde(f, columna, desde_marca)
+        for sku, _ in skus:
+            inicio = desde_entrada[sku]
+            for columna in self._por_sku[sku]:
+                _escribir_desde(f, columna, inicio)
+
+    # ---------------------------------------------------
+    # Escritura
+    # ---------------------------------------------------
+
+    def registrar(self, cambios):
+        """
+        Agrega al libro los movimientos de stock de operaciones ya guardadas.
+        Debe llamarse con el bloqueo entre procesos tomado.
+        Args:
+            cambios (list): Operaciones persistidas (registrar, stock, eliminar, ...).
+        Returns:
+            int: Cantidad de movimientos agregados.
+        """
+        self.actualizar()
+
+        # El momento nunca retrocede (aunque el reloj del sistema lo haga)
+        momento = max(time.time(), self._ultimo_momento)
+        movimientos = []
+        stock_pendiente = {}
+        for operacion in cambios:
+            sku = operacion['producto']['sku'] if operacion['op'] == 'registrar' else operacion.get('sku')
+            stock = stock_pendiente[sku] if sku in stock_pendiente else self._stock_indexado(sku)
+            for _, delta, motivo in _movimientos_de(operacion, stock):
+                movimientos.append((sku, delta, motivo))
+                stock = (stock or 0) + delta
+            stock_pendiente[sku] = stock
+        if not movimientos:
+            return 0
+
+        lineas = [
+            (json.dumps({'ts': momento, 'sku': sku, 'delta': delta, 'motivo': motivo},
+                ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            for sku, delta, motivo in movimientos
+        ]
+        with open(self.ruta, 'ab') as f:
+            posicion = f.seek(0, os.SEEK_END)
+            # Si una escritura anterior quedó cortada, el movimiento empieza en otra línea
+            if posicion > self._posicion:
+                f.write(b'\n')
+                posicion += 1
+            f.writelines(lineas)
+            f.flush()
+            os.fsync(f.fileno())
+
+        for linea, (sku, delta, motivo) in zip(lineas, movimientos):
+            if self._primera_linea is None:
+                self._primera_linea = linea.decode('utf-8')
+            self._indexar(sku, delta, MOTIVOS.index(motivo), momento, posicion)
+            posicion += len(linea)
+        self._posicion = posicion
+
+        if self._registros - self._registros_checkpoint >= REGISTROS_POR_CHECKPOINT:
+            self.guardar_checkpoint()
+        return len(movimientos)
+
+    # ---------------------------------------------------
+    # Consultas
+    # ---------------------------------------------------
+
+    def stock_actual(self, sku):
+        """
+        Returns:
+            int o None: Stock del SKU según el libro (None si no tiene movimientos).
+        """
+        self.actualizar()
+        return self._stock_indexado(sku)
+
+    def _stock_indexado(self, sku):
+        entrada = self._por_sku.get(sku)
+        return entrada[1][-1] if entrada else None
+
+    def stock_en(self, sku, momento):
+        """
+        Stock que tenía un producto en un momento dado.
+        Args:
+            sku (str): Código SKU.
+            momento (float): Segundos desde 1970.
+        Returns:
+            int o None: Stock en ese momento (None si aún no tenía movimientos).
+        """
+        self.actualizar()
+        entrada = self._por_sku.get(sku)
+        if entrada is None:
+            return None
+        indice = bisect_right(entrada[0], momento)
+        return entrada[1][indice - 1] if indice else None
+
+    def movimientos(self, sku, desde=None, hasta=None):
+        """
+        Movimientos de un producto en un rango de fechas (lee solo sus líneas).
+        Args:
+            sku (str): Código SKU.
+            desde (float): Momento inicial, incluido (None: desde el comienzo).
+            hasta (float): Momento final, incluido (None: hasta el final).
+        Returns:
+            list: Diccionarios ts, sku, delta, motivo y stock (resultante), en orden.
+        """
+        self.actualizar()
+        entrada = self._por_sku.get(sku)
+        if entrada is None:
+            return []
+        momentos, acumulados, posiciones, _ = entrada
+        inicio = 0 if desde is None else bisect_left(momentos, desde)
+        fin = len(momentos) if hasta is None else bisect_right(momentos, hasta)
+
+        resultado = []
+        with open(self.ruta, 'rb') as f:
+            for indice in range(inicio, fin):
+                f.seek(posiciones[indice])
+                registro = json.loads(f.readline())
+                registro['stock'] = acumulados[indice]
+                resultado.append(registro)
+        return resultado
+
+    def movimientos_entre(self, desde=None, hasta=None):
+        """
+        Movimientos de todos los productos en un rango de fechas. Empieza a leer
+        en la marca anterior a 'desde' y se detiene al pasar 'hasta'.
+        Args:
+            desde (float): Momento inicial, incluido (None: desde el comienzo).
+            hasta (float): Momento final, incluido (None: hasta el final).
+        Yields:
+            dict: Cada movimiento (ts, sku, delta, motivo), en orden.
+        """
+        self.actualizar()
+        posicion = 0
+        if desde is not None:
+            marca = bisect_left(self._marcas_momentos, desde)
+            posicion = self._marcas_posiciones[marca - 1] if marca else 0
+
+        try:
+            f = open(self.ruta, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(posicion)
+            while posicion < self._posicion:
+                linea = f.readline()
+                posicion += len(linea)
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                if hasta is not None and registro['ts'] > hasta:
+                    return
+                if desde is None or registro['ts'] >= desde:
+                    yield registro
+
+    def resumen(self, sku, desde=None, hasta=None):
+        """
+        Resumen de un producto en un rango de fechas, calculado solo con el índice.
+        Entradas y salidas cuentan los ajustes de stock (no el registro ni la baja).
+        Args:
+            sku (str): Código SKU.
+            desde (float): Momento inicial, incluido (None: desde el comienzo).
+            hasta (float): Momento final, incluido (None: hasta el final).
+        Returns:
+            dict: stock_inicial, entradas, salidas, stock_final y movimientos.
+        """
+        self.actualizar()
+        entrada = self._por_sku.get(sku)
+        if entrada is None:
+            return {'stock_inicial': None, 'entradas': 0, 'salidas': 0, 'stock_final': None, 'movimientos': 0}
+        momentos, acumulados, _, motivos = entrada
+        inicio = 0 if desde is None else bisect_left(momentos, desde)
+        fin = len(momentos) if hasta is None else bisect_right(momentos, hasta)
+
+        entradas = salidas = 0
+        ajuste = MOTIVOS.index(MOTIVO_AJUSTE)
+        for indice in range(inicio, fin):
+            if motivos[indice] == ajuste:
+                delta = acumulados[indice] - (acumulados[indice - 1] if indice else 0)
+                if delta > 0:
+                    entradas += delta
+                else:
+                    salidas -= delta
+
+        return {
+            'stock_inicial': acumulados[inicio - 1] if inicio else None,
+            'entradas': entradas,
+            'salidas': salidas,
+            'stock_final': acumulados[fin - 1] if fin else None,
+            'movimientos': fin - inicio,
+        }
@@ -1,17 +1,36 @@
+from itertools import chain
 from utils import (
     VERDE, ROJO, AMARILLO, AZUL, CYAN, NEGRITA, RESET,
     validar_numero, seleccionar_categoria, buscar_producto,
     seleccionar_de_lista, confirmar_accion, calcular_anchos_columnas,
-    formatear_precio
+    formatear_precio, obtener_umbral, LIMITE_RESULTADOS
 )
+from almacen import Almacen
+from alertas import RUTA_ALERTAS, filas_alertas, escribir_alertas
+from exportacion import exportar_inventario
+import metricas
+from estadisticas import calcular_estadisticas
+from tabla import TAMANO_PAGINA, generar_encabezado, generar_filas, generar_pie, escribir_lineas
 
+# Operaciones instrumentadas (ver metricas.py). En las operaciones interactivas se
+# mide solo el trabajo sobre el almacén, sin la espera de lo que ingresa el usuario.
+REGISTRO = metricas.instrumentar('registrar_producto')
+PREPARAR_VISTA = metricas.instrumentar('visualizar_inventario')
+PAGINA = metricas.instrumentar('mostrar_pagina')
+BUSQUEDA = metricas.instrumentar('buscar_producto')
+ACTUALIZACION = metricas.instrumentar('actualizar_stock')
+ELIMINACION = metricas.instrumentar('eliminar_producto')
+ALERTAS = metricas.instrumentar('productos_en_alerta')
 
-def registrar_producto(productos, skus_usados):
+# Productos en alerta que se muestran en pantalla (los más urgentes)
+ALERTAS_EN_PANTALLA = 20
+
+
+def registrar_producto(almacen):
     """
     Registra un producto nuevo en el inventario.
     Args:
-        productos (list): Lista de diccionarios de productos.
-        skus_usados (set): Conjunto de SKUs para validación de unicidad.
+        almacen (Almacen): Almacén de productos con sus índices.
     """
     print(f"\n{CYAN}{NEGRITA}{'='*60}{RESET}")
     print(f"{AZUL}{'REGISTRAR NUEVO PRODUCTO'.center(60)}{RESET}")
@@ -26,7 +45,7 @@ def registrar_producto(productos, skus_usados):
         return
     
     # Valida que el SKU no exista
-    if sku in skus_usados:
+    if sku in almacen.skus_usados:
         print(f"{ROJO}Error: El SKU '{sku}' ya existe en el inventario.{RESET}")
         return
     
@@ -56,9 +75,9 @@ def registrar_producto(productos, skus_usados):
         'stock': stock
     }
     
-    # Agrega a la lista y al conjunto
-    productos.append(nuevo_producto)
-    skus_usados.add(sku)
+    # Agrega al almacén (lista, set de SKUs e índices)
+    with REGISTRO.medir(almacen):
+        almacen.agregar(nuevo_producto)
     
     print(f"\n{VERDE}✓ Producto registrado exitosamente:{RESET}")
     print(f"  SKU: {sku}")
@@ -70,85 +89,124 @@ def registrar_producto(productos, skus_usados):
 
 def visualizar_inventario(productos):
     """
-    Muestra el inventario completo en formato de tabla ordenada.
+    Muestra el inventario en formato de tabla ordenada, paginada y con filtro por categoría.
     Args:
-        productos (list): Lista de diccionarios de productos.
+        productos (Almacen o list): Almacén o lista de diccionarios de productos.
     """
     if not productos:
         print(f"\n{AMARILLO}⚠ El inventario está vacío. No hay productos para mostrar.{RESET}")
         return
     
-    # Ordena productos por categoría y luego por nombre
-    productos_ordenados = sorted(productos, key=lambda p: (p['categoria'], p['nombre']))
-    
-    # Calcula anchos dinámicos de columnas
-    anchos = calcular_anchos_columnas(productos_ordenados)
-    
-    # Calcula ancho total de la tabla
-    ancho_total = (anchos['sku'] + anchos['nombre'] + anchos['categoria'] + anchos['precio'] + anchos['stock'] + anchos['total'] + 17)
-    
-    # Encabezado de la tabla
-    print(f"\n{CYAN}{NEGRITA}{'='*ancho_total}{RESET}")
-    print(f"{AMARILLO}{'INVENTARIO TECHSTORE'.center(ancho_total)}{RESET}")
-    print(f"{CYAN}{NEGRITA}{'='*ancho_total}{RESET}")
-    
-    # Encabezados de columnas
-    print(f"{VERDE}{'SKU'.ljust(anchos['sku'])} | "
-        f"{'NOMBRE'.ljust(anchos['nombre'])} | "
-        f"{'CATEGORÍA'.ljust(anchos['categoria'])} | "
-        f"{'PRECIO (CLP)'.rjust(anchos['precio'])} | "
-        f"{'STOCK'.rjust(anchos['stock'])} | "
-        f"{'TOTAL (CLP)'.rjust(anchos['total'])}{RESET}")
-    
-    print(f"{CYAN}{'-'*ancho_total}{RESET}")
-    
-    # Filas de productos
-    suma_total = 0
-    productos_sin_stock = 0
-    
-    for producto in productos_ordenados:
-        # Calcula precio total por producto (precio * stock)
-        precio_total = producto['precio'] * producto['stock']
-        suma_total += precio_total
+    with PREPARAR_VISTA.medir(productos):
+        # Una lista se indexa en un almacén para reutilizar el orden por categoría
+        almacen = productos if hasattr(productos, 'productos_ordenados') else Almacen(productos)
         
-        # Cuenta productos sin stock
-        if producto['stock'] == 0:
-            productos_sin_stock += 1
+        # Productos ordenados por categoría y luego por nombre (orden en caché del almacén)
+        productos_ordenados = almacen.productos_ordenados()
         
-        # Formatea y alinea cada columna
-        sku_truncado = producto['sku'][:anchos['sku']]
-        nombre_truncado = producto['nombre'][:anchos['nombre']]
-        categoria_truncada = producto['categoria'][:anchos['categoria']]
+        # Totales mantenidos por el almacén en cada cambio (sin recorrer los productos)
+        suma_total, productos_sin_stock = almacen.totales()
+    
+    # Rango visible [inicio, fin) dentro de la lista ordenada
+    categoria = None
+    inicio, fin = 0, len(productos_ordenados)
+    pagina = 0
+    
+    while True:
+        total_paginas = max(1, -(-(fin - inicio) // TAMANO_PAGINA))
+        desde = inicio + pagina * TAMANO_PAGINA
+        productos_pagina = productos_ordenados[desde:min(desde + TAMANO_PAGINA, fin)]
         
-        print(f"{sku_truncado.ljust(anchos['sku'])} | "
-            f"{nombre_truncado.ljust(anchos['nombre'])} | "
-            f"{categoria_truncada.ljust(anchos['categoria'])} | "
-            f"{formatear_precio(producto['precio']).rjust(anchos['precio'])} | "
-            f"{str(producto['stock']).rjust(anchos['stock'])} | "
-            f"{formatear_precio(precio_total).rjust(anchos['total'])}")
-    
-    # Pie de tabla con totales
-    print(f"{CYAN}{'='*ancho_total}{RESET}")
-    print(f"{AMARILLO}{'VALOR TOTAL DEL INVENTARIO:'.ljust(ancho_total - anchos['total'] - 3)}"
-        f"{formatear_precio(suma_total).rjust(anchos['total'])}{RESET}")
-    print(f"{CYAN}{'='*ancho_total}{RESET}")
-    
-    # Estadísticas adicionales
-    print(f"\n{VERDE}Total de productos: {len(productos)} | "
-        f"Productos sin stock: {productos_sin_stock}{RESET}\n")
+        with PAGINA.medir(almacen):
+            # Anchos dinámicos de columnas (el almacén los mantiene en cada cambio)
+            anchos = calcular_anchos_columnas(almacen)
+            
+            titulo = 'INVENTARIO TECHSTORE' if categoria is None else f'INVENTARIO TECHSTORE • {categoria}'
+            
+            # Encabezado, filas y pie se escriben en bloques
+            escribir_lineas(chain(
+                generar_encabezado(anchos, titulo),
+                generar_filas(productos_pagina, anchos),
+                generar_pie(anchos, suma_total)
+            ))
+        
+        # Estadísticas adicionales
+        print(f"\n{VERDE}Total de productos: {fin - inicio} | "
+            f"Productos sin stock: {productos_sin_stock}{RESET}")
+        print(f"{CYAN}Página {pagina + 1} de {total_paginas}{RESET}\n")
+        
+        # Navegación
+        print(f"{AZUL}[S] Siguiente | [A] Anterior | [N°] Ir a página | "
+            f"[C] Filtrar categoría | [T] Todas | [X] Exportar | [Enter] Volver: {RESET}", end='')
+        opcion = input().strip().upper()
+        
+        if opcion == "":
+            return
+        elif opcion == "S":
+            if pagina + 1 < total_paginas:
+                pagina += 1
+            else:
+                print(f"{AMARILLO}⚠ Ya está en la última página.{RESET}")
+        elif opcion == "A":
+            if pagina > 0:
+                pagina -= 1
+            else:
+                print(f"{AMARILLO}⚠ Ya está en la primera página.{RESET}")
+        elif opcion.isdigit():
+            if 1 <= int(opcion) <= total_paginas:
+                pagina = int(opcion) - 1
+            else:
+                print(f"{ROJO}Error: Página inválida. Seleccione entre 1 y {total_paginas}.{RESET}")
+        elif opcion == "C":
+            nueva_categoria = seleccionar_categoria()
+            nuevo_inicio, nuevo_fin = almacen.rango_categoria(nueva_categoria)
+            if nuevo_inicio == nuevo_fin:
+                print(f"{AMARILLO}⚠ No hay productos en la categoría {nueva_categoria}.{RESET}")
+                continue
+            categoria, inicio, fin, pagina = nueva_categoria, nuevo_inicio, nuevo_fin, 0
+            suma_total, productos_sin_stock = almacen.totales(categoria)
+        elif opcion == "T":
+            categoria, inicio, fin, pagina = None, 0, len(productos_ordenados), 0
+            suma_total, productos_sin_stock = almacen.totales()
+        elif opcion == "X":
+            _exportar_vista(almacen, categoria)
+        else:
+            print(f"{ROJO}Error: Opción inválida.{RESET}")
 
 
-def actualizar_stock(productos):
+def _exportar_vista(almacen, categoria):
+    """
+    Exporta los productos de la vista actual (completa o filtrada por categoría)
+    sin colores ni columnas truncadas. El formato se deduce de la extensión.
+    Args:
+        almacen (Almacen): Almacén de productos.
+        categoria (str): Categoría del filtro actual (None: todas).
+    """
+    ruta_por_defecto = 'inventario.csv' if categoria is None else f"inventario_{categoria.lower()}.csv"
+    print(f"{AZUL}Archivo de destino (.csv, .ndjson o .txt) (Enter: {ruta_por_defecto}): {RESET}", end='')
+    ruta = input().strip() or ruta_por_defecto
+    try:
+        cantidad = exportar_inventario(almacen, ruta, categoria=categoria)
+    except ValueError as e:
+        print(f"{ROJO}✗ Error: {e}{RESET}")
+        return
+    except OSError as e:
+        print(f"{ROJO}✗ Error al exportar el inventario: {e}{RESET}")
+        return
+    print(f"{VERDE}✓ {cantidad} productos exportados en {ruta}{RESET}")
+
+
+def actualizar_stock(almacen):
     """
     Actualiza la cantidad en stock de un producto existente.
     Args:
-        productos (list): Lista de diccionarios de productos.
+        almacen (Almacen): Almacén de productos con sus índices.
     """
     print(f"\n{CYAN}{NEGRITA}{'='*60}{RESET}")
     print(f"{AZUL}{'ACTUALIZAR STOCK DE PRODUCTO'.center(60)}{RESET}")
     print(f"{CYAN}{NEGRITA}{'='*60}{RESET}\n")
     
-    if not productos:
+    if not almacen:
         print(f"{AMARILLO}⚠ El inventario está vacío. No hay productos para actualizar.{RESET}")
         return
     
@@ -160,8 +218,9 @@ def actualizar_stock(productos):
         print(f"{ROJO}✗ Error: Debe ingresar un término de búsqueda.{RESET}")
         return
     
-    # Buscar producto con búsqueda flexible
-    coincidencias = buscar_producto(productos, busqueda)
+    # Buscar producto con búsqueda flexible (usa los índices del almacén)
+    with BUSQUEDA.medir(almacen):
+        coincidencias = buscar_producto(almacen, busqueda, LIMITE_RESULTADOS)
     
     if not coincidencias:
         print(f"{AMARILLO}⚠ No se encontraron productos con '{busqueda}'.{RESET}")
@@ -186,25 +245,25 @@ def actualizar_stock(productos):
     # Solicitar nuevo stock
     nuevo_stock = validar_numero("\nIngrese el nuevo stock: ", int, permitir_cero=True)
     
-    # Actualizar el stock en el diccionario
-    producto['stock'] = nuevo_stock
+    # Actualizar el stock a través del almacén
+    with ACTUALIZACION.medir(almacen):
+        almacen.actualizar_stock(producto['sku'], nuevo_stock)
     
     print(f"\n{VERDE}✓ Stock actualizado: {producto['nombre']} - "
         f"Nuevo stock: {nuevo_stock} unidades{RESET}")
 
 
-def eliminar_producto(productos, skus_usados):
+def eliminar_producto(almacen):
     """
     Elimina un producto del inventario.    
     Args:
-        productos (list): Lista de diccionarios de productos.
-        skus_usados (set): Conjunto de SKUs para validación.
+        almacen (Almacen): Almacén de productos con sus índices.
     """
     print(f"\n{CYAN}{NEGRITA}{'='*60}{RESET}")
     print(f"{AZUL}{'ELIMINAR PRODUCTO'.center(60)}{RESET}")
     print(f"{CYAN}{NEGRITA}{'='*60}{RESET}\n")
     
-    if not productos:
+    if not almacen:
         print(f"{AMARILLO}⚠ El inventario está vacío. No hay productos para eliminar.{RESET}")
         return
     
@@ -216,7 +275,8 @@ def eliminar_producto(productos, skus_usados):
         print(f"{ROJO}Error: Debe ingresar un término de búsqueda.{RESET}")
         return
     
-    coincidencias = buscar_producto(productos, busqueda)
+    with BUSQUEDA.medir(almacen):
+        coincidencias = buscar_producto(almacen, busqueda, LIMITE_RESULTADOS)
     
     if not coincidencias:
         print(f"{AMARILLO}⚠ No se encontraron productos con '{busqueda}'.{RESET}")
@@ -244,10 +304,290 @@ def eliminar_producto(productos, skus_usados):
     if confirmar_accion("\n¿Está seguro que desea eliminar este producto?"):
         nombre_eliminado = producto['nombre']
         
-        # Elimina de la lista y del conjunto
-        productos.remove(producto)
-        skus_usados.discard(producto['sku'])
+        # Elimina de la lista, del conjunto y de los índices
+        with ELIMINACION.medir(almacen):
+            almacen.eliminar(producto['sku'])
         
         print(f"\n{VERDE}✓ Producto '{nombre_eliminado}' eliminado exitosamente.{RESET}")
     else:
         print(f"\n{AMARILLO}⚠ Operación cancelada. El producto no fue eliminado.{RESET}")
+
+
+@metricas.instrumentar('mostrar_estadisticas')
+def mostrar_estadisticas(almacen):
+    """
+    Muestra la valorización del inventario y las estadísticas por categoría.
+    Args:
+        almacen (Almacen): Almacén de productos.
+    """
+    print(f"\n{CYAN}{NEGRITA}{'='*78}{RESET}")
+    print(f"{AZUL}{'ESTADÍSTICAS DEL INVENTARIO'.center(78)}{RESET}")
+    print(f"{CYAN}{NEGRITA}{'='*78}{RESET}")
+    
+    if not almacen:
+        print(f"{AMARILLO}⚠ El inventario está vacío. No hay estadísticas para mostrar.{RESET}")
+        return
+    
+    estadisticas = calcular_estadisticas(almacen)
+    
+    # Encabezados de columnas
+    print(f"{VERDE}{'CATEGORÍA'.ljust(12)} | {'PROD.'.rjust(6)} | {'UNIDADES'.rjust(8)} | "
+        f"{'PRECIO MÍN'.rjust(11)} | {'PRECIO MÁX'.rjust(11)} | {'PROMEDIO'.rjust(11)}{RESET}")
+    print(f"{CYAN}{'-'*78}{RESET}")
+    
+    for categoria, datos in estadisticas['categorias'].items():
+        print(f"{categoria[:12].ljust(12)} | {str(datos['productos']).rjust(6)} | "
+            f"{str(datos['unidades']).rjust(8)} | "
+            f"{formatear_precio(datos['precio_min']).rjust(11)} | "
+            f"{formatear_precio(datos['precio_max']).rjust(11)} | "
+            f"{formatear_precio(round(datos['precio_promedio'])).rjust(11)}")
+        print(f"{' '*12}   Valor: {formatear_precio(datos['valor_total'])} | "
+            f"Sin stock: {datos['sin_stock']}")
+    
+    # Resumen general
+    general = estadisticas['general']
+    print(f"{CYAN}{'='*78}{RESET}")
+    print(f"{AMARILLO}VALOR TOTAL DEL INVENTARIO: {formatear_precio(general['valor_total'])}{RESET}")
+    print(f"{VERDE}Total de productos: {general['productos']} | "
+        f"Unidades: {general['unidades']} | "
+        f"Productos sin stock: {general['sin_stock']}{RESET}\n")
+
+
+def mostrar_alertas(almacen):
+    """
+    Muestra los productos con stock en o bajo su punto de reorden, del más
+    urgente al menos urgente. Permite ajustar el umbral de un producto y
+    exportar el listado completo en CSV.
+    Args:
+        almacen (Almacen): Almacén de productos.
+    """
+    while True:
+        print(f"\n{CYAN}{NEGRITA}{'='*78}{RESET}")
+        print(f"{AZUL}{'ALERTAS DE STOCK'.center(78)}{RESET}")
+        print(f"{CYAN}{NEGRITA}{'='*78}{RESET}")
+        
+        if not almacen:
+            print(f"{AMARILLO}⚠ El inventario está vacío. No hay alertas para mostrar.{RESET}")
+            return
+        
+        with ALERTAS.medir(almacen):
+            productos = almacen.productos_en_alerta(ALERTAS_EN_PANTALLA + 1)
+        
+        if productos:
+            print(f"{VERDE}{'SKU'.ljust(10)} | {'NOMBRE'.ljust(28)} | {'CATEGORÍA'.ljust(12)} | "
+                f"{'STOCK'.rjust(6)} | {'UMBRAL'.rjust(8)}{RESET}")
+            print(f"{CYAN}{'-'*78}{RESET}")
+            for sku, nombre, categoria, stock, umbral, origen, _ in filas_alertas(productos[:ALERTAS_EN_PANTALLA]):
+                # Los umbrales heredados de la categoría se marcan con '*'
+                marca = '*' if origen == 'categoria' else ' '
+                color = ROJO if stock == 0 else AMARILLO
+                print(f"{color}{sku[:10].ljust(10)} | {nombre[:28].ljust(28)} | {categoria[:12].ljust(12)} | "
+                    f"{str(stock).rjust(6)} | {(str(umbral) + marca).rjust(8)}{RESET}")
+            print(f"{CYAN}{'-'*78}{RESET}")
+            if len(productos) > ALERTAS_EN_PANTALLA:
+                print(f"Se muestran los {ALERTAS_EN_PANTALLA} más urgentes. Exporte el listado para verlos todos.")
+            print(f"* Umbral de la categoría")
+        else:
+            print(f"{VERDE}✓ No hay productos con stock bajo.{RESET}")
+        
+        print(f"\n{AZUL}[U] Ajustar umbral de un producto | [E] Exportar CSV | [Enter] Volver: {RESET}", end='')
+        opcion = input().strip().upper()
+        
+        if opcion == "":
+            return
+        elif opcion == "U":
+            _ajustar_umbral(almacen)
+        elif opcion == "E":
+            _exportar_alertas(almacen)
+        else:
+            print(f"{ROJO}Error: Opción inválida.{RESET}")
+
+
+def _ajustar_umbral(almacen):
+    """
+    Cambia el punto de reorden propio de un producto (o lo devuelve al de su categoría).
+    Args:
+        almacen (Almacen): Almacén de productos.
+    """
+    print(f"{AZUL}Ingrese nombre o SKU del producto: {RESET}", end='')
+    busqueda = input().strip()
+    
+    if not busqueda:
+        print(f"{ROJO}✗ Error: Debe ingresar un término de búsqueda.{RESET}")
+        return
+    
+    with BUSQUEDA.medir(almacen):
+        coincidencias = buscar_producto(almacen, busqueda, LIMITE_RESULTADOS)
+    
+    if not coincidencias:
+        print(f"{AMARILLO}⚠ No se encontraron productos con '{busqueda}'.{RESET}")
+        return
+    
+    if len(coincidencias) > 1:
+        indice = seleccionar_de_lista(coincidencias, "Se encontraron varios productos")
+        if indice is None:
+            print(f"{AMARILLO}⚠ Operación cancelada.{RESET}")
+            return
+        producto = coincidencias[indice]
+    else:
+        producto = coincidencias[0]
+    
+    origen = "de la categoría" if producto.get('umbral') is None else "propio"
+    print(f"\n{CYAN}Producto seleccionado:{RESET}")
+    print(f"  SKU: {producto['sku']}")
+    print(f"  Nombre: {producto['nombre']}")
+    print(f"  Stock actual: {producto['stock']} unidades")
+    print(f"  Umbral actual: {obtener_umbral(producto)} ({origen})")
+    
+    while True:
+        print(f"{AZUL}Nuevo umbral (Enter: usar el de la categoría): {RESET}", end='')
+        texto = input().strip()
+        if not texto:
+            umbral = None
+            break
+        try:
+            umbral = int(texto)
+        except ValueError:
+            print(f"{ROJO}Error: Debe ingresar un número entero válido.{RESET}")
+            continue
+        if umbral < 0:
+            print(f"{ROJO}Error: El umbral debe ser mayor o igual a 0.{RESET}")
+            continue
+        break
+    
+    almacen.actualizar_umbral(producto['sku'], umbral)
+    print(f"\n{VERDE}✓ Umbral actualizado: {producto['nombre']} - "
+        f"Nuevo umbral: {obtener_umbral(producto)}{RESET}")
+
+
+def _exportar_alertas(almacen):
+    """
+    Escribe todos los productos en alerta en el archivo CSV que indique el usuario.
+    Args:
+        almacen (Almacen): Almacén de productos.
+    """
+    print(f"{AZUL}Archivo de destino (Enter: {RUTA_ALERTAS}): {RESET}", end='')
+    ruta = input().strip() or RUTA_ALERTAS
+    try:
+        cantidad = escribir_alertas(ruta, almacen.productos_en_alerta())
+    except OSError as e:
+        print(f"{ROJO}✗ Error al exportar las alertas: {e}{RESET}")
+        return
+    print(f"{VERDE}✓ {cantidad} productos exportados en {ruta}{RESET}")
+
+
+def mostrar_diagnostico():
+    """
+    Muestra las métricas de rendimiento de las operaciones (llamadas, latencias,
+    tamaño del catálogo y bytes de carga/guardado). Permite activarlas, perfilar
+    la próxima llamada de una operación con cProfile y exportarlas en JSON o
+    en formato Prometheus.
+    """
+    while True:
+        print(f"\n{CYAN}{NEGRITA}{'='*78}{RESET}")
+        print(f"{AZUL}{'DIAGNÓSTICO DE RENDIMIENTO'.center(78)}{RESET}")
+        print(f"{CYAN}{NEGRITA}{'='*78}{RESET}")
+        
+        if metricas.activas():
+            print(f"{VERDE}Métricas: ACTIVAS{RESET}")
+        else:
+            print(f"{AMARILLO}Métricas: INACTIVAS (actívelas aquí o con TECHSTORE_METRICAS=1){RESET}")
+        
+        datos = metricas.resumen()
+        if datos['operaciones']:
+            print(f"{VERDE}{'OPERACIÓN'.ljust(22)} | {'LLAMADAS'.rjust(8)} | {'PROMEDIO'.rjust(10)} | "
+                f"{'P95'.rjust(10)} | {'MÁXIMO'.rjust(10)} | {'CATÁLOGO'.rjust(8)}{RESET}")
+            print(f"{CYAN}{'-'*78}{RESET}")
+            for nombre, operacion in datos['operaciones'].items():
+                catalogo = '-' if operacion['catalogo'] is None else str(operacion['catalogo'])
+                print(f"{nombre[:22].ljust(22)} | {str(operacion['cantidad']).rjust(8)} | "
+                    f"{_formatear_segundos(operacion['promedio']).rjust(10)} | "
+                    f"{_formatear_segundos(operacion['p95']).rjust(10)} | "
+                    f"{_formatear_segundos(operacion['maximo']).rjust(10)} | {catalogo.rjust(8)}")
+            print(f"{CYAN}{'-'*78}{RESET}")
+        else:
+            print(f"{AMARILLO}⚠ Aún no hay mediciones.{RESET}")
+        
+        print(f"Bytes leídos: {_formatear_bytes(datos['bytes']['leidos'])} | "
+            f"Bytes escritos: {_formatear_bytes(datos['bytes']['escritos'])}")
+        if metricas.perfil_pendiente():
+            print(f"{CYAN}Se perfilará la próxima llamada de '{metricas.perfil_pendiente()}'.{RESET}")
+        
+        print(f"\n{AZUL}[A] Activar/Desactivar | [P] Perfilar operación | [V] Ver perfiles | "
+            f"[J] Exportar JSON | [R] Exportar Prometheus | [L] Limpiar | [Enter] Volver: {RESET}", end='')
+        opcion = input().strip().upper()
+        
+        if opcion == "":
+            return
+        elif opcion == "A":
+            metricas.activar(not metricas.activas())
+        elif opcion == "P":
+            _seleccionar_perfil()
+        elif opcion == "V":
+            perfiles = metricas.obtener_perfiles()
+            if not perfiles:
+                print(f"{AMARILLO}⚠ No hay perfiles capturados. Use [P] y luego ejecute la operación.{RESET}")
+            for nombre, perfil in perfiles.items():
+                print(f"\n{CYAN}{NEGRITA}Perfil de '{nombre}':{RESET}")
+                print(perfil)
+        elif opcion == "J":
+            _exportar_metricas("metricas.json", metricas.exportar_json())
+        elif opcion == "R":
+            _exportar_metricas("metricas.prom", metricas.exportar_prometheus())
+        elif opcion == "L":
+            metricas.limpiar()
+            print(f"{VERDE}✓ Métricas reiniciadas.{RESET}")
+        else:
+            print(f"{ROJO}Error: Opción inválida.{RESET}")
+
+
+def _seleccionar_perfil():
+    """
+    Selecciona la operación cuya próxima llamada se perfila con cProfile.
+    """
+    nombres = metricas.operaciones_instrumentadas()
+    print(f"\n{CYAN}Operación a perfilar (próxima llamada):{RESET}")
+    for i, nombre in enumerate(nombres, 1):
+        print(f"  {i}. {nombre}")
+    print(f"  0. Cancelar")
+    
+    opcion = validar_numero(f"Seleccione una opción (0-{len(nombres)}): ", int, permitir_cero=True)
+    if opcion == 0:
+        return
+    if opcion > len(nombres):
+        print(f"{ROJO}Error: Opción inválida.{RESET}")
+        return
+    metricas.perfilar_siguiente(nombres[opcion - 1])
+    print(f"{VERDE}✓ Se perfilará la próxima llamada de '{nombres[opcion - 1]}'.{RESET}")
+
+
+def _exportar_metricas(ruta_por_defecto, contenido):
+    """
+    Escribe las métricas exportadas en el archivo que indique el usuario.
+    Args:
+        ruta_por_defecto (str): Archivo que se usa si el usuario no ingresa uno.
+        contenido (str): Métricas en el formato elegido.
+    """
+    print(f"{AZUL}Archivo de destino (Enter: {ruta_por_defecto}): {RESET}", end='')
+    ruta = input().strip() or ruta_por_defecto
+    try:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+    except OSError as e:
+        print(f"{ROJO}✗ Error al exportar las métricas: {e}{RESET}")
+        return
+    print(f"{VERDE}✓ Métricas exportadas en {ruta}{RESET}")
+
+
+def _formatear_segundos(segundos):
+    if segundos < 1:
+        return f"{segundos * 1000:.2f} ms"
+    return f"{segundos:.2f} s"
+
+
+def _formatear_bytes(cantidad):
+    for unidad in ('B', 'KB', 'MB'):
+        if cantidad < 1024:
+            return f"{cantidad:.0f} {unidad}" if unidad == 'B' else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:.1f} GB"
@@ -0,0 +1,94 @@
+import sys
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+CAMPOS = ('sku', 'nombre', 'categoria', 'precio', 'stock', 'version', 'umbral')
+
+# Campos de un producto sin umbral propio (usa el de su categoría y no se escribe en el JSON)
+CAMPOS_SIN_UMBRAL = CAMPOS[:-1]
+
+
+# ===================================================
+# PRODUCTO
+# ===================================================
+
+class Producto:
+    """
+    Representación compacta de un producto (sin diccionario por instancia).
+    Se accede igual que a un diccionario (producto['stock']) para ser compatible
+    con las operaciones existentes, y dict(producto) entrega el formato JSON.
+    Las categorías se internan: todos los productos comparten el mismo string.
+    La versión aumenta en cada modificación y permite detectar cambios
+    hechos por otra sesión sobre el mismo producto.
+    El umbral es el punto de reorden propio del producto (None: el de su categoría).
+    """
+    __slots__ = CAMPOS
+
+    def __init__(self, sku, nombre, categoria, precio, stock, version=0, umbral=None):
+        self.sku = sku
+        self.nombre = nombre
+        self.categoria = sys.intern(categoria)
+        self.precio = precio
+        self.stock = stock
+        self.version = version
+        self.umbral = umbral
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """
+        Crea un producto a partir de un diccionario (por ejemplo, leído del JSON).
+        Args:
+            datos (dict): Diccionario con las claves de CAMPOS ('version' y 'umbral' son opcionales).
+        Returns:
+            Producto: Producto creado.
+        Raises:
+            KeyError: Si falta alguna clave obligatoria.
+        """
+        return cls(datos['sku'], datos['nombre'], datos['categoria'], datos['precio'], datos['stock'],
+            datos.get('version', 0), datos.get('umbral'))
+
+    def copiar(self):
+        """
+        Crea una copia independiente del producto.
+        Returns:
+            Producto: Copia del producto.
+        """
+        return Producto(self.sku, self.nombre, self.categoria, self.precio, self.stock, self.version, self.umbral)
+
+    # ---------------------------------------------------
+    # Acceso tipo diccionario
+    # ---------------------------------------------------
+
+    def __getitem__(self, campo):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __setitem__(self, campo, valor):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        if campo == 'categoria':
+            valor = sys.intern(valor)
+        setattr(self, campo, valor)
+
+    def get(self, campo, defecto=None):
+        if campo not in CAMPOS:
+            return defecto
+        return getattr(self, campo)
+
+    def keys(self):
+        return CAMPOS if self.umbral is not None else CAMPOS_SIN_UMBRAL
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __eq__(self, otro):
+        if not isinstance(otro, Producto):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(otro, campo) for campo in CAMPOS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Producto({', '.join(f'{campo}={getattr(self, campo)!r}' for campo in CAMPOS)})"
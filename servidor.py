@@ -0,0 +1,429 @@
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, unquote
+import metricas
+from inventario import cargar_inventario, guardar_inventario, esperar_guardado
+from utils import VERDE, ROJO, CYAN, RESET, buscar_producto, validar_producto, validar_entero
+from tabla import TAMANO_PAGINA
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+HOST_POR_DEFECTO = '127.0.0.1'
+PUERTO_POR_DEFECTO = 8080
+
+# Segundos entre guardados en segundo plano (los cambios se agrupan en un solo guardado)
+INTERVALO_GUARDADO = 1.0
+
+# Segundos que una conexión puede quedar inactiva antes de cerrarse
+TIEMPO_INACTIVIDAD = 30
+
+# Límites de la petición
+TAMANO_MAXIMO_CUERPO = 64 * 1024
+TAMANO_MAXIMO_PAGINA = 1000
+LIMITE_BUSQUEDA = 50
+
+
+class ErrorHTTP(Exception):
+    """
+    Error que se responde al cliente con su código de estado.
+    """
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+# ===================================================
+# SERVIDOR
+# ===================================================
+
+class ServidorInventario:
+    """
+    API HTTP/JSON sobre el almacén en memoria.
+    Todo corre en el bucle de asyncio: las lecturas no esperan a nadie y se
+    atienden en paralelo con las demás conexiones; las modificaciones y el
+    guardado se serializan con un asyncio.Lock. Los cambios se guardan en
+    segundo plano cada INTERVALO_GUARDADO segundos (un guardado por grupo de cambios).
+
+    Rutas:
+        GET    /productos?categoria=&pagina=&tamano=   Lista paginada (orden categoría/nombre)
+        GET    /productos/{sku}                        Un producto
+        GET    /buscar?q=&limite=                      Búsqueda por SKU o nombre, por relevancia
+        POST   /productos                              Registra un producto
+        PATCH  /productos/{sku}/stock                  {"stock": n} o {"delta": n}
+        DELETE /productos/{sku}                        Elimina un producto
+        GET    /metricas?formato=                      Métricas en formato Prometheus (o json)
+    """
+
+    def __init__(self, almacen):
+        """
+        Args:
+            almacen (Almacen): Almacén de productos con sus índices.
+        """
+        self.almacen = almacen
+        self._bloqueo = asyncio.Lock()
+
+    # ---------------------------------------------------
+    # Ciclo de vida
+    # ---------------------------------------------------
+
+    async def servir(self, host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO):
+        """
+        Atiende conexiones hasta que se cancela la tarea (Ctrl+C).
+        Args:
+            host (str): Dirección donde escuchar.
+            puerto (int): Puerto donde escuchar.
+        """
+        servidor = await asyncio.start_server(self._atender_conexion, host, puerto)
+        persistencia = asyncio.create_task(self._persistir_periodicamente())
+        print(f"{VERDE}✓ Servidor escuchando en http://{host}:{puerto}{RESET}")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            persistencia.cancel()
+
+    async def guardar(self):
+        """
+        Guarda los cambios pendientes en un hilo, sin bloquear las lecturas.
+        Las modificaciones esperan a que termine. Solo la lectura y escritura de
+        archivos corre en el hilo: la copia del almacén y su reemplazo al fusionar
+        cambios de otras sesiones se ejecutan en el bucle, entre dos peticiones,
+        para que las lecturas nunca lo vean a medio reemplazar.
+        """
+        if not self.almacen.hay_cambios:
+            return
+        bucle = asyncio.get_running_loop()
+
+        def en_bucle(funcion, *args):
+            return asyncio.run_coroutine_threadsafe(_llamar(funcion, *args), bucle).result()
+
+        async with self._bloqueo:
+            await bucle.run_in_executor(None, guardar_inventario, self.almacen, None, en_bucle)
+
+    async def _persistir_periodicamente(self):
+        while True:
+            await asyncio.sleep(INTERVALO_GUARDADO)
+            await self.guardar()
+
+    # ---------------------------------------------------
+    # HTTP
+    # ---------------------------------------------------
+
+    async def _atender_conexion(self, lector, escritor):
+        """
+        Atiende las peticiones de una conexión (HTTP/1.1 con keep-alive).
+        """
+        try:
+            while True:
+                try:
+                    cabecera = await asyncio.wait_for(lector.readuntil(b'\r\n\r\n'), TIEMPO_INACTIVIDAD)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._responder(escritor, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                        {'error': 'Encabezados demasiado grandes.'}, mantener=False)
+                    return
+
+                try:
+                    metodo, ruta, version, encabezados = _leer_cabecera(cabecera)
+                except ValueError:
+                    await self._responder(escritor, HTTPStatus.BAD_REQUEST,
+                        {'error': 'Petición HTTP inválida.'}, mantener=False)
+                    return
+
+                conexion = encabezados.get('connection', '').lower()
+                mantener = conexion != 'close' if version == 'HTTP/1.1' else conexion == 'keep-alive'
+
+                try:
+                    cuerpo = await self._leer_cuerpo(lector, encabezados)
+                except ErrorHTTP as e:
+                    # El cuerpo no se leyó: la conexión no se puede seguir usando
+                    await self._responder(escritor, e.estado, {'error': e.mensaje}, mantener=False)
+                    return
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                try:
+                    estado, respuesta = await self._despachar(metodo, ruta, cuerpo)
+                except ErrorHTTP as e:
+                    estado, respuesta = e.estado, {'error': e.mensaje}
+                except Exception as e:
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'Error inesperado: {e}'}
+
+                await self._responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    return
+        finally:
+            escritor.close()
+
+    async def _leer_cuerpo(self, lector, encabezados):
+        try:
+            largo = int(encabezados.get('content-length', 0))
+        except ValueError:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if largo < 0:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if largo > TAMANO_MAXIMO_CUERPO:
+            raise ErrorHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo de la petición demasiado grande.")
+        return await lector.readexactly(largo) if largo else b''
+
+    async def _responder(self, escritor, estado, respuesta, mantener=True):
+        # Un texto se envía tal cual (métricas Prometheus); lo demás como JSON
+        if isinstance(respuesta, str):
+            contenido, tipo = respuesta.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            contenido, tipo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8'), 'application/json'
+        escritor.write(
+            f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+            f"Content-Type: {tipo}; charset=utf-8\r\n"
+            f"Content-Length: {len(contenido)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1') + contenido)
+        try:
+            await escritor.drain()
+        except ConnectionError:
+            pass
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        """
+        Ejecuta la ruta que corresponde a la petición.
+        Returns:
+            tuple: (HTTPStatus, objeto JSON de la respuesta o texto)
+        Raises:
+            ErrorHTTP: Si la ruta no existe o la petición es inválida.
+        """
+        partes = urlsplit(ruta)
+        segmentos = [unquote(segmento) for segmento in partes.path.strip('/').split('/') if segmento]
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+
+        if segmentos == ['productos']:
+            if metodo == 'GET':
+                return HTTPStatus.OK, self.listar(consulta)
+            if metodo == 'POST':
+                return HTTPStatus.CREATED, await self.registrar(_leer_json(cuerpo))
+        elif segmentos == ['buscar']:
+            if metodo == 'GET':
+                return HTTPStatus.OK, self.buscar(consulta)
+        elif segmentos == ['metricas']:
+            if metodo == 'GET':
+                return HTTPStatus.OK, self.metricas(consulta)
+        elif len(segmentos) == 2 and segmentos[0] == 'productos':
+            if metodo == 'GET':
+                return HTTPStatus.OK, dict(self._obtener(segmentos[1]))
+            if metodo == 'DELETE':
+                return HTTPStatus.OK, await self.eliminar(segmentos[1])
+        elif len(segmentos) == 3 and segmentos[0] == 'productos' and segmentos[2] == 'stock':
+            if metodo in ('PATCH', 'PUT', 'POST'):
+                return HTTPStatus.OK, await self.actualizar_stock(segmentos[1], _leer_json(cuerpo))
+        else:
+            raise ErrorHTTP(HTTPStatus.NOT_FOUND, "Ruta inexistente.")
+
+        raise ErrorHTTP(HTTPStatus.METHOD_NOT_ALLOWED, f"Método {metodo} no permitido en {partes.path}.")
+
+    # ---------------------------------------------------
+    # Lecturas (sin bloqueo)
+    # ---------------------------------------------------
+
+    def listar(self, consulta):
+        """
+        Lista paginada de productos ordenados por categoría y nombre.
+        Args:
+            consulta (dict): Parámetros categoria, pagina (desde 1) y tamano.
+        Returns:
+            dict: total, pagina, tamano y productos de la página.
+        """
+        pagina = _parametro_entero(consulta, 'pagina', 1, minimo=1)
+        tamano = _parametro_entero(consulta, 'tamano', TAMANO_PAGINA, minimo=1, maximo=TAMANO_MAXIMO_PAGINA)
+
+        productos_ordenados = self.almacen.productos_ordenados()
+        categoria = consulta.get('categoria', '').strip().upper()
+        if categoria:
+            inicio, fin = self.almacen.rango_categoria(categoria)
+        else:
+            inicio, fin = 0, len(productos_ordenados)
+
+        desde = inicio + (pagina - 1) * tamano
+        return {
+            'total': fin - inicio,
+            'pagina': pagina,
+            'tamano': tamano,
+            'productos': [dict(producto) for producto in productos_ordenados[desde:min(desde + tamano, fin)]],
+        }
+
+    def buscar(self, consulta):
+        """
+        Busca por SKU o nombre (mismos índices que el menú), ordenado por relevancia.
+        Args:
+            consulta (dict): Parámetros q (término) y limite.
+        Returns:
+            dict: Cantidad y lista de los productos más relevantes (hasta el límite).
+        """
+        busqueda = consulta.get('q', '').strip()
+        if not busqueda:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Debe indicar un término de búsqueda (q).")
+        limite = _parametro_entero(consulta, 'limite', LIMITE_BUSQUEDA, minimo=1, maximo=TAMANO_MAXIMO_PAGINA)
+
+        coincidencias = buscar_producto(self.almacen, busqueda, limite)
+        return {
+            'total': len(coincidencias),
+            'productos': [dict(producto) for producto in coincidencias],
+        }
+
+    def metricas(self, consulta):
+        """
+        Métricas de rendimiento del proceso (ver metricas.py).
+        Args:
+            consulta (dict): Parámetro formato ('prometheus' por defecto o 'json').
+        Returns:
+            str o dict: Texto Prometheus o el resumen para responder como JSON.
+        """
+        formato = consulta.get('formato', 'prometheus').strip().lower()
+        if formato == 'prometheus':
+            return metricas.exportar_prometheus()
+        if formato == 'json':
+            return metricas.resumen()
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Formato inválido (opciones: prometheus, json).")
+
+    def _obtener(self, sku):
+        producto = self.almacen.obtener(sku.strip().upper())
+        if producto is None:
+            raise ErrorHTTP(HTTPStatus.NOT_FOUND, f"No existe el SKU '{sku}'.")
+        return producto
+
+    # ---------------------------------------------------
+    # Modificaciones (serializadas)
+    # ---------------------------------------------------
+
+    async def registrar(self, datos):
+        """
+        Registra un producto nuevo.
+        Args:
+            datos (dict): sku, nombre, categoria, precio y stock.
+        Returns:
+            dict: Producto registrado.
+        """
+        try:
+            producto = validar_producto(datos)
+        except ValueError as e:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, str(e))
+
+        async with self._bloqueo:
+            if producto['sku'] in self.almacen.skus_usados:
+                raise ErrorHTTP(HTTPStatus.CONFLICT, f"El SKU '{producto['sku']}' ya existe en el inventario.")
+            return dict(self.almacen.agregar(producto))
+
+    async def actualizar_stock(self, sku, datos):
+        """
+        Actualiza el stock con un valor absoluto ('stock') o relativo ('delta').
+        Args:
+            sku (str): SKU del producto.
+            datos (dict): {"stock": n} o {"delta": n}.
+        Returns:
+            dict: Producto actualizado.
+        """
+        if not isinstance(datos, dict) or ('stock' in datos) == ('delta' in datos):
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "Debe indicar 'stock' o 'delta' (solo uno).")
+
+        async with self._bloqueo:
+            producto = self._obtener(sku)
+            try:
+                if 'stock' in datos:
+                    nuevo_stock = validar_entero(datos['stock'], 'stock')
+                else:
+                    nuevo_stock = producto['stock'] + validar_entero(datos['delta'], 'delta')
+            except ValueError as e:
+                raise ErrorHTTP(HTTPStatus.BAD_REQUEST, str(e))
+            if nuevo_stock < 0:
+                raise ErrorHTTP(HTTPStatus.CONFLICT, f"El stock resultante es negativo ({nuevo_stock}).")
+
+            if nuevo_stock != producto['stock']:
+                self.almacen.actualizar_stock(producto['sku'], nuevo_stock)
+            return dict(producto)
+
+    async def eliminar(self, sku):
+        """
+        Elimina un producto.
+        Args:
+            sku (str): SKU del producto.
+        Returns:
+            dict: Producto eliminado.
+        """
+        async with self._bloqueo:
+            producto = self._obtener(sku)
+            self.almacen.eliminar(producto['sku'])
+            return dict(producto)
+
+
+# ===================================================
+# FUNCIONES AUXILIARES
+# ===================================================
+
+async def _llamar(funcion, *args):
+    return funcion(*args)
+
+
+def _leer_cabecera(cabecera):
+    """
+    Separa la línea de petición y los encabezados.
+    Returns:
+        tuple: (método, ruta, versión, encabezados en minúsculas)
+    Raises:
+        ValueError: Si la cabecera no es HTTP válido.
+    """
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    metodo, ruta, version = lineas[0].split(' ')
+    if not version.startswith('HTTP/'):
+        raise ValueError(version)
+
+    encabezados = {}
+    for linea in lineas[1:]:
+        if linea:
+            nombre, valor = linea.split(':', 1)
+            encabezados[nombre.strip().lower()] = valor.strip()
+    return metodo.upper(), ruta, version, encabezados
+
+
+def _leer_json(cuerpo):
+    try:
+        return json.loads(cuerpo.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "El cuerpo debe ser JSON válido.")
+
+
+def _parametro_entero(consulta, nombre, defecto, minimo=None, maximo=None):
+    if nombre not in consulta:
+        return defecto
+    try:
+        valor = int(consulta[nombre])
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, f"El parámetro '{nombre}' debe ser un número entero.")
+    if minimo is not None and valor < minimo:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, f"El parámetro '{nombre}' debe ser mayor o igual a {minimo}.")
+    return min(valor, maximo) if maximo is not None else valor
+
+
+def ejecutar_servidor(host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO):
+    """
+    Carga el inventario y atiende la API hasta Ctrl+C; al salir guarda los cambios pendientes.
+    Args:
+        host (str): Dirección donde escuchar.
+        puerto (int): Puerto donde escuchar.
+    Returns:
+        int: Código de salida.
+    """
+    almacen = cargar_inventario()
+    try:
+        asyncio.run(ServidorInventario(almacen).servir(host, puerto))
+    except KeyboardInterrupt:
+        print(f"\n{CYAN}Servidor detenido.{RESET}")
+    except OSError as e:
+        print(f"{ROJO}✗ No se pudo iniciar el servidor en {host}:{puerto}: {e}{RESET}")
+        return 2
+    finally:
+        if almacen.hay_cambios:
+            guardar_inventario(almacen)
+        esperar_guardado()
+    return 0
@@ -0,0 +1,122 @@
+import sys
+from utils import VERDE, AMARILLO, CYAN, NEGRITA, RESET, formatear_precio
+
+# ===================================================
+# CONSTANTES
+# ===================================================
+TAMANO_PAGINA = 50
+
+# Filas que se acumulan antes de cada escritura a la terminal
+FILAS_POR_ESCRITURA = 500
+
+
+# ===================================================
+# FUNCIONES DE LA TABLA
+# ===================================================
+
+def calcular_ancho_total(anchos):
+    """
+    Calcula el ancho total de la tabla (columnas más separadores).
+    Args:
+        anchos (dict): Anchos de cada columna.
+    Returns:
+        int: Ancho total en caracteres.
+    """
+    return (anchos['sku'] + anchos['nombre'] + anchos['categoria'] + anchos['precio'] + anchos['stock'] + anchos['total'] + 17)
+
+
+def formatear_fila(producto, anchos):
+    """
+    Formatea y alinea las columnas de un producto.
+    Args:
+        producto (Producto o dict): Producto a formatear.
+        anchos (dict): Anchos de cada columna.
+    Returns:
+        str: Fila de la tabla terminada en salto de línea.
+    """
+    # Calcula precio total por producto (precio * stock)
+    precio_total = producto['precio'] * producto['stock']
+
+    sku_truncado = producto['sku'][:anchos['sku']]
+    nombre_truncado = producto['nombre'][:anchos['nombre']]
+    categoria_truncada = producto['categoria'][:anchos['categoria']]
+
+    return (f"{sku_truncado.ljust(anchos['sku'])} | "
+        f"{nombre_truncado.ljust(anchos['nombre'])} | "
+        f"{categoria_truncada.ljust(anchos['categoria'])} | "
+        f"{formatear_precio(producto['precio']).rjust(anchos['precio'])} | "
+        f"{str(producto['stock']).rjust(anchos['stock'])} | "
+        f"{formatear_precio(precio_total).rjust(anchos['total'])}\n")
+
+
+def generar_filas(productos, anchos):
+    """
+    Genera las filas de la tabla de forma perezosa.
+    Args:
+        productos (iterable): Productos a mostrar.
+        anchos (dict): Anchos de cada columna.
+    Yields:
+        str: Fila formateada.
+    """
+    for producto in productos:
+        yield formatear_fila(producto, anchos)
+
+
+def generar_encabezado(anchos, titulo):
+    """
+    Genera las líneas del encabezado de la tabla.
+    Args:
+        anchos (dict): Anchos de cada columna.
+        titulo (str): Título centrado sobre la tabla.
+    Yields:
+        str: Línea del encabezado.
+    """
+    ancho_total = calcular_ancho_total(anchos)
+    yield f"\n{CYAN}{NEGRITA}{'='*ancho_total}{RESET}\n"
+    yield f"{AMARILLO}{titulo.center(ancho_total)}{RESET}\n"
+    yield f"{CYAN}{NEGRITA}{'='*ancho_total}{RESET}\n"
+
+    # Encabezados de columnas
+    yield (f"{VERDE}{'SKU'.ljust(anchos['sku'])} | "
+        f"{'NOMBRE'.ljust(anchos['nombre'])} | "
+        f"{'CATEGORÍA'.ljust(anchos['categoria'])} | "
+        f"{'PRECIO (CLP)'.rjust(anchos['precio'])} | "
+        f"{'STOCK'.rjust(anchos['stock'])} | "
+        f"{'TOTAL (CLP)'.rjust(anchos['total'])}{RESET}\n")
+    yield f"{CYAN}{'-'*ancho_total}{RESET}\n"
+
+
+def generar_pie(anchos, suma_total):
+    """
+    Genera las líneas del pie de tabla con el valor total.
+    Args:
+        anchos (dict): Anchos de cada columna.
+        suma_total (int): Valor total a mostrar.
+    Yields:
+        str: Línea del pie.
+    """
+    ancho_total = calcular_ancho_total(anchos)
+    yield f"{CYAN}{'='*ancho_total}{RESET}\n"
+    yield (f"{AMARILLO}{'VALOR TOTAL DEL INVENTARIO:'.ljust(ancho_total - anchos['total'] - 3)}"
+        f"{formatear_precio(suma_total).rjust(anchos['total'])}{RESET}\n")
+    yield f"{CYAN}{'='*ancho_total}{RESET}\n"
+
+
+def escribir_lineas(lineas, salida=None):
+    """
+    Escribe las líneas en bloques de FILAS_POR_ESCRITURA con una sola llamada
+    a write por bloque (en lugar de un print por fila).
+    Args:
+        lineas (iterable): Líneas terminadas en salto de línea.
+        salida (file): Destino de la escritura (por defecto sys.stdout).
+    """
+    salida = salida or sys.stdout
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= FILAS_POR_ESCRITURA:
+            salida.write(''.join(bloque))
+            bloque = []
+    if bloque:
+        salida.write(''.join(bloque))
+    salida.flush()
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from carga_diferida import IndiceSkus, firma_archivo, leer_producto
+
+
+class TestIndiceSkus(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        self.ruta_datos = os.path.join(self.directorio, 'inventario.txt')
+        self.ruta_indice = os.path.join(self.directorio, 'inventario.idx')
+        self.escribir_datos([
+            {'sku': f'SK{numero:04d}', 'nombre': f'Producto {numero}', 'categoria': 'LAPTOPS',
+                'precio': 1000 + numero, 'stock': numero}
+            for numero in range(50)
+        ])
+
+    def escribir_datos(self, productos):
+        with open(self.ruta_datos, 'wb') as f:
+            f.write(json.dumps(productos, ensure_ascii=False, indent=4).encode('utf-8'))
+
+    def leer_datos(self):
+        with open(self.ruta_datos, 'rb') as f:
+            return f.read()
+
+    def guardar_indice(self):
+        datos = self.leer_datos()
+        indice = IndiceSkus.construir(datos)
+        indice.guardar(self.ruta_indice, firma_archivo(self.ruta_datos, datos))
+        return indice
+
+    def abrir_indice(self):
+        datos = self.leer_datos()
+        indice = IndiceSkus.abrir(self.ruta_indice, firma_archivo(self.ruta_datos, datos))
+        if indice is not None:
+            self.addCleanup(indice.cerrar)
+        return datos, indice
+
+    def test_indice_guardado_se_abre_y_encuentra_los_productos(self):
+        self.guardar_indice()
+        datos, indice = self.abrir_indice()
+
+        self.assertIsNotNone(indice)
+        self.assertEqual(len(indice), 50)
+        posiciones = list(indice.candidatos('SK0042'))
+        self.assertIn('SK0042', [leer_producto(datos, posicion)['sku'] for posicion in posiciones])
+
+    def test_indice_se_invalida_si_cambia_el_archivo(self):
+        self.guardar_indice()
+        productos = json.loads(self.leer_datos())
+        productos[0]['stock'] = 99
+        self.escribir_datos(productos)
+
+        _, indice = self.abrir_indice()
+        self.assertIsNone(indice)
+
+    def test_indice_danado_no_se_usa(self):
+        self.guardar_indice()
+        with open(self.ruta_indice, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            ultimo = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([ultimo[0] ^ 0xFF]))
+
+        _, indice = self.abrir_indice()
+        self.assertIsNone(indice)
+
+    def test_sin_indice_guardado(self):
+        _, indice = self.abrir_indice()
+        self.assertIsNone(indice)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from almacen import Almacen
+from concurrencia import fusionar_cambios
+
+
+def _productos():
+    return [
+        {'sku': 'NB1001', 'nombre': 'Notebook Pro', 'categoria': 'LAPTOPS', 'precio': 900000, 'stock': 10},
+        {'sku': 'MN2002', 'nombre': 'Monitor 27', 'categoria': 'PERIFÉRICOS', 'precio': 250000, 'stock': 4},
+    ]
+
+
+class TestFusionarCambios(unittest.TestCase):
+    """
+    Cambios de una sesión aplicados sobre el inventario que otra sesión guardó.
+    'disco' es lo que hay guardado y 'sesion' la copia que se leyó antes de ese guardado.
+    """
+
+    def setUp(self):
+        self.disco = Almacen(_productos())
+        self.sesion = Almacen(_productos())
+
+    def fusionar(self):
+        return fusionar_cambios(self.disco, self.sesion.tomar_cambios())
+
+    def test_sin_cambios_de_otra_sesion_se_aplican_tal_cual(self):
+        self.sesion.actualizar_stock('NB1001', 3)
+        self.sesion.actualizar_precio('MN2002', 199990)
+
+        self.assertEqual(self.fusionar(), [])
+        self.assertEqual(self.disco.obtener('NB1001')['stock'], 3)
+        self.assertEqual(self.disco.obtener('MN2002')['precio'], 199990)
+
+    def test_stock_modificado_por_otra_sesion_suma_la_diferencia(self):
+        self.disco.actualizar_stock('NB1001', 15)   # Otra sesión: +5
+        self.sesion.actualizar_stock('NB1001', 7)   # Esta sesión: -3
+        self.sesion.actualizar_stock('NB1001', 8)   # y luego +1
+
+        self.assertEqual(self.fusionar(), [])
+        self.assertEqual(self.disco.obtener('NB1001')['stock'], 13)
+
+    def test_stock_que_quedaria_negativo_es_conflicto(self):
+        self.disco.actualizar_stock('NB1001', 2)    # Otra sesión vendió 8
+        self.sesion.actualizar_stock('NB1001', 0)   # Esta sesión vendió 10
+
+        conflictos = self.fusionar()
+        self.assertEqual(len(conflictos), 1)
+        self.assertIn('NB1001', conflictos[0])
+        self.assertEqual(self.disco.obtener('NB1001')['stock'], 2)
+
+    def test_precio_de_producto_modificado_es_conflicto(self):
+        self.disco.actualizar_stock('MN2002', 5)
+        self.sesion.actualizar_precio('MN2002', 1)
+
+        conflictos = self.fusionar()
+        self.assertEqual(len(conflictos), 1)
+        self.assertEqual(self.disco.obtener('MN2002')['precio'], 250000)
+        self.assertEqual(self.disco.obtener('MN2002')['stock'], 5)
+
+    def test_eliminar_producto_modificado_es_conflicto(self):
+        self.disco.renombrar('MN2002', 'Monitor 27 QHD')
+        self.sesion.eliminar('MN2002')
+
+        self.assertEqual(len(self.fusionar()), 1)
+        self.assertIn('MN2002', self.disco)
+
+    def test_cambio_sobre_producto_eliminado_es_conflicto(self):
+        self.disco.eliminar('NB1001')
+        self.sesion.actualizar_stock('NB1001', 1)
+
+        self.assertEqual(len(self.fusionar()), 1)
+        self.assertNotIn('NB1001', self.disco)
+
+    def test_registro_de_sku_existente_es_conflicto(self):
+        nuevo = {'sku': 'KB3003', 'nombre': 'Teclado', 'categoria': 'ACCESORIOS', 'precio': 30000, 'stock': 1}
+        self.disco.agregar(nuevo)
+        self.sesion.agregar(dict(nuevo, nombre='Teclado mecánico'))
+
+        self.assertEqual(len(self.fusionar()), 1)
+        self.assertEqual(self.disco.obtener('KB3003')['nombre'], 'Teclado')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import formatos
+from formatos import iterar_productos
+
+
+class TestIterarProductos(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        self.ruta = os.path.join(self.directorio, 'inventario.txt')
+
+    def escribir(self, texto):
+        with open(self.ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+
+    def test_elementos_cortados_entre_bloques(self):
+        productos = [
+            {'sku': f'SK{numero}', 'nombre': f'Prod "{numero}" ñ \\u00e9', 'categoria': 'LAPTOPS',
+                'precio': 1.5e-3 * numero, 'stock': numero, 'activo': numero % 2 == 0, 'umbral': None}
+            for numero in range(40)
+        ]
+        self.escribir(json.dumps(productos, ensure_ascii=False, indent=4))
+        # Bloques pequeños: cada tipo de token queda cortado en algún punto
+        for tamano in (1, 3, 7, 64):
+            with mock.patch.object(formatos, 'TAMANO_BLOQUE', tamano):
+                self.assertEqual(list(iterar_productos(self.ruta)), productos)
+
+    def test_elemento_corrupto_no_lee_el_resto_del_archivo(self):
+        relleno = [{'sku': f'SK{numero}', 'nombre': 'x' * 100} for numero in range(2000)]
+        self.escribir('[{"sku": "A1"}, {"sku": "A2" "nombre": 1}, ' + json.dumps(relleno)[1:])
+        leidos = []
+        progreso = lambda leido, total: leidos.append(leido)
+
+        with mock.patch.object(formatos, 'TAMANO_BLOQUE', 1024):
+            with self.assertRaises(json.JSONDecodeError):
+                list(iterar_productos(self.ruta, progreso))
+        self.assertLessEqual(max(leidos), 2048)
+
+    def test_elementos_que_no_son_objetos(self):
+        self.escribir('[1, 2]')
+        with self.assertRaises(json.JSONDecodeError):
+            list(iterar_productos(self.ruta))
+
+        self.escribir('{"sku": "A1"}\n[1]\n')
+        with self.assertRaises(json.JSONDecodeError):
+            list(iterar_productos(self.ruta))
+
+
+if __name__ == '__main__':
+    unittest.main()
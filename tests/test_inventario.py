@@ -0,0 +1,142 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import inventario
+
+
+def _producto(sku, stock):
+    return {'sku': sku, 'nombre': f'Producto {sku}', 'categoria': 'LAPTOPS', 'precio': 1000, 'stock': stock}
+
+
+class PruebaConArchivos(unittest.TestCase):
+    """
+    Redirige todas las rutas de inventario.py a un directorio temporal.
+    """
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        for nombre in dir(inventario):
+            if nombre.startswith('RUTA_'):
+                ruta = os.path.join(self.directorio, os.path.basename(getattr(inventario, nombre)))
+                parche = mock.patch.object(inventario, nombre, ruta)
+                parche.start()
+                self.addCleanup(parche.stop)
+        self.addCleanup(inventario.esperar_guardado)
+
+    def silencioso(self, funcion, *args, **kwargs):
+        """
+        Ejecuta la función sin mostrar sus mensajes.
+        Returns:
+            tuple: (resultado, texto mostrado)
+        """
+        salida = io.StringIO()
+        with contextlib.redirect_stdout(salida):
+            resultado = funcion(*args, **kwargs)
+        return resultado, salida.getvalue()
+
+    def cargar(self):
+        return self.silencioso(inventario.cargar_inventario)[0]
+
+    def guardar(self, almacen, compactar=False):
+        if compactar:
+            self.silencioso(inventario.compactar_inventario, almacen, en_segundo_plano=False)
+        else:
+            self.silencioso(inventario.guardar_inventario, almacen, en_segundo_plano=False)
+
+    def escribir_journal(self, texto):
+        with open(inventario.RUTA_JOURNAL, 'w', encoding='utf-8') as f:
+            f.write(texto)
+
+
+class TestJournal(PruebaConArchivos):
+
+    def setUp(self):
+        super().setUp()
+        almacen = self.cargar()
+        almacen.agregar(_producto('NB1001', 10))
+        almacen.agregar(_producto('NB1002', 5))
+        self.guardar(almacen, compactar=True)
+
+    def test_los_cambios_guardados_se_aplican_al_cargar(self):
+        almacen = self.cargar()
+        almacen.actualizar_stock('NB1001', 7)
+        almacen.eliminar('NB1002')
+        self.guardar(almacen)
+        self.assertTrue(os.path.exists(inventario.RUTA_JOURNAL))
+
+        recargado = self.cargar()
+        self.assertEqual(recargado.obtener('NB1001')['stock'], 7)
+        self.assertNotIn('NB1002', recargado)
+        self.assertFalse(recargado.hay_cambios)
+
+    def test_ultima_linea_cortada_se_descarta(self):
+        operacion = {'op': 'stock', 'sku': 'NB1001', 'stock': 8, 'delta': -2, 'version': 1}
+        self.escribir_journal(json.dumps(operacion) + '\n{"op": "stock", "sku": "NB10')
+
+        almacen, salida = self.silencioso(inventario.cargar_inventario)
+        self.assertEqual(almacen.obtener('NB1001')['stock'], 8)
+        self.assertEqual(almacen.obtener('NB1002')['stock'], 5)
+        self.assertIn('Línea 2 del journal inválida', salida)
+
+        # El siguiente guardado empieza en una línea nueva y se lee completo
+        almacen.actualizar_stock('NB1002', 1)
+        self.guardar(almacen)
+        recargado = self.cargar()
+        self.assertEqual(recargado.obtener('NB1001')['stock'], 8)
+        self.assertEqual(recargado.obtener('NB1002')['stock'], 1)
+
+
+class TestRecuperacionDeGeneraciones(PruebaConArchivos):
+
+    def corromper_principal(self):
+        with open(inventario.RUTA_INVENTARIO, 'w', encoding='utf-8') as f:
+            f.write('[{"sku": "NB1001", "nombre": ')
+
+    def test_recupera_la_generacion_anterior_sin_aplicarle_el_journal(self):
+        almacen = self.cargar()
+        almacen.agregar(_producto('NB1001', 10))
+        self.guardar(almacen, compactar=True)
+        almacen.actualizar_stock('NB1001', 4)
+        self.guardar(almacen, compactar=True)       # inventario.txt.1 queda con stock 10
+        almacen.actualizar_stock('NB1001', 3)
+        almacen.agregar(_producto('NB1002', 6))
+        self.guardar(almacen)                       # Dos operaciones en el journal
+        self.corromper_principal()
+
+        recuperado, salida = self.silencioso(inventario.cargar_inventario)
+        self.assertIn('inventario.txt.1', salida)
+        self.assertIn('2 operaciones', salida)
+        self.assertEqual(recuperado.obtener('NB1001')['stock'], 10)
+        self.assertNotIn('NB1002', recuperado)
+        self.assertTrue(recuperado.compactar_pendiente)
+        self.assertTrue(os.path.exists(inventario.RUTA_BACKUP))
+
+        # El journal se conserva aparte y no vuelve a aplicarse
+        self.assertFalse(os.path.exists(inventario.RUTA_JOURNAL))
+        with open(inventario.RUTA_JOURNAL + '.descartado', encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+        # El guardado reemplaza el archivo dañado por la versión recuperada
+        self.guardar(recuperado)
+        recargado = self.cargar()
+        self.assertEqual(recargado.obtener('NB1001')['stock'], 10)
+        self.assertFalse(recargado.compactar_pendiente)
+
+    def test_sin_generaciones_inicia_vacio_y_descarta_el_journal(self):
+        self.corromper_principal()
+        self.escribir_journal(json.dumps({'op': 'registrar', 'producto': _producto('NB1001', 1)}) + '\n')
+
+        almacen, salida = self.silencioso(inventario.cargar_inventario)
+        self.assertEqual(len(almacen), 0)
+        self.assertIn('1 operaciones', salida)
+        self.assertFalse(os.path.exists(inventario.RUTA_JOURNAL))
+
+
+if __name__ == '__main__':
+    unittest.main()
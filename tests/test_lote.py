@@ -0,0 +1,60 @@
+import unittest
+from almacen import Almacen
+from lote import aplicar_lote
+
+
+def _productos():
+    return [
+        {'sku': 'NB1001', 'nombre': 'Notebook Pro', 'categoria': 'LAPTOPS', 'precio': 900000, 'stock': 10},
+        {'sku': 'MN2002', 'nombre': 'Monitor 27', 'categoria': 'PERIFÉRICOS', 'precio': 250000, 'stock': 4},
+        {'sku': 'KB3003', 'nombre': 'Teclado', 'categoria': 'PERIFÉRICOS', 'precio': 30000, 'stock': 0},
+    ]
+
+
+class TestBajasEnLote(unittest.TestCase):
+    """
+    Filas con la columna 'eliminar', que se aplican juntas con Almacen.eliminar_varios.
+    """
+
+    def setUp(self):
+        self.almacen = Almacen(_productos())
+
+    def aplicar(self, *registros):
+        return aplicar_lote(self.almacen, enumerate(registros, 1))
+
+    def test_elimina_los_productos_y_libera_sus_skus(self):
+        resultado = self.aplicar(
+            {'sku': 'nb1001', 'eliminar': 'si'},
+            {'sku': 'KB3003', 'eliminar': True},
+            {'sku': 'MN2002', 'delta': '-1', 'eliminar': ''},
+        )
+
+        self.assertEqual(resultado['rechazados'], [])
+        self.assertEqual((resultado['aplicados'], resultado['productos']), (3, 3))
+        self.assertEqual([producto['sku'] for producto in self.almacen], ['MN2002'])
+        self.assertEqual(self.almacen.obtener('MN2002')['stock'], 3)
+        self.assertNotIn('NB1001', self.almacen.skus_usados)
+        self.assertEqual([cambio['op'] for cambio in self.almacen.tomar_cambios()],
+            ['eliminar', 'eliminar', 'stock'])
+
+    def test_la_baja_descarta_los_cambios_anteriores_y_rechaza_los_posteriores(self):
+        resultado = self.aplicar(
+            {'sku': 'NB1001', 'delta': '5', 'precio': '850000'},
+            {'sku': 'NB1001', 'eliminar': '1'},
+            {'sku': 'NB1001', 'delta': '1'},
+        )
+
+        self.assertEqual(resultado['rechazados'],
+            [(3, 'NB1001', 'El producto se elimina en una fila anterior')])
+        self.assertIsNone(self.almacen.obtener('NB1001'))
+        self.assertEqual([cambio['op'] for cambio in self.almacen.tomar_cambios()], ['eliminar'])
+
+    def test_baja_con_otros_valores_se_rechaza(self):
+        resultado = self.aplicar({'sku': 'NB1001', 'stock': '0', 'eliminar': 'x'})
+
+        self.assertEqual(len(resultado['rechazados']), 1)
+        self.assertEqual(len(self.almacen), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
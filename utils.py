@@ -1,3 +1,5 @@
+from busqueda import normalizar
+
 # ===================================================
 # CONSTANTES
 # ===================================================
@@ -11,6 +13,31 @@ RESET = '\033[0m'
 
 CATEGORIAS = ("LAPTOPS", "PERIFÉRICOS", "ACCESORIOS")
 
+# Punto de reorden de cada categoría: un producto sin umbral propio entra en
+# alerta cuando su stock llega a este valor o menos
+UMBRALES_POR_CATEGORIA = {"LAPTOPS": 3, "PERIFÉRICOS": 5, "ACCESORIOS": 10}
+
+# Resultados de búsqueda que se muestran para seleccionar (los más relevantes)
+LIMITE_RESULTADOS = 20
+
+# Anchos mínimos (basados en los encabezados) y máximos de las columnas de la tabla
+ANCHOS_MINIMOS = {
+    'sku': len("SKU"),
+    'nombre': len("NOMBRE"),
+    'categoria': len("CATEGORÍA"),
+    'precio': len("PRECIO (CLP)"),
+    'stock': len("STOCK"),
+    'total': len("TOTAL (CLP)")
+}
+ANCHOS_MAXIMOS = {
+    'sku': 15,
+    'nombre': 40,
+    'categoria': 20,
+    'precio': 15,
+    'stock': 8,
+    'total': 15
+}
+
 
 # ===================================================
 # FUNCIONES AUXILIARES
@@ -28,7 +55,10 @@ def mostrar_menu():
     print(f"{CYAN}  3. Actualizar Stock{RESET}")
     print(f"{CYAN}  4. Eliminar Producto{RESET}")
     print(f"{CYAN}  5. Guardar Inventario{RESET}")
-    print(f"{CYAN}  6. Salir{RESET}")
+    print(f"{CYAN}  6. Estadísticas{RESET}")
+    print(f"{CYAN}  7. Diagnóstico{RESET}")
+    print(f"{CYAN}  8. Alertas de Stock{RESET}")
+    print(f"{CYAN}  9. Salir{RESET}")
     print(f"{CYAN}{NEGRITA}{'='*60}{RESET}\n")
 
 
@@ -94,22 +124,31 @@ def seleccionar_categoria():
             print(f"{ROJO}Error: Debe ingresar un número válido.{RESET}")
 
 
-def buscar_producto(productos, busqueda):
+def buscar_producto(productos, busqueda, limite=None):
     """
-    Realiza búsqueda parcial en el nombre o exacta en SKU.
+    Realiza búsqueda parcial en el nombre o exacta en SKU (sin distinguir tildes).
+    Si recibe un Almacen usa sus índices y ordena por relevancia (incluye prefijos
+    y coincidencias aproximadas); si recibe una lista la recorre completa.
     Args:
-        productos (list): Lista de diccionarios de productos.
+        productos (Almacen o list): Almacén indexado o lista de diccionarios de productos.
         busqueda (str): Término de búsqueda ingresado por el usuario.
+        limite (int): Cantidad máxima de resultados (None: todos).
     Returns:
         list: Lista de productos que coinciden con la búsqueda.
     """
-    busqueda = busqueda.upper()
+    # Un almacén indexado resuelve la búsqueda sin recorrer toda la lista
+    if hasattr(productos, 'buscar'):
+        return productos.buscar(busqueda, limite)
+
+    busqueda = normalizar(busqueda.strip())
+    if not busqueda:
+        return []
     coincidencias = []
     
     for producto in productos:
-        if busqueda == producto['sku'] or busqueda in producto['nombre']:
+        if busqueda == producto['sku'] or busqueda in normalizar(producto['nombre']):
             coincidencias.append(producto)
-    return coincidencias
+    return coincidencias[:limite]
 
 
 def seleccionar_de_lista(coincidencias, titulo="Resultados encontrados"):
@@ -162,41 +201,135 @@ def confirmar_accion(mensaje):
             print(f"{ROJO}Error: Responda 'S' para Sí o 'N' para No.{RESET}")
 
 
+def validar_producto(datos):
+    """
+    Valida y normaliza los datos de un producto recibidos sin el menú
+    (API, importaciones). Aplica las mismas reglas que el registro interactivo.
+    Args:
+        datos (dict): Datos con sku, nombre, categoria, precio, stock y umbral (opcional).
+    Returns:
+        dict: Producto normalizado (SKU, nombre y categoría en mayúsculas).
+    Raises:
+        ValueError: Con el motivo, si algún dato es inválido.
+    """
+    if not isinstance(datos, dict):
+        raise ValueError("El producto debe ser un objeto con sus campos.")
+
+    sku = str(datos.get('sku') or '').strip().upper()
+    if not sku:
+        raise ValueError("El SKU no puede estar vacío.")
+
+    nombre = str(datos.get('nombre') or '').strip().upper()
+    if not nombre:
+        raise ValueError("El nombre no puede estar vacío.")
+
+    categoria = str(datos.get('categoria') or '').strip().upper()
+    if categoria not in CATEGORIAS:
+        raise ValueError(f"Categoría inválida. Opciones: {', '.join(CATEGORIAS)}.")
+
+    precio = validar_entero(datos.get('precio'), 'precio')
+    if precio <= 0:
+        raise ValueError("El precio debe ser mayor a 0.")
+
+    stock = validar_entero(datos.get('stock'), 'stock')
+    if stock < 0:
+        raise ValueError("El stock debe ser mayor o igual a 0.")
+
+    producto = {'sku': sku, 'nombre': nombre, 'categoria': categoria, 'precio': precio, 'stock': stock}
+
+    # Umbral opcional: sin él, el producto usa el de su categoría
+    umbral = datos.get('umbral')
+    if umbral is not None and str(umbral).strip() != '':
+        producto['umbral'] = validar_entero(umbral, 'umbral')
+        if producto['umbral'] < 0:
+            raise ValueError("El umbral debe ser mayor o igual a 0.")
+    return producto
+
+
+def obtener_umbral(producto):
+    """
+    Punto de reorden de un producto: su umbral propio o el de su categoría.
+    Args:
+        producto (Producto o dict): Producto.
+    Returns:
+        int: Umbral (0 si la categoría no tiene uno definido).
+    """
+    umbral = producto.get('umbral')
+    if umbral is None:
+        return UMBRALES_POR_CATEGORIA.get(producto['categoria'], 0)
+    return umbral
+
+
+def validar_entero(valor, campo):
+    """
+    Convierte a entero un valor recibido sin el menú (número o texto).
+    Args:
+        valor: Valor a convertir.
+        campo (str): Nombre del campo (para el mensaje de error).
+    Returns:
+        int: Valor convertido.
+    Raises:
+        ValueError: Si el valor no es un entero válido.
+    """
+    try:
+        if isinstance(valor, (bool, float)):
+            raise ValueError
+        return int(str(valor).strip())
+    except ValueError:
+        raise ValueError(f"El campo '{campo}' debe ser un número entero.") from None
+
+
+def calcular_largos(producto):
+    """
+    Calcula el largo de cada columna de la tabla para un producto.
+    Args:
+        producto (Producto o dict): Producto a medir.
+    Returns:
+        dict: Largo del contenido de cada columna.
+    """
+    precio_total = producto['precio'] * producto['stock']
+    return {
+        'sku': len(producto['sku']),
+        'nombre': len(producto['nombre']),
+        'categoria': len(producto['categoria']),
+        'precio': len(formatear_precio(producto['precio'])),
+        'stock': len(str(producto['stock'])),
+        'total': len(formatear_precio(precio_total))
+    }
+
+
+def ajustar_anchos(largos_maximos):
+    """
+    Aplica los anchos mínimos (encabezados) y máximos (evita desborde) a las columnas.
+    Args:
+        largos_maximos (dict): Largo máximo del contenido de cada columna.
+    Returns:
+        dict: Diccionario con los anchos de cada columna.
+    """
+    return {
+        columna: min(max(largos_maximos.get(columna, 0), ANCHOS_MINIMOS[columna]), ANCHOS_MAXIMOS[columna])
+        for columna in ANCHOS_MINIMOS
+    }
+
+
 def calcular_anchos_columnas(productos):
     """
     Determina el ancho necesario para cada columna (evita desborde).
+    Si recibe un Almacen usa sus máximos mantenidos de forma incremental.
     Args:
-        productos (list): Lista de diccionarios de productos.
+        productos (Almacen o list): Almacén o lista de diccionarios de productos.
     Returns:
         dict: Diccionario con los anchos de cada columna.
     """
-    # Anchos mínimos basados en los encabezados
-    anchos = {
-        'sku': len("SKU"),
-        'nombre': len("NOMBRE"),
-        'categoria': len("CATEGORÍA"),
-        'precio': len("PRECIO (CLP)"),
-        'stock': len("STOCK"),
-        'total': len("TOTAL (CLP)")
-    }
+    # El almacén mantiene los anchos sin recorrer los productos
+    if hasattr(productos, 'anchos_columnas'):
+        return productos.anchos_columnas()
     
     # Analiza el contenido de los productos
+    largos_maximos = {}
     for producto in productos:
-        anchos['sku'] = max(anchos['sku'], len(producto['sku']))
-        anchos['nombre'] = max(anchos['nombre'], len(producto['nombre']))
-        anchos['categoria'] = max(anchos['categoria'], len(producto['categoria']))
-        anchos['precio'] = max(anchos['precio'], len(formatear_precio(producto['precio'])))
-        anchos['stock'] = max(anchos['stock'], len(str(producto['stock'])))
-        
-        precio_total = producto['precio'] * producto['stock']
-        anchos['total'] = max(anchos['total'], len(formatear_precio(precio_total)))
-    
-    # Aplica límites máximos para evitar desborde
-    anchos['sku'] = min(anchos['sku'], 15)
-    anchos['nombre'] = min(anchos['nombre'], 40)
-    anchos['categoria'] = min(anchos['categoria'], 20)
-    anchos['precio'] = min(anchos['precio'], 15)
-    anchos['stock'] = min(anchos['stock'], 8)
-    anchos['total'] = min(anchos['total'], 15)
+        for columna, largo in calcular_largos(producto).items():
+            if largo > largos_maximos.get(columna, 0):
+                largos_maximos[columna] = largo
     
-    return anchos
+    return ajustar_anchos(largos_maximos)